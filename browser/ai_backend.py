@@ -0,0 +1,95 @@
+import threading
+
+# Long-lived connection to the local Ollama server. All AI features share one
+# client (and with it one pooled HTTP connection) instead of going through the
+# module-level ollama functions, and every request passes keep_alive so the
+# model stays loaded between summaries. The ollama package is only imported
+# once the client is first used, which keeps it out of the browser startup.
+
+class AIBackend():
+    def __init__(self, host=None, keep_alive="30m", timeout=300):
+        self.host = host
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.client = None
+        self.lock = threading.Lock()
+        self.warming_models = set()
+        self.load_times = {}  # Seconds Ollama last needed to load a model, for load time estimates
+
+    def configure(self, keep_alive=None, host=None):
+        if keep_alive is not None:
+            self.keep_alive = keep_alive
+
+        if host is not None and host != self.host:
+            with self.lock:
+                self.host = host
+                self.client = None
+
+    def get_client(self):
+        with self.lock:
+            if self.client is None:
+                import ollama
+                self.client = ollama.Client(host=self.host, timeout=self.timeout)
+            return self.client
+
+    def chat_stream(self, model, messages, is_cancelled=None):
+        stream = self.get_client().chat(
+            model=model,
+            messages=messages,
+            stream=True,
+            keep_alive=self.keep_alive,
+        )
+
+        try:
+            for chunk in stream:
+                # Closing the stream drops the connection, which stops the generation
+                if is_cancelled is not None and is_cancelled():
+                    break
+                if chunk.get('done'):
+                    self.record_load_time(model, chunk)
+                yield chunk['message']['content']
+        finally:
+            stream.close()
+
+    def list_models(self):
+        return self.get_client().list()
+
+    def pull(self, model, stream=False):
+        return self.get_client().pull(model, stream=stream)
+
+    def delete(self, model):
+        return self.get_client().delete(model)
+
+    def record_load_time(self, model, response):
+        # Reused models report a load time close to 0, only real loads count
+        load_duration = response.get('load_duration') or 0
+        if load_duration > 100_000_000:
+            self.load_times[model] = load_duration / 1e9
+
+    def warm_up(self, model):
+        # Load the model into memory in the background, an empty generate
+        # request only loads the model without producing any tokens
+        with self.lock:
+            if model in self.warming_models:
+                return
+            self.warming_models.add(model)
+
+        thread = threading.Thread(target=self.run_warm_up, args=(model,), daemon=True)
+        thread.start()
+
+    def run_warm_up(self, model):
+        try:
+            response = self.get_client().generate(model=model, keep_alive=self.keep_alive)
+            self.record_load_time(model, response)
+            print(f"AI model {model} preloaded.")
+        except Exception as e:
+            print(f"Failed to preload AI model {model}: {e}")
+        finally:
+            with self.lock:
+                self.warming_models.discard(model)
+
+def format_keep_alive(minutes):
+    # Ollama treats negative values as "keep loaded forever"
+    if minutes < 0:
+        return -1
+    return f"{minutes}m"
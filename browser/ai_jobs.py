@@ -0,0 +1,116 @@
+import heapq
+import itertools
+import threading
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+# Dedicated queue for AI jobs. Jobs run on their own small thread pool so the
+# browser UI and the renderer processes keep CPU headroom, interactive jobs are
+# started before whole-page jobs, duplicate requests are coalesced on their key
+# and every job can be cancelled, even while it is streaming.
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_PAGE = 1
+
+job_counter = itertools.count(1)
+
+class AIJobSignals(QObject):
+    started = pyqtSignal()
+    finished = pyqtSignal(bool)  # True if the job was cancelled
+
+class AIJob(QRunnable):
+    def __init__(self, key, priority=PRIORITY_PAGE, signals=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.job_id = next(job_counter)
+        self.key = key
+        self.priority = priority
+        self.cancel_event = threading.Event()
+        self.signals = signals if signals is not None else AIJobSignals()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def execute(self):
+        raise NotImplementedError
+
+    @pyqtSlot()
+    def run(self):
+        self.signals.started.emit()
+
+        try:
+            if not self.is_cancelled():
+                self.execute()
+        except Exception as e:
+            print(f"AI job {self.job_id} failed: {e}")
+
+        self.signals.finished.emit(self.is_cancelled())
+
+class AIJobQueue(QObject):
+    def __init__(self, max_concurrency=1):
+        super().__init__()
+        self.max_concurrency = max(1, max_concurrency)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(self.max_concurrency)
+        self.pending = []
+        self.running = {}
+        self.jobs_by_key = {}
+
+    def submit(self, job):
+        # Return the already queued or running job for duplicate requests
+        existing = self.jobs_by_key.get(job.key)
+        if existing is not None and not existing.is_cancelled():
+            return existing
+
+        self.jobs_by_key[job.key] = job
+        heapq.heappush(self.pending, (job.priority, job.job_id, job))
+        self.dispatch()
+        return job
+
+    def dispatch(self):
+        while self.pending and len(self.running) < self.max_concurrency:
+            _, _, job = heapq.heappop(self.pending)
+
+            if job.is_cancelled():
+                self.forget(job)
+                job.signals.finished.emit(True)
+                continue
+
+            self.running[job.job_id] = job
+            job.signals.finished.connect(lambda cancelled, job=job: self.job_finished(job))
+            self.pool.start(job)
+
+    def job_finished(self, job):
+        self.running.pop(job.job_id, None)
+        self.forget(job)
+
+        # Breaks the reference cycle through the connection above once all
+        # other slots of the finished signal have run
+        job.signals.deleteLater()
+        self.dispatch()
+
+    def forget(self, job):
+        if self.jobs_by_key.get(job.key) is job:
+            del self.jobs_by_key[job.key]
+
+    def cancel(self, job):
+        job.cancel()
+        # A cancelled pending job is dropped on the next dispatch
+        self.dispatch()
+
+    def cancel_all(self):
+        for _, _, job in self.pending:
+            job.cancel()
+        for job in self.running.values():
+            job.cancel()
+
+        # Cancelled pending jobs are dropped on the next dispatch
+        self.dispatch()
+
+    def is_busy(self, ignore=None):
+        # ignore: a finishing job whose other finished slots haven't run yet
+        return any(job is not ignore for job in self.running.values()) or any(
+            job is not ignore for _, _, job in self.pending
+        )
@@ -0,0 +1,119 @@
+import os
+import re
+import sys
+import time
+import random
+import tempfile
+
+# Match throughput of the content blocker over a request log. Logs are recorded
+# by starting the browser with SILK_REQUEST_LOG=<path>, every request is written
+# as "<resource type>\t<url>\t<source host>". Without a log a synthetic one is
+# used, without filter lists the ones in config/filters or a generated list.
+# Usage: python3 benchmarks/bench_content_blocker.py [request log] [filter list ...]
+
+BROWSER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BROWSER_DIR)
+
+from content_blocker import (  # noqa: E402
+    compile_filter_lists,
+    load_filter_set,
+    find_filter_lists,
+    parse_rule,
+    pattern_to_regex,
+    FilterSet
+)
+
+def read_log(path):
+    requests = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) == 3:
+                requests.append((parts[1], parts[2], parts[0]))
+    return requests
+
+def build_filter_list(path, amount, seed=1):
+    rng = random.Random(seed)
+    words = ["ad", "ads", "banner", "track", "pixel", "beacon", "promo", "sponsor", "analytics", "metrics"]
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(amount):
+            kind = rng.random()
+            if kind < 0.6:
+                f.write(f"||{rng.choice(words)}{i}.example{i % 97}.com^\n")
+            elif kind < 0.8:
+                f.write(f"/{rng.choice(words)}/{rng.choice(words)}{i}-\n")
+            elif kind < 0.9:
+                f.write(f"||cdn{i}.net/{rng.choice(words)}/*.js$script,third-party\n")
+            else:
+                f.write(f"&{rng.choice(words)}_id{i}=$domain=site{i % 50}.com\n")
+
+def build_log(amount, seed=1):
+    rng = random.Random(seed)
+    sites = [f"site{i}.com" for i in range(50)]
+    third_parties = [f"ads{i}.example{i % 97}.com" for i in range(0, 2000, 7)] + ["cdn.jsdelivr.net", "fonts.gstatic.com"]
+    types = ["script", "image", "stylesheet", "xmlhttprequest", "font", "subdocument", "other"]
+    requests = []
+
+    for _ in range(amount):
+        site = rng.choice(sites)
+        if rng.random() < 0.6:
+            url = f"https://{site}/static/{rng.randint(0, 500)}/asset.{rng.choice(['js', 'png', 'css'])}?v={rng.randint(0, 99)}"
+        else:
+            url = f"https://{rng.choice(third_parties)}/{rng.choice(['ad', 'pixel', 'lib'])}/{rng.randint(0, 9999)}.js?ref={site}"
+        requests.append((url, site, rng.choice(types)))
+
+    return requests
+
+def naive_should_block(regexes, url):
+    # Every rule tested in order, like a matcher without indexes would
+    return any(regex.search(url) for regex in regexes)
+
+def main():
+    log_path = sys.argv[1] if len(sys.argv) > 1 else None
+    list_paths = sys.argv[2:] or find_filter_lists(os.path.join(BROWSER_DIR, "config", "filters"))
+
+    with tempfile.TemporaryDirectory() as directory:
+        if not list_paths:
+            list_paths = [os.path.join(directory, "generated.txt")]
+            build_filter_list(list_paths[0], 60000)
+            print("No filter lists found, using 60000 generated rules")
+
+        requests = read_log(log_path) if log_path else build_log(100000)
+        print(f"{len(requests)} requests, filter lists: {', '.join(os.path.basename(path) for path in list_paths)}")
+
+        cache_path = os.path.join(directory, "filters.cache")
+        start = time.perf_counter()
+        filter_set = FilterSet(compile_filter_lists(list_paths))
+        print(f"{'compile lists':<32}{(time.perf_counter() - start) * 1000:>10.1f} ms ({filter_set.rule_count()} rules)")
+
+        load_filter_set(list_paths, cache_path)
+        start = time.perf_counter()
+        filter_set = load_filter_set(list_paths, cache_path)
+        print(f"{'load compiled cache':<32}{(time.perf_counter() - start) * 1000:>10.1f} ms")
+
+        start = time.perf_counter()
+        blocked = sum(1 for url, source_host, resource_type in requests if filter_set.should_block(url, source_host, resource_type))
+        elapsed = time.perf_counter() - start
+        print(f"{'indexed matcher':<32}{elapsed * 1000:>10.1f} ms{elapsed / len(requests) * 1e6:>10.2f} us/request, {blocked} blocked")
+
+        # The naive scan is slow, so it only gets a sample
+        regexes = []
+        for path in list_paths:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    parsed = parse_rule(line)
+                    if parsed is not None and not parsed[0]:
+                        try:
+                            regexes.append(re.compile(pattern_to_regex(parsed[1]), re.IGNORECASE))
+                        except re.error:
+                            pass
+
+        sample = requests[:100]
+        start = time.perf_counter()
+        for url, _, _ in sample:
+            naive_should_block(regexes, url)
+        elapsed = time.perf_counter() - start
+        print(f"{'naive regex scan':<32}{elapsed * 1000:>10.1f} ms{elapsed / len(sample) * 1e6:>10.2f} us/request ({len(sample)} requests)")
+
+if __name__ == "__main__":
+    main()
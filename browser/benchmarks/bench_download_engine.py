@@ -0,0 +1,130 @@
+import os
+import re
+import sys
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Runs the download engine against a local HTTP server that limits the speed of
+# every connection and can drop connections, like a slow mirror would.
+# Usage: python3 benchmarks/bench_download_engine.py [size in MB] [KB/s per connection]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import download_engine  # noqa: E402
+from download_engine import DownloadEngine, STATE_QUEUED, STATE_RUNNING  # noqa: E402
+
+RANGE_REGEX = re.compile(r"bytes=(\d+)-(\d*)")
+SEND_SIZE = 64 * 1024
+
+class FixtureServer():
+    def __init__(self, data, rate_limit):
+        self.data = data
+        self.rate_limit = rate_limit  # Bytes per second per connection
+        self.ranges = True
+        self.drop_after = None  # Close every connection after this many bytes
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.make_handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/fixture.iso"
+
+    def make_handler(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                data = fixture.data
+                start, end = 0, len(data) - 1
+                match = RANGE_REGEX.match(self.headers.get("Range", ""))
+
+                if match and fixture.ranges:
+                    start = int(match.group(1))
+                    end = int(match.group(2)) if match.group(2) else end
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+                else:
+                    self.send_response(200)
+
+                self.send_header("Content-Length", str(end - start + 1))
+                self.send_header("ETag", '"fixture"')
+                self.end_headers()
+
+                sent = 0
+                try:
+                    for offset in range(start, end + 1, SEND_SIZE):
+                        if fixture.drop_after is not None and sent >= fixture.drop_after:
+                            return
+                        chunk = data[offset:min(offset + SEND_SIZE, end + 1)]
+                        self.wfile.write(chunk)
+                        sent += len(chunk)
+                        time.sleep(len(chunk) / fixture.rate_limit)
+                except OSError:
+                    pass
+
+        return Handler
+
+    def close(self):
+        self.server.shutdown()
+
+def wait_for(engine, task):
+    while task.state in (STATE_QUEUED, STATE_RUNNING):
+        time.sleep(0.05)
+    return task
+
+def run(name, fixture, directory, max_segments, interrupt=False):
+    queue_path = os.path.join(directory, f"{name}.json")
+    engine = DownloadEngine(queue_path, max_segments=max_segments)
+    start = time.perf_counter()
+    task = engine.add(fixture.url, directory, f"{name}.iso")
+
+    if interrupt:
+        # Close the browser halfway and continue with a new engine
+        while task.received_bytes() < len(fixture.data) // 2:
+            time.sleep(0.05)
+        engine.shutdown()
+        engine = DownloadEngine(queue_path, max_segments=max_segments)
+        task = engine.get(task.task_id)
+        engine.start_pending()
+
+    wait_for(engine, task)
+    elapsed = time.perf_counter() - start
+
+    with open(task.path, "rb") as f:
+        valid = hashlib.sha256(f.read()).digest() == hashlib.sha256(fixture.data).digest()
+
+    print(f"{name:<28}{elapsed:>8.2f} s{len(fixture.data) / elapsed / 1024 / 1024:>8.2f} MB/s  {task.state}, {'valid' if valid else 'CORRUPT'}")
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    rate = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+    fixture = FixtureServer(os.urandom(size * 1024 * 1024), rate * 1024)
+    directory = tempfile.mkdtemp(prefix="silk-downloads-")
+    download_engine.RETRY_DELAY = 0.1
+    print(f"Downloading {size} MB at {rate} KB/s per connection")
+
+    try:
+        run("single connection", fixture, directory, 1)
+        run("4 segments", fixture, directory, 4)
+        run("4 segments, restarted", fixture, directory, 4, interrupt=True)
+
+        fixture.drop_after = 2 * 1024 * 1024
+        run("4 segments, flaky server", fixture, directory, 4)
+
+        fixture.drop_after = None
+        fixture.ranges = False
+        run("no range support", fixture, directory, 4)
+    finally:
+        fixture.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
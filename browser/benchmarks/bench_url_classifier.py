@@ -0,0 +1,75 @@
+import os
+import re
+import sys
+import time
+import random
+
+# Microbenchmark for the URL bar input classification.
+# Usage: python3 benchmarks/bench_url_classifier.py [amount of inputs]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from url_classifier import classify_input  # noqa: E402
+
+def legacy_valid_url(url):
+    # BetterWebEngine.valid_url before the classifier, compiled on every call
+    regex = re.compile(
+        r'^(?:(?:http|ftp)s?|file)://'  # file
+        r'(?:'
+            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # domain
+            r'localhost|'  # localhost
+            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # or ip
+        r'|'  # OR
+            r'/[^\s]+'  # Absolute path for file:/// schemes
+        r')'
+        r'(?::\d+)?'  # optional port
+        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+
+    return re.match(regex, url) is not None
+
+def legacy_classify(url):
+    # load_page called valid_url twice per navigation
+    processed_url = url if "://" in url else f"http://{url}"
+    return legacy_valid_url(processed_url) or legacy_valid_url(url)
+
+def build_corpus(amount, seed=1):
+    rng = random.Random(seed)
+    words = ["python", "weather", "news", "qt", "webengine", "recipe", "silk", "mizu", "linux", "download"]
+    domains = ["example.com", "github.com", "wikipedia.org", "duckduckgo.com", "bücher.de", "news.ycombinator.com"]
+    templates = [
+        lambda: rng.choice(domains),
+        lambda: f"https://{rng.choice(domains)}/{rng.choice(words)}?q={rng.randint(0, 999)}",
+        lambda: " ".join(rng.sample(words, rng.randint(1, 4))),
+        lambda: rng.choice(words),
+        lambda: f"localhost:{rng.randint(1000, 9999)}",
+        lambda: f"192.168.{rng.randint(0, 255)}.{rng.randint(0, 255)}",
+        lambda: f"[2001:db8::{rng.randint(1, 9999):x}]:8080",
+        lambda: "about:blank",
+        lambda: "data:text/html,<h1>hi</h1>",
+        lambda: f"intranet.lan:{rng.randint(1, 65535)}/{rng.choice(words)}",
+    ]
+
+    # Typed inputs repeat a lot, so draw from a limited pool
+    pool = [rng.choice(templates)() for _ in range(max(1, amount // 20))]
+    return [rng.choice(pool) for _ in range(amount)]
+
+def run(name, function, corpus):
+    start = time.perf_counter()
+    for text in corpus:
+        function(text)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<32}{elapsed * 1000:>10.1f} ms{elapsed / len(corpus) * 1e6:>10.2f} us/call")
+
+def main():
+    amount = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    corpus = build_corpus(amount)
+    print(f"Classifying {amount} URL bar inputs")
+
+    run("legacy (compile per call)", legacy_classify, corpus)
+
+    classify_input.cache_clear()
+    run("classifier (uncached)", classify_input.__wrapped__, corpus)
+    run("classifier (LRU memo)", classify_input, corpus)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+import re
+import bisect
+import itertools
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex, pyqtSignal
+
+# Bookmark tree with folders, exposed as a Qt item model. Every change goes
+# through the model, so views only repaint the rows that changed, and a word
+# index over names and URLs keeps search fast with thousands of bookmarks.
+#
+# bookmarks.json: {"version": 2, "bookmarks": [node, ...]} where a node is
+# {"name": ..., "url": ...} or a folder {"name": ..., "children": [node, ...]}.
+# The flat {name: url} files of older versions are converted on load.
+
+BOOKMARKS_VERSION = 2
+WORD_REGEX = re.compile(r"\w+")
+
+node_ids = itertools.count(1)
+
+def empty_bookmarks():
+    return {"version": BOOKMARKS_VERSION, "bookmarks": []}
+
+def validate_node(data, problems):
+    if not isinstance(data, dict) or not isinstance(data.get("name"), str):
+        problems.append(f"invalid bookmark: {data!r}")
+        return None
+
+    if "children" in data:
+        if not isinstance(data["children"], list):
+            problems.append(f"invalid folder \"{data['name']}\"")
+            return None
+        children = [validate_node(child, problems) for child in data["children"]]
+        return {"name": data["name"], "children": [child for child in children if child is not None]}
+
+    if not isinstance(data.get("url"), str):
+        problems.append(f"invalid URL for bookmark \"{data['name']}\": {data.get('url')!r}")
+        return None
+    return {"name": data["name"], "url": data["url"]}
+
+def validate_bookmarks(data):
+    # Returns (valid bookmarks, list of problems)
+    if not isinstance(data, dict):
+        return empty_bookmarks(), ["bookmarks are not a JSON object"]
+
+    problems = []
+
+    # Flat {name: url} of older versions
+    if "bookmarks" not in data:
+        nodes = [validate_node({"name": name, "url": url}, problems) for name, url in data.items()]
+    elif isinstance(data["bookmarks"], list):
+        nodes = [validate_node(node, problems) for node in data["bookmarks"]]
+    else:
+        return empty_bookmarks(), ["bookmarks are not a list"]
+
+    return {"version": BOOKMARKS_VERSION, "bookmarks": [node for node in nodes if node is not None]}, problems
+
+def split_words(text):
+    return WORD_REGEX.findall(text.lower())
+
+class BookmarkNode():
+    def __init__(self, name, url=None, is_folder=False, parent=None):
+        self.node_id = next(node_ids)
+        self.name = name
+        self.url = url
+        self.parent = parent
+        self.children = [] if is_folder else None
+
+    @property
+    def is_folder(self):
+        return self.children is not None
+
+    def row(self):
+        if self.parent is None:
+            return 0
+        return self.parent.children.index(self)
+
+    def is_ancestor_of(self, node):
+        while node is not None:
+            if node is self:
+                return True
+            node = node.parent
+        return False
+
+    def walk(self):
+        # All nodes below this one, depth first
+        for child in self.children or ():
+            yield child
+            if child.is_folder:
+                yield from child.walk()
+
+    def to_dict(self):
+        if self.is_folder:
+            return {"name": self.name, "children": [child.to_dict() for child in self.children]}
+        return {"name": self.name, "url": self.url}
+
+    @classmethod
+    def from_dict(cls, data, parent=None):
+        if "children" in data:
+            node = cls(data["name"], is_folder=True, parent=parent)
+            node.children = [cls.from_dict(child, node) for child in data["children"]]
+            return node
+        return cls(data["name"], data["url"], parent=parent)
+
+class BookmarkIndex():
+    # Sorted word list for prefix lookups plus the nodes containing each word
+    def __init__(self):
+        self.words = []
+        self.postings = {}
+        self.node_words = {}
+
+    def node_word_set(self, node):
+        return set(split_words(f"{node.name} {node.url}" if node.url else node.name))
+
+    def add(self, node):
+        words = self.node_word_set(node)
+        self.node_words[node.node_id] = words
+
+        for word in words:
+            postings = self.postings.get(word)
+            if postings is None:
+                postings = self.postings[word] = set()
+                bisect.insort(self.words, word)
+            postings.add(node.node_id)
+
+    def add_many(self, nodes):
+        # Sorting the word list once is much cheaper than inserting every word
+        postings = self.postings
+
+        for node in nodes:
+            node_id = node.node_id
+            words = self.node_word_set(node)
+            self.node_words[node_id] = words
+
+            for word in words:
+                ids = postings.get(word)
+                if ids is None:
+                    postings[word] = {node_id}
+                else:
+                    ids.add(node_id)
+
+        self.words = sorted(self.postings)
+
+    def remove(self, node):
+        for word in self.node_words.pop(node.node_id, ()):
+            postings = self.postings[word]
+            postings.discard(node.node_id)
+
+            if not postings:
+                del self.postings[word]
+                del self.words[bisect.bisect_left(self.words, word)]
+
+    def update(self, node):
+        self.remove(node)
+        self.add(node)
+
+    def lookup(self, prefix):
+        matches = set()
+        position = bisect.bisect_left(self.words, prefix)
+
+        while position < len(self.words) and self.words[position].startswith(prefix):
+            matches |= self.postings[self.words[position]]
+            position += 1
+
+        return matches
+
+    def search(self, text):
+        # Ids of the nodes matching every typed word as a prefix
+        result = None
+
+        for word in split_words(text):
+            matches = self.lookup(word)
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+
+        return result or set()
+
+class BookmarkModel(QAbstractItemModel):
+    # Emitted after every change, so the bookmarks can be saved
+    bookmarks_changed = pyqtSignal()
+
+    def __init__(self, data=None, parent=None):
+        super().__init__(parent)
+        self.root = BookmarkNode("", is_folder=True)
+        self.nodes = {}
+        self.search_index = None  # Built on the first search, then kept up to date
+
+        if data is not None:
+            self.load(data)
+
+    def load(self, data):
+        self.beginResetModel()
+        self.root = BookmarkNode("", is_folder=True)
+        self.root.children = [BookmarkNode.from_dict(node, self.root) for node in data["bookmarks"]]
+        self.nodes = {node.node_id: node for node in self.root.walk()}
+        self.search_index = None
+        self.endResetModel()
+
+    def to_dict(self):
+        return {"version": BOOKMARKS_VERSION, "bookmarks": [node.to_dict() for node in self.root.children]}
+
+    def register(self, node):
+        self.nodes[node.node_id] = node
+        if self.search_index is not None:
+            self.search_index.add(node)
+
+    def unregister(self, node):
+        self.nodes.pop(node.node_id, None)
+        if self.search_index is not None:
+            self.search_index.remove(node)
+
+    def get_search_index(self):
+        if self.search_index is None:
+            self.search_index = BookmarkIndex()
+            self.search_index.add_many(self.nodes.values())
+        return self.search_index
+
+    # Qt item model interface
+    def node_from_index(self, index):
+        if index.isValid():
+            return index.internalPointer()
+        return self.root
+
+    def index_for_node(self, node, column=0):
+        if node is self.root or node is None:
+            return QModelIndex()
+        return self.createIndex(node.row(), column, node)
+
+    def index(self, row, column, parent=QModelIndex()):
+        parent_node = self.node_from_index(parent)
+        if not parent_node.is_folder or not 0 <= row < len(parent_node.children) or column != 0:
+            return QModelIndex()
+        return self.createIndex(row, column, parent_node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.index_for_node(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        node = self.node_from_index(parent)
+        return len(node.children) if node.is_folder else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node_from_index(parent)
+        return node.is_folder and bool(node.children)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        node = index.internalPointer()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return node.name
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return node.url
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    # Changes
+    def add_bookmark(self, name, url, parent_node=None, row=None):
+        return self.insert_node(BookmarkNode(name, url), parent_node, row)
+
+    def add_folder(self, name, parent_node=None, row=None):
+        return self.insert_node(BookmarkNode(name, is_folder=True), parent_node, row)
+
+    def add_nodes(self, nodes, parent_node=None):
+        # Bulk insert of node dicts, e.g. from an import, as one row insertion
+        parent_node = parent_node or self.root
+        new_nodes = [BookmarkNode.from_dict(node, parent_node) for node in nodes]
+        if not new_nodes:
+            return
+
+        added = []
+        for node in new_nodes:
+            added.append(node)
+            added.extend(node.walk())
+
+        first = len(parent_node.children)
+        self.beginInsertRows(self.index_for_node(parent_node), first, first + len(new_nodes) - 1)
+        parent_node.children.extend(new_nodes)
+        for node in added:
+            self.nodes[node.node_id] = node
+        if self.search_index is not None:
+            self.search_index.add_many(added)
+        self.endInsertRows()
+        self.bookmarks_changed.emit()
+
+    def insert_node(self, node, parent_node=None, row=None):
+        parent_node = parent_node or self.root
+        row = len(parent_node.children) if row is None else max(0, min(row, len(parent_node.children)))
+
+        self.beginInsertRows(self.index_for_node(parent_node), row, row)
+        node.parent = parent_node
+        parent_node.children.insert(row, node)
+        self.register(node)
+        for child in node.walk():
+            self.register(child)
+        self.endInsertRows()
+
+        self.bookmarks_changed.emit()
+        return node
+
+    def remove_node(self, node):
+        if node is self.root or node.parent is None:
+            return
+
+        row = node.row()
+        self.beginRemoveRows(self.index_for_node(node.parent), row, row)
+        del node.parent.children[row]
+        self.unregister(node)
+        for child in node.walk():
+            self.unregister(child)
+        node.parent = None
+        self.endRemoveRows()
+
+        self.bookmarks_changed.emit()
+
+    def update_node(self, node, name=None, url=None):
+        if name is not None:
+            node.name = name
+        if url is not None and not node.is_folder:
+            node.url = url
+
+        if self.search_index is not None:
+            self.search_index.update(node)
+        index = self.index_for_node(node)
+        self.dataChanged.emit(index, index)
+        self.bookmarks_changed.emit()
+
+    def move_node(self, node, new_parent, row=None):
+        # Folders can't be moved into themselves
+        if node.is_ancestor_of(new_parent):
+            return False
+
+        old_parent = node.parent
+        old_row = node.row()
+        row = len(new_parent.children) if row is None else max(0, min(row, len(new_parent.children)))
+
+        if old_parent is new_parent and row in (old_row, old_row + 1):
+            return True
+
+        if not self.beginMoveRows(self.index_for_node(old_parent), old_row, old_row, self.index_for_node(new_parent), row):
+            return False
+
+        del old_parent.children[old_row]
+        if old_parent is new_parent and row > old_row:
+            row -= 1
+        new_parent.children.insert(row, node)
+        node.parent = new_parent
+        self.endMoveRows()
+
+        self.bookmarks_changed.emit()
+        return True
+
+    # Lookups
+    def search(self, text, limit=200):
+        nodes = [self.nodes[node_id] for node_id in self.get_search_index().search(text) if node_id in self.nodes]
+        nodes.sort(key=lambda node: node.name.lower())
+        return nodes[:limit]
+
+    def folders(self):
+        return [node for node in self.root.walk() if node.is_folder]
+
+    def bookmark_count(self):
+        return sum(1 for node in self.nodes.values() if not node.is_folder)
+
+    def folder_path(self, node):
+        names = []
+        while node is not None and node is not self.root:
+            names.append(node.name)
+            node = node.parent
+        return " / ".join(reversed(names))
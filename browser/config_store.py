@@ -0,0 +1,216 @@
+import os
+import copy
+import json
+import time
+import tempfile
+import threading
+
+# Owner of a JSON config file like settings.json or bookmarks.json. The data is
+# validated when it is loaded and changed, changes are written by a background
+# thread once they stopped coming in for a moment, and every write goes to a
+# temporary file that is synced and renamed over the old one, so a crash never
+# leaves a truncated file behind.
+
+SAVE_DELAY = 0.5
+
+def validate_settings(data, defaults, choices=None):
+    # Returns (valid settings, list of problems), anything invalid falls back to its default
+    choices = choices or {}
+    settings = {}
+    problems = []
+
+    if not isinstance(data, dict):
+        return dict(defaults), ["settings are not a JSON object"]
+
+    for key, default in defaults.items():
+        if key not in data:
+            settings[key] = default
+            continue
+
+        value = data[key]
+        # bool is a subclass of int, but a checkbox value is never a number
+        if isinstance(default, bool):
+            valid = isinstance(value, bool)
+        elif isinstance(default, float):
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+        elif isinstance(default, int):
+            valid = isinstance(value, int) and not isinstance(value, bool)
+        else:
+            valid = isinstance(value, type(default))
+
+        if valid and key in choices and value not in choices[key]:
+            valid = False
+
+        if valid:
+            settings[key] = value
+        else:
+            settings[key] = default
+            problems.append(f"invalid value for \"{key}\": {value!r}")
+
+    for key in data:
+        if key not in defaults:
+            problems.append(f"unknown setting \"{key}\"")
+
+    return settings, problems
+
+def write_atomic(path, text):
+    # Text is written as UTF-8, bytes as they are
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+
+    try:
+        with (os.fdopen(fd, "wb") if isinstance(text, bytes) else os.fdopen(fd, "w", encoding="utf-8")) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # Make the rename itself durable
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+class ConfigStore():
+    def __init__(self, path, defaults, validate, delay=SAVE_DELAY):
+        self.path = path
+        self.defaults = defaults
+        self.validate = validate  # Function returning (valid data, list of problems)
+        self.delay = delay
+        self.lock = threading.RLock()
+        self.condition = threading.Condition(self.lock)
+        self.data = {}
+        self.version = 0  # Increased on every change
+        self.saved_version = 0
+        self.deadline = 0
+        self.closing = False
+
+        self.load()
+
+        self.writer = threading.Thread(target=self.run_writer, daemon=True)
+        self.writer.start()
+
+    def load(self):
+        name = os.path.basename(self.path)
+
+        if not os.path.exists(self.path):
+            self.data.update(copy.deepcopy(self.defaults))
+            self.version += 1
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+        except (OSError, ValueError) as e:
+            # Keep the broken file around instead of overwriting it
+            print(f"Failed to load {name} ({e}). Using the defaults.")
+            try:
+                os.replace(self.path, f"{self.path}.corrupt")
+            except OSError:
+                pass
+            self.data.update(copy.deepcopy(self.defaults))
+            self.version += 1
+            return
+
+        data, problems = self.validate(loaded)
+        self.data.update(data)
+
+        if problems:
+            print(f"Fixed {name}: {', '.join(problems)}")
+            self.version += 1
+
+    # Changes, called from the UI thread
+    def get(self, key, default=None):
+        with self.lock:
+            return self.data.get(key, default)
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def update(self, values):
+        with self.lock:
+            data, problems = self.validate({**self.data, **values})
+            if problems:
+                print(f"Ignored invalid changes to {os.path.basename(self.path)}: {', '.join(problems)}")
+            self.replace_data(data)
+
+    def replace(self, values):
+        with self.lock:
+            data, problems = self.validate(dict(values))
+            if problems:
+                print(f"Ignored invalid changes to {os.path.basename(self.path)}: {', '.join(problems)}")
+            self.replace_data(data)
+
+    def remove(self, key):
+        with self.lock:
+            if key in self.data:
+                data = dict(self.data)
+                del data[key]
+                self.replace(data)
+
+    def replace_data(self, data):
+        # The dict object stays the same, other modules keep references to it
+        if data == self.data:
+            return
+        self.data.clear()
+        self.data.update(data)
+        self.schedule_save()
+
+    def schedule_save(self):
+        with self.condition:
+            self.version += 1
+            self.deadline = time.monotonic() + self.delay
+            self.condition.notify_all()
+
+    def flush(self):
+        # Write pending changes right away and wait for them
+        with self.condition:
+            self.deadline = 0
+            self.condition.notify_all()
+            while self.saved_version < self.version and self.writer.is_alive():
+                self.condition.wait(0.1)
+
+    def close(self):
+        self.flush()
+        with self.condition:
+            self.closing = True
+            self.condition.notify_all()
+        self.writer.join(timeout=5)
+
+    def run_writer(self):
+        while True:
+            with self.condition:
+                while self.saved_version == self.version and not self.closing:
+                    self.condition.wait()
+
+                if self.saved_version == self.version:
+                    return
+
+                # Wait until the changes stopped coming in
+                while not self.closing:
+                    remaining = self.deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+                version = self.version
+                text = json.dumps(self.data, indent=4)
+
+            try:
+                write_atomic(self.path, text)
+            except OSError as e:
+                print(f"Failed to save {os.path.basename(self.path)}: {e}")
+
+            # Also counts failed writes, so flush never hangs on a read-only disk
+            with self.condition:
+                self.saved_version = version
+                self.condition.notify_all()
@@ -0,0 +1,445 @@
+import os
+import re
+import marshal
+import urllib.request
+from config_store import write_atomic
+
+# Ad and tracker blocking with EasyList style filter lists. The plain
+# "||host^" rules, which are most of every list, become hash sets of hosts.
+# Every other network rule is filed under its rarest literal token, so a
+# request only tests the few rules whose token appears in its URL. Compiled
+# lists are cached with marshal, which only stores plain data, and are rebuilt
+# when a list file changes. Element hiding rules ("##") are not supported.
+
+CACHE_VERSION = 1
+FILTER_LIST_URLS = {
+    "easylist.txt": "https://easylist.to/easylist/easylist.txt",
+    "easyprivacy.txt": "https://easylist.to/easylist/easyprivacy.txt"
+}
+LIST_TIMEOUT = 30
+
+TOKEN_REGEX = re.compile(r"[a-z0-9%]+")
+RULE_TOKEN_REGEX = re.compile(r"[a-z0-9%]{2,}")
+HOST_RULE_REGEX = re.compile(r"^\|\|([a-z0-9.-]+)\^$")
+OPTIONS_REGEX = re.compile(r"^[\w~,=|.*/-]+$")
+
+# Tokens found in nearly every URL are only used when a rule has nothing else
+COMMON_TOKENS = {"http", "https", "www", "com", "net", "org", "html", "js", "php"}
+
+# "^" matches anything but a letter, digit, "_", "-", "." or "%", or the end
+SEPARATOR_REGEX = r"(?:[^\w.%-]|$)"
+HOST_ANCHOR_REGEX = r"^[a-z][a-z0-9+.-]*://(?:[^/?#]*\.)?"
+
+TYPE_BITS = {
+    "other": 1,
+    "script": 2,
+    "image": 4,
+    "stylesheet": 8,
+    "object": 16,
+    "subdocument": 32,
+    "xmlhttprequest": 64,
+    "websocket": 128,
+    "media": 256,
+    "font": 512,
+    "ping": 1024
+}
+TYPE_ALIASES = {"xhr": "xmlhttprequest", "css": "stylesheet", "frame": "subdocument", "object-subrequest": "object"}
+ALL_TYPES = sum(TYPE_BITS.values())
+
+PARTY_ANY = 0
+PARTY_THIRD = 1
+PARTY_FIRST = 2
+PARTY_OPTIONS = {
+    "third-party": PARTY_THIRD,
+    "3p": PARTY_THIRD,
+    "~first-party": PARTY_THIRD,
+    "~third-party": PARTY_FIRST,
+    "first-party": PARTY_FIRST,
+    "1p": PARTY_FIRST
+}
+# Options that don't change which requests a rule matches
+IGNORED_OPTIONS = {"important", "all"}
+
+# The common public suffixes with two labels. Country domains like gmx.de or
+# orf.at are registrable themselves, guessing from label lengths gets those wrong
+MULTI_LABEL_SUFFIXES = frozenset((
+    "co.uk", "org.uk", "me.uk", "ltd.uk", "plc.uk", "net.uk", "ac.uk", "gov.uk", "nhs.uk", "sch.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au", "asn.au", "id.au",
+    "co.nz", "net.nz", "org.nz", "ac.nz", "govt.nz",
+    "co.jp", "ne.jp", "or.jp", "ac.jp", "go.jp", "gr.jp", "ad.jp", "ed.jp", "lg.jp",
+    "co.kr", "ne.kr", "or.kr", "ac.kr", "go.kr",
+    "com.cn", "net.cn", "org.cn", "edu.cn", "gov.cn",
+    "com.hk", "com.tw", "com.sg", "com.my", "co.th", "co.id", "co.in", "net.in", "org.in", "gov.in", "ac.in",
+    "co.il", "org.il", "ac.il", "com.tr", "org.tr", "gov.tr", "com.ua",
+    "co.at", "or.at", "ac.at", "gv.at",
+    "com.br", "net.br", "org.br", "gov.br", "com.ar", "com.mx", "org.mx", "gob.mx", "com.co",
+    "co.za", "org.za", "gov.za", "com.pl", "com.es", "com.pt", "com.gr"
+))
+
+def parse_options(text):
+    # Returns (type mask, party, include domains, exclude domains, match case, document)
+    # or None for options this blocker can't honour
+    included_types = 0
+    excluded_types = 0
+    party = PARTY_ANY
+    include = []
+    exclude = []
+    match_case = False
+    document = False
+
+    for option in text.lower().split(","):
+        negated = option.startswith("~")
+        name = option[1:] if negated else option
+        name = TYPE_ALIASES.get(name, name)
+
+        if name in TYPE_BITS:
+            if negated:
+                excluded_types |= TYPE_BITS[name]
+            else:
+                included_types |= TYPE_BITS[name]
+        elif option in PARTY_OPTIONS:
+            party = PARTY_OPTIONS[option]
+        elif option.startswith("domain="):
+            for domain in option[7:].split("|"):
+                if domain.startswith("~"):
+                    exclude.append(domain[1:])
+                elif domain:
+                    include.append(domain)
+        elif option == "match-case":
+            match_case = True
+        elif option == "document":
+            document = True
+        elif option not in IGNORED_OPTIONS:
+            return None
+
+    type_mask = (included_types or ALL_TYPES) & ~excluded_types
+    return type_mask, party, tuple(include), tuple(exclude), match_case, document
+
+def pattern_to_regex(pattern):
+    if len(pattern) > 2 and pattern.startswith("/") and pattern.endswith("/"):
+        return pattern[1:-1]
+
+    prefix = ""
+    suffix = ""
+    if pattern.startswith("||"):
+        prefix = HOST_ANCHOR_REGEX
+        pattern = pattern[2:]
+    elif pattern.startswith("|"):
+        prefix = "^"
+        pattern = pattern[1:]
+    if pattern.endswith("|"):
+        suffix = "$"
+        pattern = pattern[:-1]
+
+    # Leading and trailing wildcards change nothing for a search
+    pattern = pattern.strip("*") if not prefix and not suffix else pattern
+    parts = []
+    for char in pattern:
+        if char == "*":
+            parts.append(".*")
+        elif char == "^":
+            parts.append(SEPARATOR_REGEX)
+        else:
+            parts.append(re.escape(char))
+
+    return prefix + "".join(parts) + suffix
+
+def rule_tokens(pattern):
+    # Tokens that appear as whole tokens in every URL the rule matches
+    if pattern.startswith("/") and pattern.endswith("/"):
+        return []
+
+    pattern = pattern.lower()
+    start_anchored = pattern.startswith("|")
+    end_anchored = pattern.endswith("|")
+    pattern = pattern.lstrip("|").rstrip("|")
+    tokens = []
+
+    for match in RULE_TOKEN_REGEX.finditer(pattern):
+        before = pattern[match.start() - 1] if match.start() > 0 else None
+        after = pattern[match.end()] if match.end() < len(pattern) else None
+
+        # A token next to a wildcard or an open end may be part of a longer one
+        if before == "*" or after == "*":
+            continue
+        if (before is None and not start_anchored) or (after is None and not end_anchored):
+            continue
+        tokens.append(match.group())
+
+    return tokens
+
+def parse_rule(line):
+    # Returns (exception, pattern, options) for network rules, None for anything else
+    line = line.strip()
+    if not line or line.startswith(("!", "[")) or "##" in line or "#@#" in line or "#?#" in line or "#$#" in line:
+        return None
+
+    exception = line.startswith("@@")
+    if exception:
+        line = line[2:]
+
+    options = (ALL_TYPES, PARTY_ANY, (), (), False, False)
+    position = line.rfind("$")
+    if position >= 0 and OPTIONS_REGEX.match(line[position + 1:]) and not line.endswith("/"):
+        options = parse_options(line[position + 1:])
+        line = line[:position]
+        if options is None:
+            return None
+
+    if not line or line == "*":
+        # Rules that only consist of options would match every request
+        if not options[2]:
+            return None
+        line = "*"
+
+    return exception, line, options
+
+def compile_filter_lists(paths):
+    # Returns the compiled lists as plain data, see FilterSet
+    blocked_hosts = set()
+    third_party_hosts = set()
+    allowed_hosts = set()
+    allowed_sites = set()
+    rules = {False: [], True: []}
+    problems = []
+
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                lines = f.readlines()
+        except OSError as e:
+            problems.append(f"{os.path.basename(path)}: {e}")
+            continue
+
+        for line in lines:
+            parsed = parse_rule(line)
+            if parsed is None:
+                continue
+
+            exception, pattern, options = parsed
+            type_mask, party, include, exclude, match_case, document = options
+            host_match = HOST_RULE_REGEX.match(pattern)
+            plain = type_mask == ALL_TYPES and not include and not exclude
+
+            # Exceptions for whole pages switch blocking off on those sites
+            if document:
+                if exception and host_match and not include and not exclude:
+                    allowed_sites.add(host_match.group(1))
+                continue
+
+            if host_match and plain and party == PARTY_ANY:
+                (allowed_hosts if exception else blocked_hosts).add(host_match.group(1))
+            elif host_match and plain and party == PARTY_THIRD and not exception:
+                third_party_hosts.add(host_match.group(1))
+            else:
+                rule = (pattern_to_regex(pattern), match_case, type_mask, party, include, exclude)
+                rules[exception].append((rule, rule_tokens(pattern)))
+
+    # File every rule under the token the fewest other rules use
+    token_counts = {}
+    for rule_list in rules.values():
+        for _, tokens in rule_list:
+            for token in tokens:
+                token_counts[token] = token_counts.get(token, 0) + 1
+
+    indexes = {}
+    for exception, rule_list in rules.items():
+        index = {}
+        untokenized = []
+        for rule, tokens in rule_list:
+            if tokens:
+                token = min(tokens, key=lambda token: (token in COMMON_TOKENS, token_counts[token], -len(token)))
+                index.setdefault(token, []).append(rule)
+            else:
+                untokenized.append(rule)
+        indexes[exception] = (index, untokenized)
+
+    return {
+        "version": CACHE_VERSION,
+        "blocked_hosts": blocked_hosts,
+        "third_party_hosts": third_party_hosts,
+        "allowed_hosts": allowed_hosts,
+        "allowed_sites": allowed_sites,
+        "block_index": indexes[False][0],
+        "block_untokenized": indexes[False][1],
+        "exception_index": indexes[True][0],
+        "exception_untokenized": indexes[True][1],
+        "problems": problems
+    }
+
+def list_signature(paths):
+    signature = []
+    for path in sorted(paths):
+        stat = os.stat(path)
+        signature.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    return signature
+
+def load_filter_set(paths, cache_path):
+    # Uses the compiled cache while the lists are unchanged, else compiles and caches them
+    signature = list_signature(paths)
+
+    try:
+        # marshal.load reads file objects in tiny pieces, loads on the whole file is much faster
+        with open(cache_path, "rb") as f:
+            data = marshal.loads(f.read())
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION and data.get("signature") == signature:
+            return FilterSet(data)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    data = compile_filter_lists(paths)
+    data["signature"] = signature
+    try:
+        write_atomic(cache_path, marshal.dumps(data))
+    except OSError as e:
+        print(f"Failed to cache the filter lists: {e}")
+    return FilterSet(data)
+
+def find_filter_lists(directory):
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return []
+    return [os.path.join(directory, name) for name in names if name.endswith(".txt")]
+
+def download_filter_lists(directory, urls=FILTER_LIST_URLS):
+    # Returns a list of problems, lists that fail to download keep their old version
+    problems = []
+
+    for name, url in urls.items():
+        request = urllib.request.Request(url, headers={"User-Agent": "Silk-Mizu"})
+        try:
+            with urllib.request.urlopen(request, timeout=LIST_TIMEOUT) as response:
+                write_atomic(os.path.join(directory, name), response.read())
+        except (OSError, ValueError) as e:
+            problems.append(f"{name}: {e}")
+
+    return problems
+
+def host_suffixes(host):
+    # "a.b.example.com" -> "a.b.example.com", "b.example.com", "example.com", "com"
+    while True:
+        yield host
+        position = host.find(".")
+        if position < 0:
+            return
+        host = host[position + 1:]
+
+def base_domain(host):
+    # Close enough to the registrable domain without shipping the public suffix list
+    labels = host.split(".")
+    if len(labels) > 2 and ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+def domain_matches(host, domains):
+    return any(host == domain or host.endswith(f".{domain}") for domain in domains)
+
+def url_host(url):
+    start = url.find("://")
+    if start < 0:
+        return ""
+    start += 3
+    end = len(url)
+    for char in "/?#":
+        position = url.find(char, start, end)
+        if position >= 0:
+            end = position
+
+    host = url[start:end]
+    host = host[host.rfind("@") + 1:]
+    if host.startswith("["):
+        return host[:host.find("]") + 1]
+    return host.split(":", 1)[0]
+
+class FilterSet():
+    def __init__(self, data):
+        self.blocked_hosts = data["blocked_hosts"]
+        self.third_party_hosts = data["third_party_hosts"]
+        self.allowed_hosts = data["allowed_hosts"]
+        self.allowed_sites = data["allowed_sites"]
+        self.block_index = data["block_index"]
+        self.block_untokenized = data["block_untokenized"]
+        self.exception_index = data["exception_index"]
+        self.exception_untokenized = data["exception_untokenized"]
+        self.problems = data.get("problems", [])
+        self.regexes = {}  # Compiled on first use, most rules never get tested
+
+    def rule_count(self):
+        return (
+            len(self.blocked_hosts) + len(self.third_party_hosts) + len(self.allowed_hosts) + len(self.allowed_sites)
+            + sum(len(rules) for rules in self.block_index.values()) + len(self.block_untokenized)
+            + sum(len(rules) for rules in self.exception_index.values()) + len(self.exception_untokenized)
+        )
+
+    def get_regex(self, source, match_case):
+        key = (source, match_case)
+        regex = self.regexes.get(key, False)
+        if regex is False:
+            try:
+                regex = re.compile(source, 0 if match_case else re.IGNORECASE)
+            except re.error:
+                regex = None
+            self.regexes[key] = regex
+        return regex
+
+    def rule_matches(self, rule, url, source_host, type_bit, third_party):
+        source, match_case, type_mask, party, include, exclude = rule
+
+        if not type_mask & type_bit:
+            return False
+        if (party == PARTY_THIRD and not third_party) or (party == PARTY_FIRST and third_party):
+            return False
+        if include and not domain_matches(source_host, include):
+            return False
+        if exclude and domain_matches(source_host, exclude):
+            return False
+
+        regex = self.get_regex(source, match_case)
+        return regex is not None and regex.search(url) is not None
+
+    def any_rule_matches(self, index, untokenized, url, tokens, source_host, type_bit, third_party):
+        for token in tokens:
+            rules = index.get(token)
+            if rules is not None:
+                for rule in rules:
+                    if self.rule_matches(rule, url, source_host, type_bit, third_party):
+                        return True
+
+        for rule in untokenized:
+            if self.rule_matches(rule, url, source_host, type_bit, third_party):
+                return True
+        return False
+
+    def should_block(self, url, source_host, resource_type="other"):
+        # source_host is the host of the page or frame that made the request
+        source_host = source_host.lower()
+        for host in host_suffixes(source_host):
+            if host in self.allowed_sites:
+                return False
+
+        request_host = url_host(url).lower()
+        third_party = bool(source_host) and base_domain(request_host) != base_domain(source_host)
+        type_bit = TYPE_BITS.get(resource_type, TYPE_BITS["other"])
+
+        blocked = False
+        for host in host_suffixes(request_host):
+            if host in self.blocked_hosts or (third_party and host in self.third_party_hosts):
+                blocked = True
+                break
+
+        tokens = None
+        if not blocked:
+            tokens = set(TOKEN_REGEX.findall(url.lower()))
+            blocked = self.any_rule_matches(self.block_index, self.block_untokenized, url, tokens, source_host, type_bit, third_party)
+        if not blocked:
+            return False
+
+        # Exceptions
+        for host in host_suffixes(request_host):
+            if host in self.allowed_hosts:
+                return False
+
+        if tokens is None:
+            tokens = set(TOKEN_REGEX.findall(url.lower()))
+        return not self.any_rule_matches(self.exception_index, self.exception_untokenized, url, tokens, source_host, type_bit, third_party)
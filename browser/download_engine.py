@@ -0,0 +1,561 @@
+import os
+import re
+import json
+import time
+import uuid
+import threading
+import http.client
+import urllib.error
+import urllib.request
+
+# Resumable HTTP(S) download engine. Files are fetched with Range requests,
+# large files are split into segments that download in parallel into one
+# preallocated ".part" file, and the queue with the progress of every segment
+# is saved to disk, so unfinished downloads continue after a restart.
+
+STATE_QUEUED = "queued"
+STATE_RUNNING = "running"
+STATE_PAUSED = "paused"
+STATE_COMPLETED = "completed"
+STATE_FAILED = "failed"
+STATE_CANCELLED = "cancelled"
+
+UNFINISHED_STATES = (STATE_QUEUED, STATE_RUNNING, STATE_PAUSED, STATE_FAILED)
+SUPPORTED_SCHEMES = ("http://", "https://")
+
+CHUNK_SIZE = 64 * 1024
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+MAX_RETRIES = 5
+RETRY_DELAY = 1.0
+REQUEST_TIMEOUT = 30
+POLL_INTERVAL = 0.25
+SAVE_INTERVAL = 2.0
+
+CONTENT_RANGE_REGEX = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+class DownloadError(Exception):
+    pass
+
+class DownloadStopped(Exception):
+    # Paused, cancelled or the browser is closing
+    pass
+
+class RestartDownload(Exception):
+    # The server no longer honors the range, so the file has to start from zero
+    pass
+
+def parse_content_range(value):
+    # Returns (first byte, last byte, total or None) of a "Content-Range" header
+    match = CONTENT_RANGE_REGEX.match(value or "")
+    if match is None:
+        return None
+
+    total = None if match.group(3) == "*" else int(match.group(3))
+    return int(match.group(1)), int(match.group(2)), total
+
+def split_segments(total_bytes, max_segments):
+    count = max(1, min(max_segments, total_bytes // MIN_SEGMENT_SIZE))
+    size = total_bytes // count
+    segments = []
+
+    for index in range(count):
+        start = index * size
+        end = total_bytes - 1 if index == count - 1 else start + size - 1
+        segments.append([start, end, 0])
+
+    return segments
+
+def segment_done(segment):
+    return segment[1] >= 0 and segment[0] + segment[2] > segment[1]
+
+def is_retryable(error):
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code >= 500 or error.code in (408, 429)
+    return isinstance(error, (OSError, http.client.HTTPException, DownloadError))
+
+class DownloadTask():
+    def __init__(self, url, path, headers=None, task_id=None):
+        self.task_id = task_id or uuid.uuid4().hex
+        self.url = url
+        self.path = path
+        self.headers = headers or {}
+        self.state = STATE_QUEUED
+        self.error = ""
+        self.total_bytes = 0  # 0 while the size is unknown
+        self.resumable = False
+        self.validator = ""  # ETag or Last-Modified of the file being fetched
+        self.segments = []  # [first byte, last byte or -1 if unknown, received bytes]
+        self.created = time.time()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    @property
+    def filename(self):
+        return os.path.basename(self.path)
+
+    @property
+    def part_path(self):
+        return f"{self.path}.part"
+
+    def received_bytes(self):
+        with self.lock:
+            return sum(segment[2] for segment in self.segments)
+
+    def reset(self):
+        with self.lock:
+            self.segments = []
+            self.total_bytes = 0
+            self.resumable = False
+            self.validator = ""
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "id": self.task_id,
+                "url": self.url,
+                "path": self.path,
+                "headers": self.headers,
+                "state": self.state,
+                "error": self.error,
+                "total_bytes": self.total_bytes,
+                "resumable": self.resumable,
+                "validator": self.validator,
+                "segments": [list(segment) for segment in self.segments],
+                "created": self.created
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        task = cls(data["url"], data["path"], data.get("headers"), data["id"])
+        task.state = data.get("state", STATE_QUEUED)
+        task.error = data.get("error", "")
+        task.total_bytes = data.get("total_bytes", 0)
+        task.resumable = data.get("resumable", False)
+        task.validator = data.get("validator", "")
+        task.segments = [list(segment) for segment in data.get("segments", [])]
+        task.created = data.get("created", time.time())
+        return task
+
+class DownloadEngine():
+    def __init__(self, queue_path, max_active=2, max_segments=4, listener=None, cookie_jar=None):
+        self.queue_path = queue_path
+        self.max_active = max(1, max_active)
+        self.max_segments = max(1, max_segments)
+        self.listener = listener  # Called with the task on state changes, from any thread
+        self.lock = threading.RLock()
+        self.tasks = {}
+        self.threads = {}
+        self.closing = False
+        # Cookies are read from the jar on every request, also after redirects, so
+        # a resumed download uses the current session instead of a stale copy
+        handlers = [urllib.request.HTTPCookieProcessor(cookie_jar)] if cookie_jar is not None else []
+        self.opener = urllib.request.build_opener(*handlers)
+
+        self.load_queue()
+
+    # Persistent queue
+    def load_queue(self):
+        if not os.path.exists(self.queue_path):
+            return
+
+        try:
+            with open(self.queue_path, "r") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            print("Failed to load the download queue. Starting with an empty queue.")
+            return
+
+        for data in entries:
+            try:
+                task = DownloadTask.from_dict(data)
+            except (KeyError, TypeError):
+                continue
+
+            # Finished downloads of earlier sessions are not kept
+            if task.state not in UNFINISHED_STATES:
+                continue
+            # Downloads that were running when the browser closed continue
+            if task.state == STATE_RUNNING:
+                task.state = STATE_QUEUED
+            self.tasks[task.task_id] = task
+
+    def save_queue(self):
+        with self.lock:
+            entries = [task.to_dict() for task in self.tasks.values()]
+
+            try:
+                os.makedirs(os.path.dirname(self.queue_path), exist_ok=True)
+                temp_path = f"{self.queue_path}.tmp"
+
+                with open(temp_path, "w") as f:
+                    json.dump(entries, f)
+                os.replace(temp_path, self.queue_path)
+            except OSError as e:
+                print(f"Failed to save the download queue: {e}")
+
+    # Queue control, called from the UI thread
+    def add(self, url, directory, filename, headers=None):
+        if not url.startswith(SUPPORTED_SCHEMES):
+            raise ValueError(f"Unsupported download URL: {url}")
+
+        with self.lock:
+            os.makedirs(directory, exist_ok=True)
+            task = DownloadTask(url, self.unique_path(directory, filename), headers)
+            self.tasks[task.task_id] = task
+
+        self.save_queue()
+        self.notify(task)
+        self.start_pending()
+        return task
+
+    def unique_path(self, directory, filename):
+        name, extension = os.path.splitext(filename or "download")
+        taken = {task.path for task in self.tasks.values()}
+        path = os.path.join(directory, f"{name}{extension}")
+        number = 1
+
+        while path in taken or os.path.exists(path) or os.path.exists(f"{path}.part"):
+            path = os.path.join(directory, f"{name} ({number}){extension}")
+            number += 1
+
+        return path
+
+    def get(self, task_id):
+        return self.tasks.get(task_id)
+
+    def unfinished_tasks(self):
+        with self.lock:
+            return [task for task in self.tasks.values() if task.state in UNFINISHED_STATES]
+
+    def pause(self, task_id):
+        with self.lock:
+            task = self.tasks.get(task_id)
+            if task is None or task.state not in (STATE_QUEUED, STATE_RUNNING):
+                return
+            task.state = STATE_PAUSED
+            task.stop_event.set()
+
+        self.save_queue()
+        self.notify(task)
+
+    def resume(self, task_id):
+        with self.lock:
+            task = self.tasks.get(task_id)
+            if task is None or task.state not in (STATE_PAUSED, STATE_FAILED):
+                return
+            task.state = STATE_QUEUED
+            task.error = ""
+
+        self.notify(task)
+        self.start_pending()
+
+    def cancel(self, task_id):
+        with self.lock:
+            task = self.tasks.get(task_id)
+            if task is None or task.state not in UNFINISHED_STATES:
+                return
+            task.state = STATE_CANCELLED
+            task.stop_event.set()
+            running = task_id in self.threads
+
+        # A running task removes its own part file once its segments stopped
+        if not running:
+            self.remove_part_file(task)
+
+        self.save_queue()
+        self.notify(task)
+        self.start_pending()
+
+    def remove(self, task_id):
+        # Forget a finished, cancelled or failed download
+        with self.lock:
+            task = self.tasks.get(task_id)
+            if task is None or task.state in (STATE_QUEUED, STATE_RUNNING, STATE_PAUSED):
+                return
+            del self.tasks[task_id]
+
+        self.save_queue()
+
+    def start_pending(self):
+        with self.lock:
+            if self.closing:
+                return
+
+            queued = sorted(
+                (task for task in self.tasks.values() if task.state == STATE_QUEUED),
+                key=lambda task: task.created
+            )
+            for task in queued:
+                if len(self.threads) >= self.max_active:
+                    break
+
+                task.state = STATE_RUNNING
+                task.stop_event = threading.Event()
+                thread = threading.Thread(target=self.run_task, args=(task,), daemon=True)
+                self.threads[task.task_id] = thread
+                thread.start()
+
+    def shutdown(self, timeout=2.0):
+        # Stop every transfer but keep it queued for the next start
+        with self.lock:
+            self.closing = True
+            threads = list(self.threads.values())
+            for task in self.tasks.values():
+                task.stop_event.set()
+
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+        self.save_queue()
+
+    def notify(self, task):
+        if self.listener is not None:
+            try:
+                self.listener(task)
+            except Exception as e:
+                print(f"Download listener failed: {e}")
+
+    def remove_part_file(self, task):
+        try:
+            os.remove(task.part_path)
+        except OSError:
+            pass
+
+    # Worker side
+    def run_task(self, task):
+        self.notify(task)
+        error = ""
+
+        try:
+            self.fetch(task)
+            final_state = STATE_COMPLETED
+        except DownloadStopped:
+            final_state = None
+        except Exception as e:
+            final_state = STATE_FAILED
+            error = str(e) or type(e).__name__
+
+        with self.lock:
+            del self.threads[task.task_id]
+
+            if self.closing and task.state == STATE_RUNNING:
+                task.state = STATE_QUEUED
+            elif final_state is not None and task.state == STATE_RUNNING:
+                task.state = final_state
+                task.error = error
+
+            cancelled = task.state == STATE_CANCELLED
+
+        if cancelled:
+            self.remove_part_file(task)
+
+        self.save_queue()
+        self.notify(task)
+        self.start_pending()
+
+    def fetch(self, task):
+        restarted = False
+
+        while True:
+            response = None
+
+            # Without range support a transfer can only start over
+            if task.segments and (not task.resumable or not os.path.exists(task.part_path)):
+                task.reset()
+
+            try:
+                if not task.segments:
+                    response = self.start_fresh(task)
+                self.download_segments(task, response)
+                break
+            except RestartDownload:
+                if restarted:
+                    raise DownloadError("The server does not support resuming this download")
+                restarted = True
+                task.reset()
+
+        with task.lock:
+            received = sum(segment[2] for segment in task.segments)
+            if task.total_bytes and received != task.total_bytes:
+                raise DownloadError(f"Expected {task.total_bytes} bytes but received {received}")
+            task.total_bytes = received
+
+        # Unknown sized files may have been retried from the start
+        with open(task.part_path, "r+b") as f:
+            f.truncate(received)
+
+        os.replace(task.part_path, task.path)
+
+    def open_url(self, task, headers):
+        request = urllib.request.Request(task.url, headers={**task.headers, **headers})
+        return self.opener.open(request, timeout=REQUEST_TIMEOUT)
+
+    def start_fresh(self, task):
+        # Asking for the whole file as a range tells if the server can resume
+        response = self.open_url(task, {"Range": "bytes=0-"})
+        content_range = parse_content_range(response.headers.get("Content-Range"))
+
+        if response.status == 206 and content_range is not None:
+            total_bytes = content_range[2] or 0
+            resumable = True
+        else:
+            total_bytes = int(response.headers.get("Content-Length") or 0)
+            resumable = False
+
+        # Weak ETags can't be used for If-Range
+        etag = response.headers.get("ETag") or ""
+        validator = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified") or ""
+
+        if resumable and total_bytes >= 2 * MIN_SEGMENT_SIZE:
+            segments = split_segments(total_bytes, self.max_segments)
+        else:
+            segments = [[0, total_bytes - 1 if total_bytes else -1, 0]]
+
+        with task.lock:
+            task.total_bytes = total_bytes
+            task.resumable = resumable
+            task.validator = validator
+            task.segments = segments
+
+        with open(task.part_path, "wb") as f:
+            if total_bytes:
+                f.truncate(total_bytes)
+
+        self.save_queue()
+        self.notify(task)
+
+        # The first segment continues on the response that was already opened
+        return response
+
+    def download_segments(self, task, first_response=None):
+        errors = []
+        threads = []
+        halt = threading.Event()
+
+        def run_segment(segment, response):
+            try:
+                self.download_segment(task, segment, response, halt)
+            except Exception as e:
+                errors.append(e)
+                # One broken segment stops the others
+                halt.set()
+
+        for index, segment in enumerate(task.segments):
+            response = first_response if index == 0 else None
+            if segment_done(segment):
+                if response is not None:
+                    response.close()
+                continue
+
+            thread = threading.Thread(target=run_segment, args=(segment, response), daemon=True)
+            threads.append(thread)
+            thread.start()
+
+        # Progress is polled by the UI, only the segment state is saved here
+        last_save = time.monotonic()
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(POLL_INTERVAL)
+
+            if time.monotonic() - last_save >= SAVE_INTERVAL:
+                self.save_queue()
+                last_save = time.monotonic()
+
+        for thread in threads:
+            thread.join()
+
+        for error in errors:
+            if isinstance(error, RestartDownload):
+                raise error
+        if errors:
+            raise errors[0]
+        if task.stop_event.is_set():
+            raise DownloadStopped()
+
+    def download_segment(self, task, segment, response, halt):
+        attempts = 0
+
+        while not segment_done(segment):
+            if task.stop_event.is_set() or halt.is_set():
+                if response is not None:
+                    response.close()
+                return
+
+            try:
+                if response is None:
+                    response = self.open_segment(task, segment)
+
+                with response:
+                    finished = self.read_segment(task, segment, response, halt)
+                response = None
+
+                if finished or task.stop_event.is_set() or halt.is_set():
+                    return
+                raise DownloadError("The connection closed before the download was complete")
+            except RestartDownload:
+                raise
+            except Exception as e:
+                if response is not None:
+                    response.close()
+                    response = None
+
+                attempts += 1
+                if not is_retryable(e) or attempts > MAX_RETRIES:
+                    raise
+
+                # Without range support the only way to retry is from the start
+                if not task.resumable:
+                    with task.lock:
+                        segment[2] = 0
+
+                task.stop_event.wait(RETRY_DELAY * attempts)
+
+    def open_segment(self, task, segment):
+        start = segment[0] + segment[2]
+
+        if not task.resumable:
+            return self.open_url(task, {})
+
+        headers = {"Range": f"bytes={start}-{segment[1] if segment[1] >= 0 else ''}"}
+        if task.validator:
+            headers["If-Range"] = task.validator
+
+        try:
+            response = self.open_url(task, headers)
+        except urllib.error.HTTPError as e:
+            # The file on the server got smaller than the part already received
+            if e.code == 416:
+                raise RestartDownload()
+            raise
+
+        content_range = parse_content_range(response.headers.get("Content-Range"))
+
+        # A full response means the file changed or ranges aren't supported anymore
+        if response.status != 206 or content_range is None or content_range[0] != start:
+            response.close()
+            raise RestartDownload()
+
+        return response
+
+    def read_segment(self, task, segment, response, halt):
+        # Returns True once the segment is complete
+        with open(task.part_path, "r+b") as f:
+            f.seek(segment[0] + segment[2])
+
+            while not (task.stop_event.is_set() or halt.is_set()):
+                size = CHUNK_SIZE
+                if segment[1] >= 0:
+                    size = min(size, segment[1] + 1 - segment[0] - segment[2])
+                    if size <= 0:
+                        return True
+
+                data = response.read(size)
+                if not data:
+                    # The end of an unknown sized file is where the server stops
+                    return segment[1] < 0
+
+                f.write(data)
+                with task.lock:
+                    segment[2] += len(data)
+
+        return False
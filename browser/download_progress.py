@@ -0,0 +1,109 @@
+import math
+import time
+
+# Download progress sampling. Instead of reacting to every received chunk, the
+# download menu reads the byte counters of all active downloads on one timer.
+# Throughput is smoothed with an exponential moving average, so the rate and
+# the remaining time don't jump around between samples.
+
+SMOOTHING_TIME = 3.0  # Seconds until an old rate sample has faded out to ~37%
+BYTE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+def format_bytes(amount):
+    amount = float(amount)
+    for unit in BYTE_UNITS:
+        if amount < 1024 or unit == BYTE_UNITS[-1]:
+            break
+        amount /= 1024
+
+    if unit == "B":
+        return f"{int(amount)} {unit}"
+    return f"{amount:.1f} {unit}"
+
+def format_duration(seconds):
+    seconds = int(math.ceil(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    if seconds < 3600:
+        return f"{seconds // 60} min {seconds % 60:02d} s"
+    return f"{seconds // 3600} h {seconds % 3600 // 60:02d} min"
+
+class TransferMeter():
+    def __init__(self, smoothing_time=SMOOTHING_TIME):
+        self.smoothing_time = smoothing_time
+        self.rate = None  # Bytes per second
+        self.last_bytes = None
+        self.last_time = None
+
+    def update(self, received_bytes, now):
+        if self.last_time is not None and now > self.last_time:
+            elapsed = now - self.last_time
+            # Counters go back when a download starts over
+            current_rate = max(0, received_bytes - self.last_bytes) / elapsed
+
+            if self.rate is None:
+                self.rate = current_rate
+            else:
+                # Weight the new sample by how much time it covers
+                weight = 1 - math.exp(-elapsed / self.smoothing_time)
+                self.rate += weight * (current_rate - self.rate)
+
+        self.last_bytes = received_bytes
+        self.last_time = now
+        return self.rate or 0.0
+
+class ProgressSample():
+    def __init__(self, received_bytes, total_bytes, rate):
+        self.received_bytes = received_bytes
+        self.total_bytes = total_bytes  # 0 if unknown
+        self.rate = rate
+
+    @property
+    def percent(self):
+        # None while the size is unknown
+        if self.total_bytes <= 0:
+            return None
+        return min(100, int(self.received_bytes * 100 / self.total_bytes))
+
+    @property
+    def eta(self):
+        # Remaining seconds, None if they can't be estimated yet
+        if self.total_bytes <= 0 or self.rate <= 0:
+            return None
+        return max(0.0, (self.total_bytes - self.received_bytes) / self.rate)
+
+class ProgressAggregator():
+    def __init__(self):
+        self.sources = {}  # Key -> (function returning (received, total), meter)
+
+    def track(self, key, read_progress):
+        if key not in self.sources:
+            self.sources[key] = (read_progress, TransferMeter())
+
+    def untrack(self, key):
+        self.sources.pop(key, None)
+
+    def has_sources(self):
+        return bool(self.sources)
+
+    def sample(self, now=None):
+        # Returns the samples per key and one sample over all downloads
+        now = time.monotonic() if now is None else now
+        samples = {}
+        received_sum = 0
+        total_sum = 0
+        rate_sum = 0.0
+        size_known = True
+
+        for key, (read_progress, meter) in self.sources.items():
+            received_bytes, total_bytes = read_progress()
+            rate = meter.update(received_bytes, now)
+            samples[key] = ProgressSample(received_bytes, total_bytes, rate)
+
+            received_sum += received_bytes
+            total_sum += total_bytes
+            rate_sum += rate
+            size_known = size_known and total_bytes > 0
+
+        aggregate = ProgressSample(received_sum, total_sum if size_known else 0, rate_sum)
+        return samples, aggregate
@@ -0,0 +1,502 @@
+import os
+import re
+import sys
+import json
+import time
+import signal
+import queue
+import itertools
+import threading
+import traceback
+import subprocess
+import importlib.util
+from process_info import get_process_rss, get_process_cpu_time
+
+# Extensions live in extensions/<folder>/ and describe themselves in an
+# index.json manifest with "app_id", "name", "version", "icon_path" and
+# "script_path" (plus optional "author" and "description"). Manifests are kept
+# in a cached index, so a start only stats them. A script is imported the
+# first time its extension is opened, in a worker process of its own that
+# talks to the browser with JSON lines over stdin and stdout, so a crashing or
+# hanging extension never touches the UI thread.
+#
+# Extension scripts may define:
+#   open()                -> text or HTML shown when the extension is opened
+#   handle_message(data)  -> reply to a message sent from the extension panel
+#
+# Every extension process is measured (CPU, memory, time spent in callbacks and
+# unanswered requests) and held to the budgets set with configure_budgets().
+# Processes over the CPU budget are throttled or suspended, processes over the
+# memory budget are stopped and start fresh the next time they are used.
+
+INDEX_VERSION = 1
+MANIFEST_NAME = "index.json"
+APP_ID_REGEX = re.compile(r"^[A-Za-z0-9_.-]+$")
+REQUEST_TIMEOUT = 10  # Seconds until a hanging extension is stopped
+STOP_TIMEOUT = 2
+QUEUE_LIMIT = 32  # Unanswered requests per extension
+THROTTLE_NICENESS = 19
+BUDGET_GRACE_SAMPLES = 3  # Samples in a row over budget before acting, short bursts are fine
+
+BUDGET_ACTIONS = ("Throttle", "Suspend")
+
+STATE_NOT_STARTED = "not started"
+STATE_RUNNING = "running"
+STATE_THROTTLED = "throttled"
+STATE_SUSPENDED = "suspended"
+STATE_STOPPED = "stopped"
+
+# Message types and the script functions handling them
+HANDLERS = {"open": "open", "message": "handle_message"}
+
+def resolve_extension_path(directory, path):
+    # Manifest paths must stay inside the extension folder
+    if not isinstance(path, str) or not path:
+        return None
+    resolved = os.path.realpath(os.path.join(directory, path))
+    if not resolved.startswith(os.path.realpath(directory) + os.sep):
+        return None
+    return resolved
+
+def validate_manifest(data, directory, problems):
+    name = os.path.basename(directory)
+    if not isinstance(data, dict):
+        problems.append(f"{name}: manifest is not a JSON object")
+        return None
+
+    for key in ("app_id", "name", "version"):
+        if not isinstance(data.get(key), str) or not data[key]:
+            problems.append(f"{name}: missing \"{key}\"")
+            return None
+    if not APP_ID_REGEX.match(data["app_id"]):
+        problems.append(f"{name}: invalid app_id {data['app_id']!r}")
+        return None
+
+    script_path = resolve_extension_path(directory, data.get("script_path"))
+    if script_path is None:
+        problems.append(f"{name}: invalid script_path {data.get('script_path')!r}")
+        return None
+
+    return {
+        "app_id": data["app_id"],
+        "name": data["name"],
+        "version": data["version"],
+        "author": data["author"] if isinstance(data.get("author"), str) else "",
+        "description": data["description"] if isinstance(data.get("description"), str) else "",
+        "icon_path": resolve_extension_path(directory, data.get("icon_path")),
+        "script_path": script_path,
+        "directory": directory
+    }
+
+def read_index(index_path):
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION or not isinstance(index.get("entries"), dict):
+        return {}
+    return index["entries"]
+
+def scan_extensions(directory, index_path, write_index):
+    # Returns (manifests, problems), only new or changed manifests are parsed
+    cached = read_index(index_path)
+    entries = {}
+    manifests = []
+    problems = []
+
+    try:
+        folders = sorted(entry.path for entry in os.scandir(directory) if entry.is_dir())
+    except OSError:
+        folders = []
+
+    for folder in folders:
+        manifest_path = os.path.join(folder, MANIFEST_NAME)
+        try:
+            stat = os.stat(manifest_path)
+        except OSError:
+            continue
+
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        entry = cached.get(folder)
+        if not isinstance(entry, dict) or entry.get("stamp") != stamp:
+            entry_problems = []
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                entry_problems.append(f"{os.path.basename(folder)}: {e}")
+                data = None
+            manifest = validate_manifest(data, folder, entry_problems) if data is not None else None
+            entry = {"stamp": stamp, "manifest": manifest, "problems": entry_problems}
+
+        entries[folder] = entry
+        problems.extend(entry.get("problems", []))
+        if entry["manifest"] is not None:
+            manifests.append(entry["manifest"])
+
+    if entries != cached:
+        write_index(index_path, json.dumps({"version": INDEX_VERSION, "entries": entries}, indent=4))
+
+    # Two folders with the same app_id: the first one wins
+    seen = set()
+    unique = []
+    for manifest in manifests:
+        if manifest["app_id"] in seen:
+            problems.append(f"{os.path.basename(manifest['directory'])}: duplicate app_id \"{manifest['app_id']}\"")
+            continue
+        seen.add(manifest["app_id"])
+        unique.append(manifest)
+
+    return unique, problems
+
+class ExtensionProcess():
+    def __init__(self, manifest, on_message):
+        self.manifest = manifest
+        self.on_message = on_message  # Called from a reader thread with (app_id, message)
+        self.process = None
+        self.outgoing = None
+        self.request_ids = itertools.count(1)
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.queue_limit = QUEUE_LIMIT
+
+        # Usage of the current process, reset when it is started again
+        self.callback_time = 0.0
+        self.calls = 0
+        self.throttled = False
+        self.suspended = False
+        self.over_budget_samples = 0
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def get_state(self):
+        if self.process is None:
+            return STATE_NOT_STARTED
+        if not self.is_running():
+            return STATE_STOPPED
+        if self.suspended:
+            return STATE_SUSPENDED
+        if self.throttled:
+            return STATE_THROTTLED
+        return STATE_RUNNING
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), self.manifest["script_path"]],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+            cwd=self.manifest["directory"]
+        )
+        # Writes go through a queue as well, a full pipe must not block the caller
+        self.outgoing = queue.Queue()
+        self.callback_time = 0.0
+        self.calls = 0
+        self.throttled = False
+        self.suspended = False
+        self.over_budget_samples = 0
+        threading.Thread(target=self.run_reader, args=(self.process,), daemon=True).start()
+        threading.Thread(target=self.run_writer, args=(self.process, self.outgoing), daemon=True).start()
+
+    def request(self, message_type, data=None):
+        if not self.is_running():
+            self.start()
+
+        request_id = next(self.request_ids)
+        with self.lock:
+            if self.suspended:
+                error = "The extension is suspended for exceeding its CPU budget."
+            elif len(self.pending) >= self.queue_limit:
+                error = "The extension is busy, too many requests are waiting for an answer."
+            else:
+                error = None
+                self.pending.add(request_id)
+
+        if error is not None:
+            self.on_message(self.manifest["app_id"], {"id": request_id, "error": error})
+            return request_id
+        self.outgoing.put({"id": request_id, "type": message_type, "data": data})
+
+        timer = threading.Timer(REQUEST_TIMEOUT, self.request_timed_out, args=(self.process, request_id))
+        timer.daemon = True
+        timer.start()
+        return request_id
+
+    def request_timed_out(self, process, request_id):
+        with self.lock:
+            if request_id not in self.pending:
+                return
+            self.pending.discard(request_id)
+
+        self.on_message(self.manifest["app_id"], {"id": request_id, "error": "The extension did not answer in time and was stopped."})
+        self.kill(process)
+
+    def run_writer(self, process, outgoing):
+        while True:
+            message = outgoing.get()
+            if message is None:
+                return
+            try:
+                process.stdin.write(json.dumps(message) + "\n")
+                process.stdin.flush()
+            except (OSError, ValueError):
+                return
+
+    def run_reader(self, process):
+        app_id = self.manifest["app_id"]
+
+        for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+
+            with self.lock:
+                if message.get("id") not in self.pending:
+                    continue  # Timed out already
+                self.pending.discard(message["id"])
+                self.calls += 1
+                self.callback_time += message.get("elapsed", 0.0)
+            self.on_message(app_id, message)
+
+        code = process.wait()
+        with self.lock:
+            self.pending.clear()
+        self.on_message(app_id, {"type": "exit", "code": code})
+
+    def throttle(self):
+        # Only the OS scheduler priority is lowered, raising it again needs privileges
+        if self.throttled or not self.is_running():
+            return
+        self.throttled = True
+        if hasattr(os, "setpriority"):
+            try:
+                os.setpriority(os.PRIO_PROCESS, self.process.pid, THROTTLE_NICENESS)
+            except OSError:
+                pass
+
+    def suspend(self):
+        if self.suspended or not self.is_running():
+            return
+        if not hasattr(signal, "SIGSTOP"):
+            self.stop()  # Processes can't be paused on this platform
+            return
+
+        os.kill(self.process.pid, signal.SIGSTOP)
+        with self.lock:
+            self.suspended = True
+            interrupted = list(self.pending)
+            self.pending.clear()
+
+        # Waiting requests would time out anyway, late answers are dropped
+        for request_id in interrupted:
+            self.on_message(self.manifest["app_id"], {"id": request_id, "error": "The extension was suspended for exceeding its CPU budget."})
+
+    def resume(self):
+        if not self.suspended or not self.is_running():
+            return
+        os.kill(self.process.pid, signal.SIGCONT)
+        self.suspended = False
+        self.over_budget_samples = 0
+
+    def get_metrics(self, cpu_percent):
+        running = self.is_running()
+        pid = self.process.pid if running else 0
+
+        with self.lock:
+            queue_depth = len(self.pending)
+            calls = self.calls
+            callback_time = self.callback_time
+
+        return {
+            "app_id": self.manifest["app_id"],
+            "name": self.manifest["name"],
+            "state": self.get_state(),
+            "pid": pid,
+            "cpu_time": round(get_process_cpu_time(pid), 3) if running else 0.0,
+            "cpu_percent": round(cpu_percent, 1),
+            "memory": get_process_rss(pid) if running else 0,
+            "callback_time": round(callback_time, 3),
+            "calls": calls,
+            "queue_depth": queue_depth
+        }
+
+    def stop(self):
+        if not self.is_running():
+            return
+        if self.suspended:
+            os.kill(self.process.pid, signal.SIGCONT)  # A stopped process can't read the stop message
+            self.suspended = False
+        process = self.process
+        self.outgoing.put({"type": "stop"})
+        self.outgoing.put(None)
+        threading.Thread(target=self.kill, args=(process, STOP_TIMEOUT), daemon=True).start()
+
+    def kill(self, process, timeout=0):
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+class ExtensionHost():
+    def __init__(self, directory, index_path, on_message, write_index):
+        self.directory = directory
+        self.index_path = index_path
+        self.on_message = on_message
+        self.write_index = write_index  # Function (path, text), e.g. an atomic write
+        self.extensions = {}  # app_id -> manifest
+        self.processes = {}
+
+        # 0 turns a budget off
+        self.cpu_budget_percent = 0
+        self.memory_budget_mb = 0
+        self.budget_action = "Throttle"
+        self.queue_limit = QUEUE_LIMIT
+
+    def configure_budgets(self, cpu_budget_percent, memory_budget_mb, budget_action, queue_limit):
+        # settings.json can be edited by hand, a limit of 0 would refuse every request
+        self.cpu_budget_percent = max(0, cpu_budget_percent)
+        self.memory_budget_mb = max(0, memory_budget_mb)
+        self.budget_action = budget_action
+        self.queue_limit = queue_limit = max(1, queue_limit)
+        for process in self.processes.values():
+            process.queue_limit = queue_limit
+
+    def scan(self):
+        manifests, problems = scan_extensions(self.directory, self.index_path, self.write_index)
+        self.extensions = {manifest["app_id"]: manifest for manifest in manifests}
+        return problems
+
+    def get_process(self, app_id):
+        if app_id not in self.processes:
+            self.processes[app_id] = ExtensionProcess(self.extensions[app_id], self.on_message)
+            self.processes[app_id].queue_limit = self.queue_limit
+        return self.processes[app_id]
+
+    def open(self, app_id):
+        return self.get_process(app_id).request("open")
+
+    def send(self, app_id, data):
+        return self.get_process(app_id).request("message", data)
+
+    def stop(self, app_id):
+        if app_id in self.processes:
+            self.processes[app_id].stop()
+
+    def suspend(self, app_id):
+        if app_id in self.processes:
+            self.processes[app_id].suspend()
+
+    def resume(self, app_id):
+        if app_id in self.processes:
+            self.processes[app_id].resume()
+
+    def get_pids(self):
+        return [process.process.pid for process in self.processes.values() if process.is_running()]
+
+    def collect_metrics(self, cpu_usage):
+        # cpu_usage maps PIDs to percent of a core, e.g. from process_info.CpuSampler
+        metrics = []
+        for app_id, manifest in self.extensions.items():
+            process = self.processes.get(app_id)
+            if process is None:
+                metrics.append({
+                    "app_id": app_id,
+                    "name": manifest["name"],
+                    "state": STATE_NOT_STARTED,
+                    "pid": 0,
+                    "cpu_time": 0.0,
+                    "cpu_percent": 0.0,
+                    "memory": 0,
+                    "callback_time": 0.0,
+                    "calls": 0,
+                    "queue_depth": 0
+                })
+            else:
+                pid = process.process.pid if process.is_running() else 0
+                metrics.append(process.get_metrics(cpu_usage.get(pid, 0.0)))
+        return metrics
+
+    def enforce_budgets(self, metrics):
+        # Returns (app_id, action) for every extension that was acted on
+        actions = []
+
+        for entry in metrics:
+            process = self.processes.get(entry["app_id"])
+            if process is None or entry["state"] not in (STATE_RUNNING, STATE_THROTTLED):
+                continue
+
+            if self.memory_budget_mb > 0 and entry["memory"] > self.memory_budget_mb * 1024 * 1024:
+                process.stop()
+                actions.append((entry["app_id"], "Stop"))
+                continue
+
+            if self.cpu_budget_percent > 0 and entry["cpu_percent"] > self.cpu_budget_percent:
+                process.over_budget_samples += 1
+            else:
+                process.over_budget_samples = 0
+                continue
+
+            if process.over_budget_samples < BUDGET_GRACE_SAMPLES:
+                continue
+            if self.budget_action == "Suspend":
+                process.suspend()
+                actions.append((entry["app_id"], "Suspend"))
+            elif entry["state"] == STATE_RUNNING:
+                process.throttle()
+                actions.append((entry["app_id"], "Throttle"))
+
+        return actions
+
+    def shutdown(self):
+        for process in self.processes.values():
+            process.stop()
+
+# Worker process side
+def load_script(script_path):
+    spec = importlib.util.spec_from_file_location(f"extension_{os.path.basename(os.path.dirname(script_path))}", script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def run_worker(script_path):
+    channel = sys.stdout
+    sys.stdout = sys.stderr  # print() in extensions must not end up in the channel
+    sys.path.insert(0, os.path.dirname(script_path))
+    module = None
+
+    for line in sys.stdin:
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if message.get("type") == "stop":
+            return
+
+        try:
+            # The script is imported on the first request, i.e. when the extension is opened
+            if module is None:
+                module = load_script(script_path)
+
+            handler = getattr(module, HANDLERS.get(message.get("type"), ""), None)
+            start = time.perf_counter()
+            if handler is None:
+                result = None
+            elif message.get("type") == "message":
+                result = handler(message.get("data"))
+            else:
+                result = handler()
+            reply = json.dumps({"id": message.get("id"), "result": result, "elapsed": time.perf_counter() - start})
+        except Exception:
+            reply = json.dumps({"id": message.get("id"), "error": traceback.format_exc()})
+
+        channel.write(reply + "\n")
+        channel.flush()
+
+if __name__ == "__main__":
+    run_worker(sys.argv[1])
@@ -0,0 +1,140 @@
+import os
+import re
+import mmap
+import hashlib
+import http.client
+import urllib.parse
+import urllib.request
+
+# Checksum verification for finished downloads. Files are hashed through a
+# sliding memory mapped window, so multi-GB images are read straight from the
+# page cache without copying them into Python objects or mapping them whole.
+# Expected checksums are either pasted by the user or read from the checksum
+# files projects publish next to their downloads.
+
+HASH_WINDOW = 64 * 1024 * 1024
+SIDECAR_MAX_BYTES = 1024 * 1024
+SIDECAR_TIMEOUT = 10
+
+# Hex digest length -> algorithm for checksums without a name, the SHA-2 ones
+# are far more common. Checksum files named B2SUMS etc. still say BLAKE2
+DEFAULT_ALGORITHMS = {64: "sha256", 128: "sha512"}
+ALGORITHM_NAMES = {
+    "sha256": "sha256",
+    "sha-256": "sha256",
+    "sha512": "sha512",
+    "sha-512": "sha512",
+    "blake2b": "blake2b",
+    "blake2b-512": "blake2b",
+    "b2": "blake2b",
+    "blake2s": "blake2s",
+    "blake2s-256": "blake2s"
+}
+DIGEST_LENGTHS = {"sha256": 64, "sha512": 128, "blake2b": 128, "blake2s": 64}
+
+# Per file sidecars are tried first, then the usual listings of the directory
+SIDECAR_SUFFIXES = ((".sha256", "sha256"), (".sha256sum", "sha256"), (".b2", "blake2b"), (".b2sum", "blake2b"), (".sha512", "sha512"))
+SIDECAR_LISTINGS = (("SHA256SUMS", "sha256"), ("sha256sums.txt", "sha256"), ("B2SUMS", "blake2b"), ("SHA512SUMS", "sha512"))
+
+# "SHA256 (file.iso) = <hex>" as written by BSD tools and "sha256:<hex>"
+BSD_LINE_REGEX = re.compile(r"^([A-Za-z0-9-]+)\s*\((.+)\)\s*=\s*([0-9a-fA-F]+)$")
+PREFIXED_REGEX = re.compile(r"^([A-Za-z0-9-]+)[:=]\s*([0-9a-fA-F]+)$")
+# "<hex>  file.iso" or "<hex> *file.iso" as written by sha256sum
+GNU_LINE_REGEX = re.compile(r"^([0-9a-fA-F]+)(?:\s+\*?(.+))?$")
+
+class VerificationCancelled(Exception):
+    pass
+
+def make_checksum(algorithm, digest):
+    # Returns (algorithm, lowercase hex digest) or None if they don't fit together
+    algorithm = ALGORITHM_NAMES.get(algorithm.lower()) if algorithm else DEFAULT_ALGORITHMS.get(len(digest))
+    if algorithm is None or DIGEST_LENGTHS[algorithm] != len(digest):
+        return None
+    return algorithm, digest.lower()
+
+def parse_checksum(text, filename=None, default_algorithm=None):
+    # Finds the checksum for filename in pasted text or a checksum file
+    fallback = None
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        match = BSD_LINE_REGEX.match(line)
+        if match:
+            algorithm, name, digest = match.groups()
+        elif match := PREFIXED_REGEX.match(line):
+            algorithm, digest = match.groups()
+            name = None
+        elif match := GNU_LINE_REGEX.match(line):
+            digest, name = match.groups()
+            algorithm = default_algorithm
+        else:
+            continue
+
+        checksum = make_checksum(algorithm, digest)
+        if checksum is None:
+            continue
+
+        # Listings name every file, a checksum for another file doesn't count
+        if name is None or filename is None or os.path.basename(name.strip()) == filename:
+            if name is not None and filename is not None:
+                return checksum
+            fallback = fallback or checksum
+
+    return fallback
+
+def hash_file(path, algorithm, progress=None, is_cancelled=None):
+    # Returns the hex digest, progress is called with (hashed bytes, file size)
+    digest = hashlib.new(algorithm)
+    size = os.path.getsize(path)
+    offset = 0
+
+    with open(path, "rb") as f:
+        while offset < size:
+            if is_cancelled is not None and is_cancelled():
+                raise VerificationCancelled()
+
+            # Only one window is mapped at a time, its pages are released on close
+            length = min(HASH_WINDOW, size - offset)
+            with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ, offset=offset) as window:
+                if hasattr(window, "madvise"):
+                    window.madvise(mmap.MADV_SEQUENTIAL)
+                digest.update(window)
+
+            offset += length
+            if progress is not None:
+                progress(offset, size)
+
+    return digest.hexdigest()
+
+def fetch_text(url):
+    request = urllib.request.Request(url, headers={"User-Agent": "Silk-Mizu"})
+    with urllib.request.urlopen(request, timeout=SIDECAR_TIMEOUT) as response:
+        return response.read(SIDECAR_MAX_BYTES).decode("utf-8", errors="replace")
+
+def find_sidecar_checksum(url, filename):
+    # Looks for a published checksum next to the download URL
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme not in ("http", "https"):
+        return None
+
+    base_url = urllib.parse.urlunsplit((parsed.scheme, parsed.netloc, parsed.path, "", ""))
+    remote_name = urllib.parse.unquote(os.path.basename(parsed.path)) or filename
+    directory_url = urllib.parse.urljoin(base_url, ".")
+
+    candidates = [(f"{base_url}{suffix}", algorithm) for suffix, algorithm in SIDECAR_SUFFIXES]
+    candidates += [(urllib.parse.urljoin(directory_url, name), algorithm) for name, algorithm in SIDECAR_LISTINGS]
+
+    for candidate_url, algorithm in candidates:
+        try:
+            text = fetch_text(candidate_url)
+        except (OSError, ValueError, http.client.HTTPException):
+            continue
+
+        checksum = parse_checksum(text, remote_name, algorithm)
+        if checksum is not None:
+            return checksum
+
+    return None
@@ -0,0 +1,408 @@
+import json
+import time
+import argparse
+import threading
+import statistics
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from process_info import get_process_rss
+from stall_watchdog import LatencyTracker
+from download_engine import STATE_COMPLETED, STATE_FAILED, STATE_CANCELLED
+
+# Scripted runs of the browser without a person or a display, for performance
+# regression tests. "python3 main.py --headless" starts the browser offscreen
+# with a throwaway profile, serves fixture pages, a download and a stub Ollama
+# API from a local HTTP server, and then drives the window: open tabs,
+# navigate, summarize the page and download a file. Timings are written as JSON.
+# Usage: python3 main.py --headless [--headless-tabs N] [--headless-output results.json]
+#                        [--headless-download-mb MB] [--headless-timeout seconds]
+
+# Settings of the throwaway profile: nothing may wait for a person or the network
+HEADLESS_SETTINGS = {
+    "restore_session": False,
+    "content_blocking": False,
+    "download_warnings": False,
+    "ai_summarization_enabled": True,
+    "ai_preload_model": False
+}
+
+STALL_THRESHOLD = 50  # ms of event loop latency that count as a stall
+HEARTBEAT_INTERVAL = 10  # ms
+PAINT_POLL_INTERVAL = 100  # ms, paint entries may show up after loadFinished
+PAINT_POLL_ATTEMPTS = 20
+SEND_SIZE = 64 * 1024
+
+STUB_MODEL_REPLY = (
+    "The page is a generated fixture. It contains paragraphs of placeholder text "
+    "about a fictional river. Nothing in it needs attention."
+)
+
+PAINT_TIMING_SCRIPT = """(() => {
+    const paints = {};
+    for (const entry of performance.getEntriesByType("paint")) {
+        paints[entry.name] = entry.startTime;
+    }
+    const navigation = performance.getEntriesByType("navigation")[0];
+    return {
+        first_paint: paints["first-paint"] ?? null,
+        first_contentful_paint: paints["first-contentful-paint"] ?? null,
+        dom_content_loaded: navigation ? navigation.domContentLoadedEventEnd : null,
+        load_event: navigation ? navigation.loadEventEnd : null
+    };
+})()"""
+
+def parse_options(argv):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--headless-tabs", type=int, default=5)
+    parser.add_argument("--headless-output", default=None)
+    parser.add_argument("--headless-download-mb", type=int, default=8)
+    parser.add_argument("--headless-timeout", type=float, default=120)
+    parser.add_argument("--headless-token-delay", type=float, default=5, help="ms between stub model tokens")
+    options, _ = parser.parse_known_args(argv[1:])
+    return options
+
+def fixture_page(number, paragraphs=12):
+    body = "".join(
+        f"<p>Paragraph {i} of page {number}. The river Mizu runs past the old mill, "
+        f"through the valley and into the sea. Its water is calm in summer and wild in spring.</p>"
+        for i in range(paragraphs)
+    )
+    return (
+        f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Fixture page {number}</title>"
+        f"<style>body {{ font-family: sans-serif; margin: 2em; }}</style></head>"
+        f"<body><h1>Fixture page {number}</h1>{body}</body></html>"
+    ).encode("utf-8")
+
+class FixtureServer():
+    # Fixture pages under /page/<n>, a download under /download/fixture.bin and
+    # the parts of the Ollama API the browser uses under /api
+    def __init__(self, download_size, token_delay):
+        self.download = bytes(range(256)) * (download_size // 256)
+        self.token_delay = token_delay  # Seconds
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.make_handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def make_handler(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def send_body(self, content_type, body, headers=None):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.startswith("/page/"):
+                    self.send_body("text/html; charset=utf-8", fixture_page(self.path.rsplit("/", 1)[1]))
+                elif self.path == "/download/fixture.bin":
+                    self.send_download()
+                elif self.path == "/api/tags":
+                    self.send_body("application/json", json.dumps({"models": []}).encode("utf-8"))
+                else:
+                    self.send_error(404)
+
+            def do_HEAD(self):
+                if self.path == "/download/fixture.bin":
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(fixture.download)))
+                    self.send_header("Accept-Ranges", "bytes")
+                    self.end_headers()
+                else:
+                    self.send_error(404)
+
+            def send_download(self):
+                data = fixture.download
+                start, end = 0, len(data) - 1
+                requested = self.headers.get("Range", "")
+
+                if requested.startswith("bytes="):
+                    first, _, last = requested[6:].partition("-")
+                    start = int(first)
+                    end = int(last) if last else end
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+                else:
+                    self.send_response(200)
+
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Disposition", "attachment; filename=\"fixture.bin\"")
+                self.send_header("Content-Length", str(end - start + 1))
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("ETag", '"fixture"')
+                self.end_headers()
+
+                try:
+                    for offset in range(start, end + 1, SEND_SIZE):
+                        self.wfile.write(data[offset:min(offset + SEND_SIZE, end + 1)])
+                except OSError:
+                    pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                model = body.get("model", "")
+
+                if self.path == "/api/chat":
+                    self.send_chat(model, body.get("stream", True))
+                elif self.path == "/api/generate":
+                    reply = {"model": model, "created_at": "", "response": "", "done": True}
+                    self.send_body("application/json", json.dumps(reply).encode("utf-8"))
+                else:
+                    self.send_error(404)
+
+            def send_chat(self, model, stream):
+                words = STUB_MODEL_REPLY.split(" ")
+
+                if not stream:
+                    reply = {"model": model, "created_at": "", "message": {"role": "assistant", "content": STUB_MODEL_REPLY}, "done": True}
+                    self.send_body("application/json", json.dumps(reply).encode("utf-8"))
+                    return
+
+                # Streamed as NDJSON until the connection closes, like Ollama does
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+
+                try:
+                    for i, word in enumerate(words):
+                        content = word if i == len(words) - 1 else f"{word} "
+                        chunk = {"model": model, "created_at": "", "message": {"role": "assistant", "content": content}, "done": False}
+                        self.wfile.write(f"{json.dumps(chunk)}\n".encode("utf-8"))
+                        self.wfile.flush()
+                        time.sleep(fixture.token_delay)
+
+                    done = {"model": model, "created_at": "", "message": {"role": "assistant", "content": ""}, "done": True, "done_reason": "stop"}
+                    self.wfile.write(f"{json.dumps(done)}\n".encode("utf-8"))
+                except OSError:
+                    pass
+
+        return Handler
+
+    def close(self):
+        self.server.shutdown()
+
+class EventLoopMonitor(QObject):
+    # A fast heartbeat timer for the latency tracking of the stall watchdog
+    def __init__(self, interval=HEARTBEAT_INTERVAL, threshold=STALL_THRESHOLD, parent=None):
+        super().__init__(parent)
+        # The whole run counts, not only the last heartbeats
+        self.tracker = LatencyTracker(interval, threshold, history=None)
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.tracker.beat)
+
+    def start(self):
+        self.tracker.reset()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def report(self):
+        return self.tracker.report()
+
+def summarize_timings(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    return {
+        "mean": round(statistics.fmean(values), 1),
+        "median": round(statistics.median(values), 1),
+        "max": round(max(values), 1)
+    }
+
+class HeadlessDriver(QObject):
+    finished = pyqtSignal(int)  # Exit code
+
+    def __init__(self, window, ai_backend, options, stall_watchdog=None, parent=None):
+        super().__init__(parent)
+        self.window = window
+        self.ai_backend = ai_backend
+        self.options = options
+        self.stall_watchdog = stall_watchdog  # With --watch-stalls, its stacks are in the log it names
+        self.server = None
+        self.monitor = EventLoopMonitor(parent=self)
+        self.steps = [self.open_tabs, self.navigate, self.summarize, self.download]
+        self.step_started = None
+        self.pending_tabs = 0
+        self.known_tasks = set()
+        self.done = False
+        self.results = {
+            "options": vars(options),
+            "tabs": [],
+            "navigation": None,
+            "summary": None,
+            "download": None,
+            "errors": []
+        }
+
+        self.timeout_timer = QTimer(self)
+        self.timeout_timer.setSingleShot(True)
+        self.timeout_timer.timeout.connect(self.timed_out)
+
+    def start(self):
+        self.server = FixtureServer(self.options.headless_download_mb * 1024 * 1024, self.options.headless_token_delay / 1000)
+        self.ai_backend.configure(host=self.server.url(""))
+        # The model list is first fetched here, so it never reaches a real Ollama
+        self.window.get_model_manager().refresh(force=True)
+        self.monitor.start()
+        self.timeout_timer.start(int(self.options.headless_timeout * 1000))
+        self.run_time = time.perf_counter()
+        self.next_step()
+
+    def next_step(self):
+        if self.done:
+            return
+        if not self.steps:
+            self.finish()
+            return
+        self.step_started = time.perf_counter()
+        self.steps.pop(0)()
+
+    def elapsed_ms(self):
+        return round((time.perf_counter() - self.step_started) * 1000, 1)
+
+    # Tabs
+    def open_tabs(self):
+        self.pending_tabs = self.options.headless_tabs
+        self.open_next_tab()
+
+    def open_next_tab(self):
+        if self.pending_tabs <= 0:
+            self.next_step()
+            return
+
+        index = len(self.results["tabs"])
+        url = self.server.url(f"/page/{index}")
+        started = time.perf_counter()
+        tab = self.window.create_new_tab(url)
+        entry = {"index": index, "url": url, "creation_ms": round((time.perf_counter() - started) * 1000, 2)}
+        self.results["tabs"].append(entry)
+        self.pending_tabs -= 1
+
+        def load_finished(ok):
+            tab.engine.loadFinished.disconnect(load_finished)
+            entry["ok"] = ok
+            entry["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self.read_paint_timing(tab, entry, PAINT_POLL_ATTEMPTS)
+
+        tab.engine.loadFinished.connect(load_finished)
+
+    def read_paint_timing(self, tab, entry, attempts):
+        def received(timing):
+            if self.done:
+                return
+            if isinstance(timing, dict) and timing.get("first_contentful_paint") is None and attempts > 1:
+                QTimer.singleShot(PAINT_POLL_INTERVAL, lambda: self.read_paint_timing(tab, entry, attempts - 1))
+                return
+
+            # Times are relative to the start of the navigation, as the renderer measured them
+            for key in ("first_paint", "first_contentful_paint", "dom_content_loaded", "load_event"):
+                value = timing.get(key) if isinstance(timing, dict) else None
+                entry[f"{key}_ms"] = round(value, 1) if value is not None else None
+
+            pid = tab.render_process_pid()
+            entry["pid"] = pid
+            entry["memory"] = get_process_rss(pid)
+            self.open_next_tab()
+
+        tab.engine.page().runJavaScript(PAINT_TIMING_SCRIPT, received)
+
+    # Navigation in the current tab
+    def navigate(self):
+        engine = self.window.current_web_engine()
+        url = self.server.url("/page/navigation")
+
+        def load_finished(ok):
+            engine.loadFinished.disconnect(load_finished)
+            self.results["navigation"] = {"url": url, "ok": ok, "load_ms": self.elapsed_ms()}
+            self.next_step()
+
+        engine.loadFinished.connect(load_finished)
+        engine.load_page(url)
+
+    # Summary of the current page against the stub model
+    def summarize(self):
+        ai_sidebar = self.window.get_ai_sidebar()
+
+        def summary_finished():
+            ai_sidebar.summary_finished.disconnect(summary_finished)
+            self.results["summary"] = {"ms": self.elapsed_ms()}
+            self.next_step()
+
+        ai_sidebar.summary_finished.connect(summary_finished)
+        self.window.summarize_current_page_ai()
+
+    # Download through the page, taken over by the download engine
+    def download(self):
+        self.known_tasks = {task.task_id for task in self.window.get_download_engine().tasks.values()}
+        self.download_task = None
+        self.window.download_signals.task_changed.connect(self.download_changed)
+        self.window.current_web_engine().load_page(self.server.url("/download/fixture.bin"))
+
+    def download_changed(self, task_id):
+        if task_id in self.known_tasks:
+            return
+        # Finished tasks leave the engine's queue, so the task is kept from its first change
+        if self.download_task is None:
+            self.download_task = self.window.get_download_engine().get(task_id)
+        task = self.download_task
+        if task is None or task.task_id != task_id or task.state not in (STATE_COMPLETED, STATE_FAILED, STATE_CANCELLED):
+            return
+
+        self.window.download_signals.task_changed.disconnect(self.download_changed)
+        elapsed = self.elapsed_ms()
+        self.results["download"] = {
+            "state": task.state,
+            "bytes": task.received_bytes(),
+            "ms": elapsed,
+            "mb_per_second": round(task.received_bytes() / 1024 / 1024 / max(elapsed / 1000, 0.001), 1)
+        }
+        if task.state != STATE_COMPLETED:
+            self.results["errors"].append(f"download {task.state}: {task.error}")
+        self.next_step()
+
+    def timed_out(self):
+        self.results["errors"].append(f"timed out after {self.options.headless_timeout} s")
+        self.finish()
+
+    def finish(self):
+        if self.done:
+            return
+        self.done = True
+        self.timeout_timer.stop()
+        self.monitor.stop()
+        self.server.close()
+
+        tabs = self.results["tabs"]
+        self.results["total_ms"] = round((time.perf_counter() - self.run_time) * 1000, 1)
+        self.results["ui_thread"] = self.monitor.report()
+        if self.stall_watchdog is not None:
+            self.results["stall_watchdog"] = {"log": self.stall_watchdog.log_path, **self.stall_watchdog.report()}
+        self.results["browser_memory"] = get_process_rss()
+        self.results["aggregate"] = {
+            "creation_ms": summarize_timings([tab.get("creation_ms") for tab in tabs]),
+            "load_ms": summarize_timings([tab.get("load_ms") for tab in tabs]),
+            "first_contentful_paint_ms": summarize_timings([tab.get("first_contentful_paint_ms") for tab in tabs]),
+            # Tabs of one site share a renderer, every process is counted once
+            "renderer_memory": sum({tab["pid"]: tab["memory"] for tab in tabs if tab.get("pid")}.values())
+        }
+
+        text = json.dumps(self.results, indent=4)
+        if self.options.headless_output:
+            with open(self.options.headless_output, "w", encoding="utf-8") as f:
+                f.write(text)
+        else:
+            print(text)
+
+        self.finished.emit(1 if self.results["errors"] else 0)
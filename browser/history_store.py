@@ -0,0 +1,293 @@
+import re
+import time
+import queue
+import sqlite3
+import threading
+
+# Global browsing history in SQLite. Visits are queued by the UI and written in
+# batches by a background thread, lookups for the URL bar use a separate read
+# connection, an FTS index over URL and title and a precomputed frecency score.
+
+BATCH_SIZE = 200
+BATCH_DELAY = 0.5
+FLUSH_TIMEOUT = 10  # Seconds, flush() runs when the browser quits
+FRECENT_SCAN_SIZE = 500
+WORD_REGEX = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL DEFAULT '',
+    visit_count INTEGER NOT NULL DEFAULT 0,
+    last_visit REAL NOT NULL DEFAULT 0,
+    frecency REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS visits (
+    id INTEGER PRIMARY KEY,
+    url_id INTEGER NOT NULL REFERENCES urls(id) ON DELETE CASCADE,
+    visit_time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS visits_url_id ON visits(url_id);
+CREATE INDEX IF NOT EXISTS urls_frecency ON urls(frecency DESC);
+CREATE VIRTUAL TABLE IF NOT EXISTS urls_fts USING fts5(
+    url, title, content='urls', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS urls_ai AFTER INSERT ON urls BEGIN
+    INSERT INTO urls_fts(rowid, url, title) VALUES (new.id, new.url, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS urls_ad AFTER DELETE ON urls BEGIN
+    INSERT INTO urls_fts(urls_fts, rowid, url, title) VALUES ('delete', old.id, old.url, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS urls_au AFTER UPDATE OF url, title ON urls BEGIN
+    INSERT INTO urls_fts(urls_fts, rowid, url, title) VALUES ('delete', old.id, old.url, old.title);
+    INSERT INTO urls_fts(rowid, url, title) VALUES (new.id, new.url, new.title);
+END;
+"""
+
+# Frecency = visit count weighted by how recently the page was visited
+FRECENCY_SQL = """
+visit_count * CASE
+    WHEN last_visit >= :now - 4 * 86400 THEN 100
+    WHEN last_visit >= :now - 14 * 86400 THEN 70
+    WHEN last_visit >= :now - 31 * 86400 THEN 50
+    WHEN last_visit >= :now - 90 * 86400 THEN 30
+    ELSE 10
+END
+"""
+
+# Imported rows add their visits to the pages that are already known
+UPSERT_SQL = """
+ON CONFLICT(url) DO UPDATE SET
+    visit_count = visit_count + excluded.visit_count,
+    last_visit = MAX(last_visit, excluded.last_visit),
+    title = CASE WHEN title = '' THEN excluded.title ELSE title END
+"""
+
+STAGING_SCHEMA = """
+CREATE TEMP TABLE IF NOT EXISTS import_staging (
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    visit_count INTEGER NOT NULL,
+    last_visit REAL NOT NULL
+)
+"""
+
+RECORDED_SCHEMES = ("http://", "https://")
+
+def open_connection(db_path):
+    connection = sqlite3.connect(db_path, timeout=10)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA foreign_keys=ON")
+    return connection
+
+def split_query(text):
+    # Punctuation separates words, scheme prefixes match every entry anyway
+    return [word for word in WORD_REGEX.findall(text.lower()) if word not in ("http", "https", "www")]
+
+def build_match_query(words):
+    # Every typed word becomes a quoted prefix term, so FTS syntax can't leak in
+    terms = []
+    for word in words:
+        word = word.replace('"', '""')
+        terms.append(f'"{word}"*')
+    return " AND ".join(terms)
+
+def escape_like(word):
+    return word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+class HistoryStore():
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.write_queue = queue.Queue()
+
+        # Create the schema before any reader touches the database
+        connection = open_connection(db_path)
+        connection.executescript(SCHEMA)
+        connection.commit()
+        connection.close()
+
+        self.read_connection = open_connection(db_path)
+        self.writer = threading.Thread(target=self.run_writer, daemon=True)
+        self.writer.start()
+        self.refresh_frecency()
+
+    # Write side, called from the UI thread
+    def add_visit(self, url, title="", visit_time=None):
+        if not url.startswith(RECORDED_SCHEMES):
+            return
+        self.write_queue.put(("visit", (url, title, visit_time or time.time())))
+
+    def update_title(self, url, title):
+        if not url.startswith(RECORDED_SCHEMES) or not title:
+            return
+        self.write_queue.put(("title", (url, title)))
+
+    def add_entries(self, entries):
+        # Bulk insert of (url, title, visit_count, last_visit) rows
+        self.write_queue.put(("import", list(entries)))
+        self.refresh_frecency()
+
+    # Imports stream their rows into a staging table, the history only changes
+    # once the whole import went through and a cancelled one leaves no trace
+    def stage_entries(self, entries):
+        self.write_queue.put(("stage", list(entries)))
+
+    def commit_staged(self):
+        self.write_queue.put(("commit_staged", None))
+        self.refresh_frecency()
+
+    def discard_staged(self):
+        self.write_queue.put(("discard_staged", None))
+
+    def refresh_frecency(self):
+        self.write_queue.put(("refresh_frecency", None))
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        # Block until every queued write is committed, False if the writer didn't get there in time
+        done = threading.Event()
+        self.write_queue.put(("flush", done))
+        if not done.wait(timeout):
+            print("Timed out waiting for the browsing history to be written")
+            return False
+        return True
+
+    def close(self):
+        self.flush()
+        self.write_queue.put(("stop", None))
+        self.writer.join(timeout=5)
+        self.read_connection.close()
+
+    def run_writer(self):
+        connection = open_connection(self.db_path)
+        # Only this connection sees the temporary table
+        connection.execute(STAGING_SCHEMA)
+        running = True
+
+        while running:
+            batch = [self.write_queue.get()]
+            deadline = time.monotonic() + BATCH_DELAY
+
+            # Collect more writes for a short moment to commit them together
+            while len(batch) < BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.write_queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            # Markers are handled outside the transaction, a failed write must not lose them
+            waiting = []
+            writes = []
+            for action, data in batch:
+                if action == "flush":
+                    waiting.append(data)
+                elif action == "stop":
+                    running = False
+                else:
+                    writes.append((action, data))
+
+            try:
+                with connection:
+                    for action, data in writes:
+                        self.write(connection, action, data)
+            except Exception as e:
+                print(f"Failed to write browsing history: {e}")
+
+            for done in waiting:
+                done.set()
+
+        connection.close()
+
+    def write(self, connection, action, data):
+        if action == "visit":
+            self.write_visit(connection, *data)
+        elif action == "title":
+            connection.execute("UPDATE urls SET title = ? WHERE url = ?", (data[1], data[0]))
+        elif action == "import":
+            self.write_entries(connection, data)
+        elif action == "stage":
+            connection.executemany(
+                "INSERT INTO import_staging (url, title, visit_count, last_visit) VALUES (?, ?, ?, ?)",
+                [entry for entry in data if entry[0].startswith(RECORDED_SCHEMES)],
+            )
+        elif action == "commit_staged":
+            connection.execute(f"INSERT INTO urls (url, title, visit_count, last_visit) SELECT url, title, visit_count, last_visit FROM import_staging WHERE true {UPSERT_SQL}")
+            connection.execute("DELETE FROM import_staging")
+        elif action == "discard_staged":
+            connection.execute("DELETE FROM import_staging")
+        elif action == "refresh_frecency":
+            connection.execute(f"UPDATE urls SET frecency = {FRECENCY_SQL}", {"now": time.time()})
+
+    def write_visit(self, connection, url, title, visit_time):
+        connection.execute(
+            "INSERT INTO urls (url, title) VALUES (?, ?) ON CONFLICT(url) DO NOTHING",
+            (url, title),
+        )
+        row = connection.execute("SELECT id, title FROM urls WHERE url = ?", (url,)).fetchone()
+        connection.execute("INSERT INTO visits (url_id, visit_time) VALUES (?, ?)", (row[0], visit_time))
+        connection.execute(
+            """UPDATE urls SET visit_count = visit_count + 1, last_visit = :time,
+                title = CASE WHEN :title != '' THEN :title ELSE title END
+                WHERE id = :id""",
+            {"time": visit_time, "title": title, "id": row[0]},
+        )
+        connection.execute(f"UPDATE urls SET frecency = {FRECENCY_SQL} WHERE id = :id", {"now": time.time(), "id": row[0]})
+
+    def write_entries(self, connection, entries):
+        connection.executemany(
+            f"INSERT INTO urls (url, title, visit_count, last_visit) VALUES (?, ?, ?, ?) {UPSERT_SQL}",
+            [entry for entry in entries if entry[0].startswith(RECORDED_SCHEMES)],
+        )
+
+    # Read side, only used from the UI thread
+    def search(self, text, limit=8):
+        words = split_query(text)
+        if not words:
+            return []
+
+        try:
+            # Short, common prefixes match many rows in the FTS index, so check
+            # the most frecent pages first and only fall back to the index when
+            # they don't provide enough results
+            results = self.search_frecent(words, limit)
+
+            if len(results) < limit:
+                seen = {url for url, _ in results}
+                for url, title in self.search_index(words, limit):
+                    if url not in seen and len(results) < limit:
+                        results.append((url, title))
+
+            return results
+        except sqlite3.Error as e:
+            print(f"History search failed: {e}")
+            return []
+
+    def search_frecent(self, words, limit):
+        conditions = " AND ".join("(url || ' ' || title) LIKE ? ESCAPE '\\'" for _ in words)
+        return self.read_connection.execute(
+            f"""SELECT url, title FROM (
+                    SELECT url, title FROM urls ORDER BY frecency DESC LIMIT ?
+                ) WHERE {conditions} LIMIT ?""",
+            [FRECENT_SCAN_SIZE] + [f"%{escape_like(word)}%" for word in words] + [limit],
+        ).fetchall()
+
+    def search_index(self, words, limit):
+        # Short words expand to huge prefix sets in the index, so only the
+        # longest word is looked up and the others are checked on the candidates
+        index_words = [max(words, key=len)]
+        rows = self.read_connection.execute(
+            """SELECT urls.url, urls.title FROM urls_fts
+               JOIN urls ON urls.id = urls_fts.rowid
+               WHERE urls_fts MATCH ?
+               ORDER BY urls.frecency DESC LIMIT ?""",
+            (build_match_query(index_words), limit * 8),
+        ).fetchall()
+
+        return [
+            (url, title) for url, title in rows
+            if all(word in f"{url} {title}".lower() for word in words)
+        ][:limit]
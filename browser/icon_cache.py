@@ -0,0 +1,38 @@
+import qtawesome as qta
+from PyQt6.QtCore import QSize
+from PyQt6.QtGui import QIcon
+
+# qtawesome icons paint their font glyph again every time Qt asks for a pixmap.
+# The cache rasterizes every (glyph name, color, size) combination once into a
+# pixmap based QIcon, so icon updates on the hot path only swap pixmaps.
+
+ICON_SCALES = (1, 2)
+
+class IconCache():
+    def __init__(self):
+        self.icons = {}
+
+    def get(self, name, color=None, size=16):
+        key = (name, color, size)
+        icon = self.icons.get(key)
+
+        if icon is None:
+            icon = self.render(name, color, size)
+            self.icons[key] = icon
+
+        return icon
+
+    def render(self, name, color, size):
+        source = qta.icon(name, color=color) if color is not None else qta.icon(name)
+        icon = QIcon()
+
+        # Sharp icons on high DPI screens, Qt picks the best matching pixmap
+        for scale in ICON_SCALES:
+            icon.addPixmap(source.pixmap(QSize(size * scale, size * scale)))
+
+        return icon
+
+    def prerender(self, names, colors, size=16):
+        for color in colors:
+            for name in names:
+                self.get(name, color, size)
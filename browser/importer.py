@@ -0,0 +1,321 @@
+import os
+import codecs
+import json
+import shutil
+import sqlite3
+import tempfile
+from html.parser import HTMLParser
+
+# Bulk import of bookmarks and history from other browsers. Netscape bookmark
+# HTML files are parsed while they are read, Chromium and Firefox profiles are
+# read from copies of their databases, since the browsers lock them while they
+# run. Bookmarks come back as node dicts for the bookmark model and history is
+# handed to a sink in batches, so each batch is written in one transaction.
+
+FORMAT_NETSCAPE = "netscape"
+FORMAT_CHROMIUM = "chromium"
+FORMAT_FIREFOX = "firefox"
+
+FORMAT_NAMES = {
+    FORMAT_NETSCAPE: "HTML",
+    FORMAT_CHROMIUM: "Chromium",
+    FORMAT_FIREFOX: "Firefox"
+}
+
+READ_SIZE = 64 * 1024
+HISTORY_BATCH_SIZE = 5000
+
+# Seconds between 1601-01-01, where Chromium timestamps start, and 1970-01-01
+WEBKIT_EPOCH_OFFSET = 11644473600
+
+FIREFOX_TOOLBAR_GUID = "toolbar_____"
+FIREFOX_SKIPPED_GUIDS = ("root________", "tags________")
+
+class ImportCancelled(Exception):
+    pass
+
+class ImportResult():
+    def __init__(self, source_format):
+        self.source_format = source_format
+        self.bookmarks = []  # Node dicts for BookmarkModel.add_nodes
+        self.bookmark_count = 0
+        self.history_count = 0
+
+def detect_format(path):
+    name = os.path.basename(path).lower()
+
+    if name.endswith(".sqlite"):
+        return FORMAT_FIREFOX
+    if name.endswith((".html", ".htm")):
+        return FORMAT_NETSCAPE
+
+    # Chromium profiles store bookmarks in a JSON file called "Bookmarks"
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            start = f.read(1024).lstrip()
+    except OSError:
+        return None
+
+    if start.startswith("{"):
+        return FORMAT_CHROMIUM
+    if "NETSCAPE-Bookmark-file" in start or start.lower().startswith("<!doctype"):
+        return FORMAT_NETSCAPE
+    return None
+
+class ImportJob():
+    def __init__(self, path, source_format=None, history_sink=None, progress=None, is_cancelled=None):
+        self.path = path
+        self.source_format = source_format or detect_format(path)
+        self.history_sink = history_sink  # Called with lists of (url, title, visit count, last visit)
+        self.progress = progress  # Called with (done, total)
+        self.is_cancelled = is_cancelled
+
+    def check_cancelled(self):
+        if self.is_cancelled is not None and self.is_cancelled():
+            raise ImportCancelled()
+
+    def report(self, done, total):
+        if self.progress is not None:
+            self.progress(done, total)
+
+    def run(self):
+        if self.source_format == FORMAT_NETSCAPE:
+            return self.import_netscape()
+        if self.source_format == FORMAT_CHROMIUM:
+            return self.import_chromium()
+        if self.source_format == FORMAT_FIREFOX:
+            return self.import_firefox()
+        raise ValueError(f"Unknown bookmark file format: {self.path}")
+
+    # Netscape bookmark HTML, exported by every browser
+    def import_netscape(self):
+        result = ImportResult(FORMAT_NETSCAPE)
+        parser = NetscapeBookmarkParser()
+        total = os.path.getsize(self.path)
+        done = 0
+
+        # Characters split between two reads are completed by the next one
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        with open(self.path, "rb") as f:
+            while True:
+                self.check_cancelled()
+                data = f.read(READ_SIZE)
+                if not data:
+                    break
+
+                parser.feed(decoder.decode(data))
+                done += len(data)
+                self.report(done, total)
+
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+        result.bookmarks = parser.root["children"]
+        result.bookmark_count = parser.bookmark_count
+        return result
+
+    # Chromium based browsers: "Bookmarks" JSON and the "History" database next to it
+    def import_chromium(self):
+        result = ImportResult(FORMAT_CHROMIUM)
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            roots = json.load(f).get("roots", {})
+
+        counter = [0]
+        # The bookmark bar becomes the top level, the other roots become folders
+        bar = roots.get("bookmark_bar", {})
+        result.bookmarks = self.convert_chromium_children(bar.get("children", []), counter)
+
+        for key in ("other", "synced"):
+            root = roots.get(key)
+            if root and root.get("children"):
+                result.bookmarks.append({
+                    "name": root.get("name") or key.title(),
+                    "children": self.convert_chromium_children(root["children"], counter)
+                })
+        result.bookmark_count = counter[0]
+
+        history_path = os.path.join(os.path.dirname(self.path), "History")
+        if self.history_sink is not None and os.path.exists(history_path):
+            result.history_count = self.import_sqlite_history(
+                history_path,
+                "SELECT COUNT(*) FROM urls WHERE hidden = 0",
+                "SELECT url, title, visit_count, last_visit_time FROM urls WHERE hidden = 0",
+                lambda timestamp: timestamp / 1000000 - WEBKIT_EPOCH_OFFSET if timestamp else 0
+            )
+
+        return result
+
+    def convert_chromium_children(self, children, counter):
+        nodes = []
+
+        for child in children:
+            if child.get("type") == "folder":
+                nodes.append({
+                    "name": child.get("name", ""),
+                    "children": self.convert_chromium_children(child.get("children", []), counter)
+                })
+            elif child.get("type") == "url" and child.get("url"):
+                nodes.append({"name": child.get("name") or child["url"], "url": child["url"]})
+                counter[0] += 1
+
+                if counter[0] % 1000 == 0:
+                    self.check_cancelled()
+
+        return nodes
+
+    # Firefox: bookmarks and history are both in places.sqlite
+    def import_firefox(self):
+        result = ImportResult(FORMAT_FIREFOX)
+
+        with DatabaseCopy(self.path) as connection:
+            rows = connection.execute(
+                """SELECT b.id, b.parent, b.type, b.title, b.guid, p.url
+                   FROM moz_bookmarks b LEFT JOIN moz_places p ON b.fk = p.id
+                   ORDER BY b.parent, b.position"""
+            ).fetchall()
+
+        nodes = {}
+        children = {}
+        guids = {}
+
+        for bookmark_id, parent_id, bookmark_type, title, guid, url in rows:
+            guids[bookmark_id] = guid
+            # 1 = bookmark, 2 = folder, 3 = separator
+            if bookmark_type == 2:
+                nodes[bookmark_id] = {"name": title or "", "children": children.setdefault(bookmark_id, [])}
+            elif bookmark_type == 1 and url and not url.startswith("place:"):
+                nodes[bookmark_id] = {"name": title or url, "url": url}
+                result.bookmark_count += 1
+            else:
+                continue
+            children.setdefault(parent_id, []).append(bookmark_id)
+
+        def build(node_id):
+            node = nodes[node_id]
+            if "children" in node:
+                node["children"] = [build(child_id) for child_id in children.get(node_id, []) if child_id in nodes]
+            return node
+
+        root_id = next((node_id for node_id, guid in guids.items() if guid == "root________"), None)
+
+        # The toolbar becomes the top level, the menu and other bookmarks become folders
+        for node_id in children.get(root_id, []):
+            if node_id not in nodes or guids.get(node_id) in FIREFOX_SKIPPED_GUIDS:
+                continue
+
+            folder = build(node_id)
+            if guids.get(node_id) == FIREFOX_TOOLBAR_GUID:
+                result.bookmarks[0:0] = folder["children"]
+            elif folder["children"]:
+                result.bookmarks.append(folder)
+
+        if self.history_sink is not None:
+            result.history_count = self.import_sqlite_history(
+                self.path,
+                "SELECT COUNT(*) FROM moz_places WHERE visit_count > 0 AND hidden = 0",
+                "SELECT url, title, visit_count, last_visit_date FROM moz_places WHERE visit_count > 0 AND hidden = 0",
+                lambda timestamp: timestamp / 1000000 if timestamp else 0
+            )
+
+        return result
+
+    def import_sqlite_history(self, path, count_query, query, convert_time):
+        # Streams the history rows into the sink, one batch at a time
+        imported = 0
+
+        with DatabaseCopy(path) as connection:
+            total = connection.execute(count_query).fetchone()[0]
+            cursor = connection.execute(query)
+
+            while True:
+                self.check_cancelled()
+                rows = cursor.fetchmany(HISTORY_BATCH_SIZE)
+                if not rows:
+                    break
+
+                self.history_sink([
+                    (url, title or "", visit_count or 1, convert_time(last_visit))
+                    for url, title, visit_count, last_visit in rows
+                ])
+                imported += len(rows)
+                self.report(imported, total)
+
+        return imported
+
+class DatabaseCopy():
+    # Opens a read-only copy of a database that another browser may keep locked
+    def __init__(self, path):
+        self.path = path
+        self.directory = None
+        self.connection = None
+
+    def __enter__(self):
+        self.directory = tempfile.mkdtemp(prefix="silk-import-")
+        copy_path = os.path.join(self.directory, os.path.basename(self.path))
+        shutil.copyfile(self.path, copy_path)
+
+        # Recent changes may still be in the write-ahead log
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(f"{self.path}{suffix}"):
+                shutil.copyfile(f"{self.path}{suffix}", f"{copy_path}{suffix}")
+
+        self.connection = sqlite3.connect(copy_path)
+        return self.connection
+
+    def __exit__(self, *args):
+        if self.connection is not None:
+            self.connection.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+class NetscapeBookmarkParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = {"name": "", "children": []}
+        self.stack = []
+        self.pending_folder = None
+        self.text_target = None  # "folder" or "link" while their text is read
+        self.text = []
+        self.href = None
+        self.bookmark_count = 0
+
+    def current_children(self):
+        return self.stack[-1]["children"] if self.stack else self.root["children"]
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "dl":
+            # The list after a folder heading holds the folder contents, any other list
+            # continues the current folder
+            if self.pending_folder is not None:
+                self.stack.append(self.pending_folder)
+                self.pending_folder = None
+            else:
+                self.stack.append(self.stack[-1] if self.stack else self.root)
+        elif tag == "h3":
+            self.text_target = "folder"
+            self.text = []
+        elif tag == "a":
+            self.text_target = "link"
+            self.text = []
+            self.href = dict(attrs).get("href")
+
+    def handle_endtag(self, tag):
+        if tag == "dl":
+            if self.stack:
+                self.stack.pop()
+        elif tag == "h3" and self.text_target == "folder":
+            folder = {"name": "".join(self.text).strip(), "children": []}
+            self.current_children().append(folder)
+            self.pending_folder = folder
+            self.text_target = None
+        elif tag == "a" and self.text_target == "link":
+            if self.href and not self.href.startswith(("place:", "javascript:")):
+                name = "".join(self.text).strip() or self.href
+                self.current_children().append({"name": name, "url": self.href})
+                self.bookmark_count += 1
+            self.text_target = None
+            self.href = None
+
+    def handle_data(self, data):
+        if self.text_target is not None:
+            self.text.append(data)
@@ -1,9 +1,21 @@
 import sys
 import os
+from startup_profiler import StartupProfiler
+
+startup_profiler = StartupProfiler("--profile-startup" in sys.argv, final_phases=("First frame", "First page load"))
+
+# Scripted runs without a display, see headless_driver.py
+HEADLESS = "--headless" in sys.argv
+if HEADLESS:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
 import json
-import re
-import copy
+import time
+import shutil
+import tempfile
 import datetime
+import threading
+from collections import OrderedDict
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -22,6 +34,8 @@ from PyQt6.QtWidgets import (
     QDialogButtonBox,
     QProgressBar,
     QListWidget,
+    QListWidgetItem,
+    QTreeView,
     QTabWidget,
     QRadioButton,
     QButtonGroup,
@@ -30,24 +44,94 @@ from PyQt6.QtWidgets import (
     QTextEdit,
     QFileDialog,
     QMenu,
-    QWidgetAction
+    QWidgetAction,
+    QCompleter,
+    QInputDialog,
+    QProgressDialog,
+    QScrollArea,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView
 )
-from PyQt6.QtCore import Qt, QUrl, QSize, pyqtSlot, pyqtSignal, QThreadPool, QRunnable, QObject, QDir, QTranslator, QLocale
+from PyQt6.QtCore import Qt, QUrl, QSize, pyqtSlot, pyqtSignal, QThreadPool, QRunnable, QObject, QDir, QTranslator, QLocale, QTimer, QStringListModel, QByteArray, QDataStream, QIODevice
 from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtWebEngineCore import QWebEngineSettings, QWebEngineDownloadRequest
-from PyQt6.QtGui import QPixmap, QAction, QKeySequence, QIcon
+from PyQt6.QtWebEngineCore import (
+    QWebEngineSettings,
+    QWebEngineDownloadRequest,
+    QWebEnginePage,
+    QWebEngineUrlRequestInterceptor,
+    QWebEngineUrlRequestInfo
+)
+from PyQt6.QtGui import QPixmap, QAction, QKeySequence, QIcon, QTextCursor, QTextCharFormat
 import qtawesome as qta
-import qdarktheme
-import darkdetect
-import ollama
+from ai_backend import AIBackend, format_keep_alive
+from process_info import get_process_rss, get_total_rss, CpuSampler
+from summarizer import ChunkedSummarizer
+from ai_jobs import AIJob, AIJobSignals, AIJobQueue, PRIORITY_INTERACTIVE, PRIORITY_PAGE
+from summary_cache import SummaryCache, make_cache_key
+from url_classifier import classify_input, is_valid_url, URL_KIND
+from history_store import HistoryStore
+from icon_cache import IconCache
+from config_store import ConfigStore, validate_settings, write_atomic
+from bookmarks import BookmarkModel, validate_bookmarks, empty_bookmarks
+from content_blocker import load_filter_set, find_filter_lists, download_filter_lists
+from profile_manager import ProfileManager, CACHE_TYPES, COOKIE_POLICIES, MAX_CACHE_SIZE_MB
+from session import SESSION_VERSION, empty_session, validate_session, encode_history, decode_history
+from importer import ImportJob, ImportCancelled, FORMAT_NAMES, detect_format
+from stall_watchdog import StallWatchdog, HEARTBEAT_INTERVAL
+from model_manager import ModelManager, EVENT_FINISHED, PULL_CANCELLED, is_valid_model_name
+from extension_host import (
+    ExtensionHost,
+    BUDGET_ACTIONS,
+    QUEUE_LIMIT,
+    STATE_NOT_STARTED as EXTENSION_NOT_STARTED,
+    STATE_RUNNING as EXTENSION_RUNNING,
+    STATE_THROTTLED as EXTENSION_THROTTLED,
+    STATE_SUSPENDED as EXTENSION_SUSPENDED,
+    STATE_STOPPED as EXTENSION_STOPPED
+)
+from file_verifier import VerificationCancelled, parse_checksum, hash_file, find_sidecar_checksum
+from download_progress import ProgressAggregator, format_bytes, format_duration
+from download_engine import (
+    DownloadEngine,
+    SUPPORTED_SCHEMES as SUPPORTED_DOWNLOAD_SCHEMES,
+    STATE_QUEUED,
+    STATE_RUNNING,
+    STATE_PAUSED,
+    STATE_COMPLETED,
+    STATE_FAILED,
+    STATE_CANCELLED
+)
+
+startup_profiler.mark("Library imports")
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-CONFIG_PATH = os.path.join(SCRIPT_DIR, "config", "settings.json")
-BOOKMARKS_PATH = os.path.join(SCRIPT_DIR, "config", "bookmarks.json")
+# Headless runs get a throwaway profile, so they neither read nor change the user's data
+CONFIG_DIR = tempfile.mkdtemp(prefix="silk-headless-") if HEADLESS else os.path.join(SCRIPT_DIR, "config")
+CONFIG_PATH = os.path.join(CONFIG_DIR, "settings.json")
+BOOKMARKS_PATH = os.path.join(CONFIG_DIR, "bookmarks.json")
 LOGO_PATH = os.path.join(SCRIPT_DIR, "assets", "mizu2.png")
 START_PAGE_PATH = os.path.join(SCRIPT_DIR, "assets", "Silk-Start", "start", "v1.1.1", "seperate", "index.html")
 AI_SYSPROMPT_PATH = os.path.join(SCRIPT_DIR, "config", "sysprompt.txt")
-DOWNLOAD_PATH = os.path.join(SCRIPT_DIR, "Downloads")
+SUMMARY_CACHE_PATH = os.path.join(CONFIG_DIR, "summary_cache")
+HISTORY_PATH = os.path.join(CONFIG_DIR, "history.sqlite")
+DOWNLOAD_PATH = os.path.join(CONFIG_DIR, "Downloads") if HEADLESS else os.path.join(SCRIPT_DIR, "Downloads")
+DOWNLOAD_QUEUE_PATH = os.path.join(CONFIG_DIR, "downloads.json")
+DOWNLOAD_PROGRESS_INTERVAL = 100  # ms, at most 10 progress repaints per second
+SESSION_PATH = os.path.join(CONFIG_DIR, "session.json")
+PROFILE_PATH = os.path.join(CONFIG_DIR, "profile")
+FILTER_LIST_DIR = os.path.join(CONFIG_DIR, "filters")
+FILTER_CACHE_PATH = os.path.join(CONFIG_DIR, "filters.cache")
+REQUEST_LOG_PATH = os.environ.get("SILK_REQUEST_LOG")  # Records requests for benchmarks/bench_content_blocker.py
+NAVIGATION_METHOD_HISTORY = 64  # Navigations remembered to tell form posts from plain downloads
+SESSION_SNAPSHOT_INTERVAL = 5000  # ms, only tabs that changed are serialized again
+EXTENSIONS_PATH = os.path.join(SCRIPT_DIR, "extensions")
+EXTENSION_INDEX_PATH = os.path.join(CONFIG_DIR, "extensions_index.json")
+# Task manager metrics as JSON, rewritten on every sample. Resolved now, a relative path means the start directory
+METRICS_EXPORT_PATH = os.path.abspath(os.environ["SILK_METRICS_PATH"]) if os.environ.get("SILK_METRICS_PATH") else None
+RESOURCE_SAMPLE_INTERVAL = 2000  # ms, extension budgets are checked at this rate
+# Written with --watch-stalls, see stall_watchdog.py. The throwaway profile of headless runs is deleted on exit
+STALL_LOG_PATH = os.path.join(tempfile.gettempdir(), "silk-mizu-stalls.log") if HEADLESS else os.path.join(CONFIG_DIR, "stalls.log")
 SUM_AI_MODEL = {"name":"lfm2.5-thinking:1.2b", "size":"700MB"}
 VERSION_NUMBER = "0.2.94"
 SEARCH_ENGINE_SEARCH_QUERIES = {
@@ -57,6 +141,24 @@ SEARCH_ENGINE_SEARCH_QUERIES = {
     "Ecosia":"https://www.ecosia.org/search?method=index&q=",
     "Yahoo":"https://search.yahoo.com/search?p="
 }
+NAV_ICON_NAMES = [
+    "msc.layout-sidebar-left",
+    "fa6s.arrow-left",
+    "fa6s.arrow-right",
+    "fa6s.arrow-rotate-right",
+    "ei.remove",
+    "mdi.arrow-right-bold-box",
+    "fa6s.plus",
+    "ei.download",
+    "ph.sparkle-fill",
+    "fa5s.bookmark",
+    "fa5s.cog",
+    "ph.magnifying-glass-minus",
+    "ph.magnifying-glass-plus",
+    "fa6s.download",
+    "fa6s.trash",
+    "fa6s.stop"
+]
 NAME_TO_LANGUAGE = {
     "English":"en_US",
     "Deutsch":"de_DE"
@@ -65,8 +167,28 @@ LANGUAGE_TO_NAME = {
     "en_US":"English",
     "de_DE":"Deutsch"
 }
+# Filter list names of the request types, everything else counts as "other"
+RESOURCE_TYPE_NAMES = {
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeSubFrame:"subdocument",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeNavigationPreloadSubFrame:"subdocument",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeStylesheet:"stylesheet",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeScript:"script",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeImage:"image",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeFavicon:"image",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeFontResource:"font",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeObject:"object",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypePluginResource:"object",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeMedia:"media",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeXhr:"xmlhttprequest",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypePing:"ping",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeWebSocket:"websocket"
+}
+# Pages themselves are never blocked
+PAGE_RESOURCE_TYPES = (
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeMainFrame,
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeNavigationPreloadMainFrame
+)
 
-current_settings = {}
 default_settings = {
     "start_page_url":START_PAGE_PATH,
     "search_engine":"Google",
@@ -74,64 +196,68 @@ default_settings = {
     "bottom_bar_visible":False,
     "go_button_visible":False,
     "download_warnings":True,
+    "download_verification":False,
+    "content_blocking":True,
+    "restore_session":True,
     "language":"en_US",
     "javascript_enabled":True,
     "default_font_size":16,
     "scrollbars_enabled":True,
-    "ai_summarization_enabled":False
+    "ai_summarization_enabled":False,
+    "max_loaded_tabs":10,
+    "tab_memory_budget_mb":0,
+    "http_cache_type":"Disk",
+    "http_cache_size_mb":512,
+    "persistent_cookies":"Allow",
+    "profile_storage_path":"",
+    "extension_cpu_budget_percent":0,
+    "extension_memory_budget_mb":0,
+    "extension_budget_action":"Throttle",
+    "extension_queue_limit":QUEUE_LIMIT,
+    "ai_keep_alive_minutes":30,
+    "ai_preload_model":True
 }
 
-current_bookmarks = {}
-default_bookmarks = {}
+default_bookmarks = empty_bookmarks()
+SETTING_CHOICES = {
+    "search_engine":tuple(SEARCH_ENGINE_SEARCH_QUERIES),
+    "language":tuple(LANGUAGE_TO_NAME),
+    "http_cache_type":tuple(CACHE_TYPES),
+    "persistent_cookies":tuple(COOKIE_POLICIES),
+    "extension_budget_action":BUDGET_ACTIONS
+}
 
 # Disable Chromium debug logs
 os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = "--disable-logging"
 
-# Load settings.json
-if os.path.exists(CONFIG_PATH):
-    with open(CONFIG_PATH, "r") as f:
-        d = json.load(f)
-
-        try:
-            for setting, value in d.items():
-                current_settings[setting] = value
-            print(current_settings)
-        except KeyError:
-            current_settings = default_settings
-            print("Failed to load settings.json. Using default settings.")
-        
-else:
-    os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(default_settings, f, indent=4)
-    current_settings = default_settings
-
-# Load bookmarks.json
-if os.path.exists(BOOKMARKS_PATH):
-    with open(BOOKMARKS_PATH, "r") as f:
-        d = json.load(f)
+# Settings and bookmarks, written atomically in the background
+settings_store = ConfigStore(
+    CONFIG_PATH,
+    default_settings,
+    lambda data: validate_settings(data, default_settings, SETTING_CHOICES)
+)
+bookmarks_store = ConfigStore(BOOKMARKS_PATH, default_bookmarks, validate_bookmarks)
+session_store = ConfigStore(SESSION_PATH, empty_session(), validate_session)
 
-        try:
-            for name, url in d.items():
-                current_bookmarks[name] = url
-            print(current_bookmarks)
-        except KeyError:
-            current_bookmarks = default_bookmarks
-            print("Failed to load bookmarks.json. Using default bookmarks.")
-else:
-    os.makedirs(os.path.dirname(BOOKMARKS_PATH), exist_ok=True)
-    with open(BOOKMARKS_PATH, "w") as f:
-        json.dump(default_bookmarks, f, indent=4)
-    current_bookmarks = default_bookmarks
+# Stays the same dict object, the store updates it in place
+current_settings = settings_store.data
 
 # Load AI system prompt
 with open(AI_SYSPROMPT_PATH, 'r') as f:
     ai_system_prompt = f.read()
 
+startup_profiler.mark("Settings, bookmarks and prompt loaded")
+
+summary_cache = SummaryCache(SUMMARY_CACHE_PATH)
+icon_cache = IconCache()
+ai_job_queue = AIJobQueue(max_concurrency=1)
+ai_backend = AIBackend(keep_alive=format_keep_alive(current_settings["ai_keep_alive_minutes"]))
+
 class ThemeManager():
     def __init__(self, applic, theme="dark"):
         self.applic = applic
         self.theme = theme
+        self.system_theme = None
         self.available_themes = [
             "light",
             "dark",
@@ -144,12 +270,15 @@ class ThemeManager():
         theme_input = theme_input.strip().lower()
 
         if theme_input in self.available_themes:
+            # Theme libraries are only imported when a theme needs them
             if theme_input != "automatic" and theme_input != "legacy":
+                import qdarktheme
                 self.applic.setStyleSheet(qdarktheme.load_stylesheet(theme_input))
 
             elif theme_input == "automatic":
-                system_theme = "dark" if darkdetect.isDark() else "light"
-                self.applic.setStyleSheet(qdarktheme.load_stylesheet(system_theme))
+                import qdarktheme
+                self.system_theme = None
+                self.applic.setStyleSheet(qdarktheme.load_stylesheet(self.get_system_theme()))
             
             elif theme_input == "legacy":
                 self.applic.setStyleSheet("")
@@ -158,31 +287,65 @@ class ThemeManager():
 
         else:
             print("Theme not found")
+
+    def get_system_theme(self):
+        # Asking the OS can be slow, so the answer is cached until the theme is reloaded
+        if self.system_theme is None:
+            import darkdetect
+            self.system_theme = "dark" if darkdetect.isDark() else "light"
+        return self.system_theme
     
     def get_plain_theme(self):
         if self.theme != "automatic" and self.theme != "legacy":
             return self.theme
         
         else:
-            system_theme = "dark" if darkdetect.isDark() else "light"
-            return system_theme
+            return self.get_system_theme()
 
 class BetterWebEngineSignals(QObject):
     sum_selected_with_ai = pyqtSignal(str)
     sum_page_with_ai = pyqtSignal()
 
+def serialize_history(history):
+    data = QByteArray()
+    stream = QDataStream(data, QIODevice.OpenModeFlag.WriteOnly)
+    stream << history
+    return bytes(data)
+
+def restore_history(history, data):
+    # Loading the history also navigates to its current entry
+    stream = QDataStream(QByteArray(data))
+    stream >> history
+    return history.count() > 0
+
 class BetterWebEngine(QWebEngineView):
-    def __init__(self, parent):
+    def __init__(self, parent, url=None, history_data=None, profile=None, request_interceptor=None):
         super().__init__(parent)
+        # Pages of the shared profile, Qt's default profile is off the record
+        if profile is not None:
+            self.setPage(QWebEnginePage(profile, self))
+        # The page does not own its interceptor, it is deleted with the view after the page
+        if request_interceptor is not None:
+            request_interceptor.setParent(self)
+            self.page().setUrlRequestInterceptor(request_interceptor)
+
         self.page_is_loading = False
         self.signals = BetterWebEngineSignals()
 
-        self.init_engine()
+        self.init_engine(url, history_data)
         self.update_engine_config()
     
-    def init_engine(self):
+    def init_engine(self, url=None, history_data=None):
+        # Restore a given page (e.g. from a discarded tab or the last session) instead of the start page
+        if history_data and restore_history(self.history(), history_data):
+            self.page_is_loading = True
+
+        elif url:
+            self.setUrl(QUrl(url))
+            self.page_is_loading = True
+
         # Check if start page exists
-        if os.path.exists(START_PAGE_PATH):
+        elif os.path.exists(START_PAGE_PATH):
             self.load_page(current_settings["start_page_url"])
         else:
             self.load_page(SEARCH_ENGINE_SEARCH_QUERIES.get(current_settings["search_engine"]))
@@ -201,12 +364,12 @@ class BetterWebEngine(QWebEngineView):
 
     def load_page(self, url):
         # Load URL if valid, else use the default search engine
-        processed_url = QUrl.fromUserInput(url).toString()
-        if self.valid_url(processed_url) or self.valid_url(url):
-            self.setUrl(QUrl(processed_url))
+        kind, target = classify_input(url)
+        if kind == URL_KIND:
+            self.setUrl(QUrl(target))
         else:
             # Get url for search engine
-            search_url = SEARCH_ENGINE_SEARCH_QUERIES.get(current_settings["search_engine"]) + url
+            search_url = SEARCH_ENGINE_SEARCH_QUERIES.get(current_settings["search_engine"]) + target
             self.setUrl(QUrl(search_url))
         
         self.page_is_loading = True
@@ -223,20 +386,7 @@ class BetterWebEngine(QWebEngineView):
         self.page_is_loading = False
     
     def valid_url(self, url):
-        # Regex for standard http/https URLs and file paths
-        regex = re.compile(
-            r'^(?:(?:http|ftp)s?|file)://'  # file
-            r'(?:'
-                r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|' # domain
-                r'localhost|' # localhost
-                r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})' # or ip
-            r'|' # OR 
-                r'/[^\s]+' # Absolute path for file:/// schemes
-            r')'
-            r'(?::\d+)?' # optional port
-            r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-
-        return re.match(regex, url) is not None
+        return is_valid_url(url)
     
     def scale_page_up(self):
         zoom_factor = self.zoomFactor()
@@ -264,40 +414,398 @@ class BetterWebEngine(QWebEngineView):
         settings.setAttribute(QWebEngineSettings.WebAttribute.ShowScrollBars,
                                 current_settings["scrollbars_enabled"])
 
-class DownloadManager(QMenu):
-    def __init__(self):
+class WebTab(QWidget):
+    # Tab placeholder that only keeps URL, title, favicon, zoom and navigation
+    # history around and creates the actual web engine (a Chromium renderer)
+    # the first time it is needed
+    def __init__(self, browser_window, url=None, title="", icon=None, history_data=None, zoom=1.0):
         super().__init__()
-        self.downloads = {}  # Store active download objects
+        self.browser_window = browser_window
+        self.engine = None
+        self.saved_url = url
+        self.saved_title = title
+        self.saved_icon = icon if icon is not None else QIcon()
+        self.saved_scroll_pos = None
+        self.saved_history = history_data
+        self.saved_zoom = zoom
+        self.session_state = None  # Cached snapshot, cleared when the tab changes
+        self.blocked_requests = 0  # Since the last page load
 
-    def add_download(self, download: QWebEngineDownloadRequest):
-        # Download info
-        download_filename = download.suggestedFileName()
+        self.layout = QVBoxLayout()
+        self.layout.setContentsMargins(0, 0, 0, 0)
+        self.layout.setSpacing(0)
+        self.setLayout(self.layout)
 
-        if not os.path.exists(DOWNLOAD_PATH):
-            os.makedirs(DOWNLOAD_PATH)
+    def is_loaded(self):
+        return self.engine is not None
 
-        download.setDownloadDirectory(DOWNLOAD_PATH)
-        download.setDownloadFileName(download_filename)
-        
+    def materialize(self):
+        if self.engine is not None:
+            return self.engine
+
+        # Blocked requests are counted for the tab whose page made them
+        request_interceptor = PageRequestInterceptor(
+            self.browser_window.content_blocker,
+            lambda: self.browser_window.count_blocked_request(self)
+        )
+        self.engine = BetterWebEngine(
+            self, self.saved_url, self.saved_history,
+            self.browser_window.profile_manager.profile, request_interceptor
+        )
+        self.engine.setZoomFactor(self.saved_zoom)
+        self.saved_history = None
+        self.layout.addWidget(self.engine)
+        self.browser_window.connect_web_engine(self.engine, self)
+
+        if self.saved_scroll_pos is not None:
+            self.engine.loadFinished.connect(self.restore_scroll_position)
+
+        return self.engine
+
+    def can_discard(self):
+        if self.engine is None:
+            return False
+
+        # Never throw away pages that are still loading or playing audio
+        return not self.engine.page_is_loading and not self.engine.page().recentlyAudible()
+
+    def discard(self):
+        if not self.can_discard():
+            return False
+
+        self.saved_url = self.engine.url().toString()
+        self.saved_title = self.engine.title()
+        self.saved_icon = self.engine.icon()
+        self.saved_scroll_pos = self.engine.page().scrollPosition()
+        self.saved_history = serialize_history(self.engine.history())
+        self.saved_zoom = self.engine.zoomFactor()
+
+        self.layout.removeWidget(self.engine)
+        self.engine.deleteLater()
+        self.engine = None
+        return True
+
+    def restore_scroll_position(self, ok):
+        self.engine.loadFinished.disconnect(self.restore_scroll_position)
+
+        if ok and self.saved_scroll_pos is not None:
+            x = int(self.saved_scroll_pos.x())
+            y = int(self.saved_scroll_pos.y())
+            self.engine.page().runJavaScript(f"window.scrollTo({x}, {y});")
+
+        self.saved_scroll_pos = None
+
+    def render_process_pid(self):
+        if self.engine is None:
+            return 0
+        return self.engine.page().renderProcessPid()
+
+    def get_session_state(self):
+        if self.session_state is None:
+            if self.engine is not None:
+                history = serialize_history(self.engine.history())
+                zoom = self.engine.zoomFactor()
+            else:
+                history = self.saved_history
+                zoom = self.saved_zoom
+
+            self.session_state = {
+                "url": self.url().toString(),
+                "title": self.title(),
+                "zoom": round(zoom, 2),
+                "history": encode_history(history)
+            }
+        return self.session_state
+
+    # Same accessors as QWebEngineView so the tab bar works with both states
+    def title(self):
+        return self.engine.title() if self.engine is not None else self.saved_title
+
+    def url(self):
+        return self.engine.url() if self.engine is not None else QUrl(self.saved_url or "")
+
+    def icon(self):
+        return self.engine.icon() if self.engine is not None else self.saved_icon
+
+    def iconUrl(self):
+        if self.engine is not None:
+            return self.engine.iconUrl()
+        return QUrl() if self.saved_icon.isNull() else QUrl(self.saved_url or "")
+
+class TabDiscarder():
+    # Frees the web engines of the least recently viewed background tabs once
+    # the loaded tab count or the memory budget (in MB, 0 = off) is exceeded
+    def __init__(self, max_loaded_tabs=10, memory_budget_mb=0):
+        self.max_loaded_tabs = max_loaded_tabs
+        self.memory_budget_mb = memory_budget_mb
+        self.recent_tabs = OrderedDict()
+
+    def configure(self, max_loaded_tabs, memory_budget_mb):
+        self.max_loaded_tabs = max_loaded_tabs
+        self.memory_budget_mb = memory_budget_mb
+
+    def touch(self, tab):
+        self.recent_tabs[tab] = True
+        self.recent_tabs.move_to_end(tab)
+
+    def forget(self, tab):
+        self.recent_tabs.pop(tab, None)
+
+    def get_memory_usage(self):
+        pids = [tab.render_process_pid() for tab in self.recent_tabs]
+        return get_process_rss() + get_total_rss(pids)
+
+    def enforce(self, current_tab):
+        # Oldest tabs come first in the LRU order
+        candidates = [tab for tab in self.recent_tabs if tab is not current_tab and tab.can_discard()]
+        loaded_count = sum(1 for tab in self.recent_tabs if tab.is_loaded())
+        discarded = []
+
+        while candidates and self.max_loaded_tabs > 0 and loaded_count > self.max_loaded_tabs:
+            tab = candidates.pop(0)
+            if tab.discard():
+                loaded_count -= 1
+                discarded.append(tab)
+
+        if self.memory_budget_mb > 0:
+            budget = self.memory_budget_mb * 1024 * 1024
+            usage = self.get_memory_usage()
+
+            # Renderers exit asynchronously, so subtract their last known RSS
+            while candidates and usage > budget:
+                tab = candidates.pop(0)
+                tab_rss = get_process_rss(tab.render_process_pid())
+
+                if tab.discard():
+                    usage -= tab_rss
+                    discarded.append(tab)
+
+        if discarded:
+            print(f"Discarded {len(discarded)} background tab(s)")
+        return discarded
+
+class ContentBlockInterceptor(QWebEngineUrlRequestInterceptor):
+    # Installed on the profile, Qt calls it on the UI thread for every request. Blocking
+    # happens in the interceptor of each page, so blocked requests are known per tab
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.filter_set = None  # Nothing is blocked until the lists are loaded
+        self.request_log = open(REQUEST_LOG_PATH, "a", encoding="utf-8") if REQUEST_LOG_PATH else None
+        self.navigation_methods = OrderedDict()  # URL -> HTTP method of the last navigations
+
+    def interceptRequest(self, info):
+        if info.resourceType() in PAGE_RESOURCE_TYPES:
+            # Downloads start as navigations, the download manager asks how they were requested
+            url = info.requestUrl().toString()
+            self.navigation_methods[url] = bytes(info.requestMethod()).decode("ascii", "replace")
+            self.navigation_methods.move_to_end(url)
+            while len(self.navigation_methods) > NAVIGATION_METHOD_HISTORY:
+                self.navigation_methods.popitem(last=False)
+
+    def should_block(self, info):
+        if info.resourceType() in PAGE_RESOURCE_TYPES:
+            return False
+
+        resource_type = RESOURCE_TYPE_NAMES.get(info.resourceType(), "other")
+        url = info.requestUrl().toString()
+        # The initiator is the frame that made the request, the first party only names the site
+        source_host = info.initiator().host() or info.firstPartyUrl().host()
+
+        if self.request_log is not None:
+            self.request_log.write(f"{resource_type}\t{url}\t{source_host}\n")
+
+        return self.filter_set is not None and self.filter_set.should_block(url, source_host, resource_type)
+
+class PageRequestInterceptor(QWebEngineUrlRequestInterceptor):
+    # Installed on a single page, Qt calls it after the interceptor of the profile
+    def __init__(self, content_blocker, on_blocked, parent=None):
+        super().__init__(parent)
+        self.content_blocker = content_blocker  # Shared ContentBlockInterceptor with the filter set
+        self.on_blocked = on_blocked
+
+    def interceptRequest(self, info):
+        if self.content_blocker.should_block(info):
+            info.block(True)
+            self.on_blocked()
+
+class FilterListWorkerSignals(QObject):
+    finished = pyqtSignal(object, str)  # FilterSet or None, problems
+
+class FilterListWorker(QRunnable):
+    def __init__(self, download=False):
+        super().__init__()
+        self.download = download
+        self.signals = FilterListWorkerSignals()
+
+    @pyqtSlot()
+    def run(self):
+        # The window only loads lists again once finished arrived, so every error ends up there
+        try:
+            filter_set, problems = self.load()
+        except Exception as e:
+            filter_set, problems = None, [str(e) or type(e).__name__]
+
+        self.signals.finished.emit(filter_set, "; ".join(problems))
+
+    def load(self):
+        problems = []
+        paths = find_filter_lists(FILTER_LIST_DIR)
+
+        # The default lists are fetched when there are none yet or on request
+        if self.download or not paths:
+            problems = download_filter_lists(FILTER_LIST_DIR)
+            paths = find_filter_lists(FILTER_LIST_DIR)
+
+        if not paths:
+            return None, problems
+
+        filter_set = load_filter_set(paths, FILTER_CACHE_PATH)
+        return filter_set, problems + filter_set.problems
+
+VERIFY_MATCH = "match"
+VERIFY_MISMATCH = "mismatch"
+VERIFY_NO_CHECKSUM = "no_checksum"
+VERIFY_FAILED = "failed"
+
+class VerificationWorkerSignals(QObject):
+    progress = pyqtSignal(int)  # Percent
+    finished = pyqtSignal(str, str)  # Result, digest or error message
+
+class VerificationWorker(QRunnable):
+    def __init__(self, path, url, checksum=None):
+        super().__init__()
+        self.path = path
+        self.url = url
+        self.checksum = checksum  # (algorithm, hex digest), looked up next to the URL if None
+        self.cancel_event = threading.Event()
+        self.signals = VerificationWorkerSignals()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            checksum = self.checksum
+            if checksum is None:
+                checksum = find_sidecar_checksum(self.url, os.path.basename(self.path))
+            if checksum is None:
+                self.signals.finished.emit(VERIFY_NO_CHECKSUM, "")
+                return
+
+            algorithm, expected = checksum
+            digest = hash_file(
+                self.path,
+                algorithm,
+                lambda done, total: self.signals.progress.emit(int(done * 100 / total)),
+                self.cancel_event.is_set
+            )
+
+            result = VERIFY_MATCH if digest == expected else VERIFY_MISMATCH
+            self.signals.finished.emit(result, f"{algorithm}: {digest}")
+        except VerificationCancelled:
+            pass
+        except Exception as e:
+            # The entry waits on finished, every failure has to end up there
+            self.signals.finished.emit(VERIFY_FAILED, str(e) or type(e).__name__)
+
+class ImportWorkerSignals(QObject):
+    progress = pyqtSignal(int, int)  # Done, total
+    finished = pyqtSignal(object)  # ImportResult
+    failed = pyqtSignal(str)
+
+class ImportWorker(QRunnable):
+    def __init__(self, path, history_store):
+        super().__init__()
+        self.path = path
+        self.history_store = history_store
+        self.cancel_event = threading.Event()
+        self.signals = ImportWorkerSignals()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @pyqtSlot()
+    def run(self):
+        # History is staged batch by batch and only merged once the import went through
+        job = ImportJob(
+            self.path,
+            history_sink=self.history_store.stage_entries,
+            progress=self.signals.progress.emit,
+            is_cancelled=self.cancel_event.is_set
+        )
+
+        try:
+            result = job.run()
+        except ImportCancelled:
+            self.history_store.discard_staged()
+            return
+        except Exception as e:
+            # Malformed exports raise all kinds of errors, the progress dialog waits for one of the signals
+            self.history_store.discard_staged()
+            self.signals.failed.emit(str(e) or type(e).__name__)
+            return
+
+        self.history_store.commit_staged()
+        self.signals.finished.emit(result)
+
+class DownloadEngineSignals(QObject):
+    # The engine reports from its worker threads, Qt queues this to the UI thread
+    task_changed = pyqtSignal(str)
+
+class DownloadManager(QMenu):
+    # Aggregate progress text and tooltip for the downloads button, empty when idle
+    aggregate_changed = pyqtSignal(str, str)
+
+    def __init__(self, engine, engine_signals, navigation_methods):
+        super().__init__()
+        self.downloads = {}  # Store active download objects
+        self.engine = engine
+        self.navigation_methods = navigation_methods  # URL -> HTTP method, see ContentBlockInterceptor
+        self.engine_entries = {}  # Task id -> (label, progress bar, pause button, stop button, verify button)
+        self.progress_bars = {}  # Progress key -> progress bar
+
+        engine_signals.task_changed.connect(self.update_engine_entry)
+
+        # All active downloads are sampled on one timer instead of on every received chunk
+        self.progress_aggregator = ProgressAggregator()
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(DOWNLOAD_PROGRESS_INTERVAL)
+        self.progress_timer.timeout.connect(self.refresh_progress)
+        self.aboutToShow.connect(self.refresh_progress)
+
+        # Hashing runs on its own small pool, large images can take a while
+        self.verification_pool = QThreadPool(self)
+        self.verification_pool.setMaxThreadCount(2)
+        self.verifications = {}  # Progress key -> running VerificationWorker
+        self.verified_keys = set()
+
+    def create_entry(self, download_filename, text):
         # Create layouts for the menu entry
         layout = QVBoxLayout()
         container = QWidget()
 
         # Download UI elements
-        label = QLabel(f"{self.tr("Downloading:")} {self.short_if_needed(download_filename)}")
+        label = QLabel(f"{text} {self.short_if_needed(download_filename)}")
         label.setToolTip(download_filename)
         progress = QProgressBar()
         stop_btn = QPushButton()
-        stop_btn.setIcon(qta.icon("ei.remove"))
-        stop_btn.clicked.connect(lambda: download.cancel())
+        stop_btn.setIcon(icon_cache.get("ei.remove"))
+
+        # Shown once the download is complete
+        verify_btn = QPushButton()
+        verify_btn.setIcon(icon_cache.get("fa6s.shield-halved"))
+        verify_btn.setToolTip(self.tr("Verify checksum"))
+        verify_btn.setVisible(False)
         
         layout.addWidget(label)
 
-        # Bottom layout (progress bar, button)
+        # Bottom layout (progress bar, buttons)
         bottom_layout = QHBoxLayout()
         layout.addLayout(bottom_layout)
 
         bottom_layout.addWidget(progress)
+        bottom_layout.addWidget(verify_btn)
         bottom_layout.addWidget(stop_btn)
 
         container.setLayout(layout)
@@ -306,23 +814,176 @@ class DownloadManager(QMenu):
         widget_action.setDefaultWidget(container)
 
         self.addAction(widget_action)
+        return label, progress, stop_btn, verify_btn, bottom_layout
+
+    def add_download(self, download: QWebEngineDownloadRequest):
+        # Download info
+        download_filename = download.suggestedFileName()
+        url = download.url().toString()
+
+        # Plain HTTP(S) GET downloads are taken over by the resumable download engine.
+        # A form post can't be repeated, so those stay with the web engine
+        method = self.navigation_methods.get(url, "GET")
+        if url.startswith(SUPPORTED_DOWNLOAD_SCHEMES) and method == "GET":
+            headers = {}
+            page = download.page()
+            if page is not None:
+                headers["User-Agent"] = page.profile().httpUserAgent()
+                if page.url().scheme() in ("http", "https"):
+                    headers["Referer"] = page.url().toString(QUrl.UrlFormattingOption.RemoveFragment)
+
+            download.cancel()
+            task = self.engine.add(url, DOWNLOAD_PATH, download_filename, headers)
+            self.add_engine_entry(task)
+            return
+
+        if not os.path.exists(DOWNLOAD_PATH):
+            os.makedirs(DOWNLOAD_PATH)
+
+        download.setDownloadDirectory(DOWNLOAD_PATH)
+        download.setDownloadFileName(download_filename)
+
+        label, progress, stop_btn, verify_btn, _ = self.create_entry(download_filename, self.tr("Downloading:"))
+        stop_btn.clicked.connect(lambda: download.cancel())
         
         # 3. Connect signals to track progress and completion
-        download.receivedBytesChanged.connect(
-            lambda: self.update_progress(download, progress)
-        )
+        progress_key = f"web-{download.id()}"
+        self.track_progress(progress_key, progress, lambda: (download.receivedBytes(), max(0, download.totalBytes())))
         download.isFinishedChanged.connect(
-            lambda: self.download_finished(download, label, progress, stop_btn)
+            lambda: self.download_finished(download, label, progress, stop_btn, verify_btn)
         )
         
         # 4. Start the download
         download.accept()
         self.downloads[download.id()] = download
 
-    def update_progress(self, download, progress_bar):
-        if download.totalBytes() > 0:
-            percent = int((download.receivedBytes() / download.totalBytes()) * 100)
-            progress_bar.setValue(percent)
+    def add_engine_entry(self, task):
+        task_id = task.task_id
+        label, progress, stop_btn, verify_btn, bottom_layout = self.create_entry(task.filename, self.tr("Downloading:"))
+
+        pause_btn = QPushButton()
+        bottom_layout.insertWidget(1, pause_btn)
+
+        pause_btn.clicked.connect(lambda: self.toggle_engine_task(task_id))
+        stop_btn.clicked.connect(lambda: self.engine.cancel(task_id))
+        verify_btn.clicked.connect(lambda: self.request_verification(task_id, task.path, task.url, label, progress))
+
+        self.engine_entries[task_id] = (label, progress, pause_btn, stop_btn, verify_btn)
+        self.update_engine_entry(task_id)
+
+    def toggle_engine_task(self, task_id):
+        task = self.engine.get(task_id)
+        if task is None:
+            return
+
+        if task.state in (STATE_PAUSED, STATE_FAILED):
+            self.engine.resume(task_id)
+        else:
+            self.engine.pause(task_id)
+
+    @pyqtSlot(str)
+    def update_engine_entry(self, task_id):
+        task = self.engine.get(task_id)
+        entry = self.engine_entries.get(task_id)
+        if task is None or entry is None:
+            return
+
+        label, progress, pause_btn, stop_btn, verify_btn = entry
+        short_name = self.short_if_needed(task.filename)
+        state = task.state
+
+        if state == STATE_RUNNING:
+            self.track_progress(task_id, progress, lambda: (task.received_bytes(), task.total_bytes))
+        else:
+            self.untrack_progress(task_id)
+            if task.total_bytes > 0:
+                progress.setValue(int(task.received_bytes() / task.total_bytes * 100))
+
+        progress.setStyleSheet("")
+        progress.setEnabled(True)
+        pause_btn.setEnabled(state in (STATE_QUEUED, STATE_RUNNING, STATE_PAUSED, STATE_FAILED))
+        stop_btn.setEnabled(state in (STATE_QUEUED, STATE_RUNNING, STATE_PAUSED, STATE_FAILED))
+        pause_btn.setIcon(icon_cache.get("fa6s.play" if state in (STATE_PAUSED, STATE_FAILED) else "fa6s.pause"))
+
+        if state == STATE_QUEUED:
+            label.setText(f"{self.tr("Queued:")} {short_name}")
+        elif state == STATE_RUNNING:
+            label.setText(f"{self.tr("Downloading:")} {short_name}")
+        elif state == STATE_PAUSED:
+            label.setText(f"{self.tr("Paused:")} {short_name}")
+        elif state == STATE_COMPLETED:
+            progress.setRange(0, 100)
+            progress.setValue(100)
+            label.setText(f"{self.tr("Finished:")} {short_name}")
+            self.download_completed(task_id, task.path, task.url, label, progress, verify_btn)
+            # The entry keeps what it needs, the queue only holds unfinished downloads
+            self.engine.remove(task_id)
+        elif state == STATE_CANCELLED:
+            label.setText(f"{self.tr("Canceled:")} {short_name}")
+            progress.setEnabled(False)
+            self.engine.remove(task_id)
+        elif state == STATE_FAILED:
+            label.setText(f"{self.tr("Error:")} {short_name}")
+            label.setToolTip(f"{task.filename}\n{task.error}")
+            progress.setStyleSheet("QProgressBar::chunk { background-color: red; }")
+
+    def track_progress(self, key, progress_bar, read_progress):
+        self.progress_bars[key] = progress_bar
+        self.progress_aggregator.track(key, read_progress)
+
+        if not self.progress_timer.isActive():
+            self.progress_timer.start()
+
+    def untrack_progress(self, key):
+        progress_bar = self.progress_bars.pop(key, None)
+        self.progress_aggregator.untrack(key)
+
+        if progress_bar is not None:
+            progress_bar.setRange(0, 100)
+            progress_bar.resetFormat()
+            progress_bar.setToolTip("")
+
+        if not self.progress_aggregator.has_sources():
+            self.progress_timer.stop()
+            self.aggregate_changed.emit("", "")
+
+    def refresh_progress(self):
+        if not self.progress_aggregator.has_sources():
+            return
+
+        samples, aggregate = self.progress_aggregator.sample()
+
+        # Entries are only painted while the menu is open
+        if self.isVisible():
+            for key, sample in samples.items():
+                self.update_progress(self.progress_bars[key], sample)
+
+        if aggregate.percent is None:
+            text = format_bytes(aggregate.received_bytes)
+        else:
+            text = f"{aggregate.percent}%"
+        self.aggregate_changed.emit(text, self.describe_progress(aggregate))
+
+    def describe_progress(self, sample):
+        description = format_bytes(sample.received_bytes)
+        if sample.total_bytes > 0:
+            description = f"{description} / {format_bytes(sample.total_bytes)}"
+
+        description = f"{description}, {format_bytes(sample.rate)}/s"
+        if sample.eta is not None:
+            description = f"{description}, {format_duration(sample.eta)} {self.tr("left")}"
+        return description
+
+    def update_progress(self, progress_bar, sample):
+        if sample.percent is None:
+            # Unknown size, show a busy indicator
+            progress_bar.setRange(0, 0)
+        else:
+            progress_bar.setRange(0, 100)
+            progress_bar.setValue(sample.percent)
+
+        progress_bar.setFormat(f"%p%, {format_bytes(sample.rate)}/s")
+        progress_bar.setToolTip(self.describe_progress(sample))
     
     def short_if_needed(self, download_name):
         if len(download_name) > 15:
@@ -330,14 +991,21 @@ class DownloadManager(QMenu):
         else:
             return download_name
 
-    def download_finished(self, download, label, progress_bar, stop_btn):
+    def download_finished(self, download, label, progress_bar, stop_btn, verify_btn):
         download_filename = download.suggestedFileName()
         state = download.state()
         stop_btn.setEnabled(False)
+        self.untrack_progress(f"web-{download.id()}")
     
         if state == QWebEngineDownloadRequest.DownloadState.DownloadCompleted:
             progress_bar.setValue(100)
             label.setText(f"{self.tr("Finished:")} {self.short_if_needed(download_filename)}")
+
+            key = f"web-{download.id()}"
+            path = os.path.join(download.downloadDirectory(), download.downloadFileName())
+            url = download.url().toString()
+            verify_btn.clicked.connect(lambda: self.request_verification(key, path, url, label, progress_bar))
+            self.download_completed(key, path, url, label, progress_bar, verify_btn)
         
         elif state == QWebEngineDownloadRequest.DownloadState.DownloadCancelled:
             label.setText(f"{self.tr("Canceled:")} {self.short_if_needed(download_filename)}")
@@ -347,30 +1015,227 @@ class DownloadManager(QMenu):
             label.setText(f"{self.tr("Error:")} {self.short_if_needed(download_filename)}")
             progress_bar.setStyleSheet("QProgressBar::chunk { background-color: red; }")
 
+    # Checksum verification
+    def download_completed(self, key, path, url, label, progress_bar, verify_btn):
+        if key in self.verified_keys:
+            return
+        self.verified_keys.add(key)
+        verify_btn.setVisible(True)
+
+        # Only look for published checksums automatically, pasting one is always possible
+        if current_settings["download_verification"] and url.startswith(SUPPORTED_DOWNLOAD_SCHEMES):
+            self.start_verification(key, path, url, None, label, progress_bar)
+
+    def request_verification(self, key, path, url, label, progress_bar):
+        text, ok = QInputDialog.getText(
+            self,
+            self.tr("Verify Download"),
+            self.tr("Paste the published checksum (SHA-256 or BLAKE2).\nLeave empty to look for a checksum file next to the download link."),
+        )
+        if not ok:
+            return
+
+        checksum = None
+        if text.strip():
+            checksum = parse_checksum(text, os.path.basename(path))
+            if checksum is None:
+                QMessageBox.warning(self, self.tr("Verify Download"), self.tr("This is not a SHA-256 or BLAKE2 checksum."))
+                return
+
+        self.start_verification(key, path, url, checksum, label, progress_bar)
+
+    def start_verification(self, key, path, url, checksum, label, progress_bar):
+        previous = self.verifications.get(key)
+        if previous is not None:
+            previous.cancel()
+
+        worker = VerificationWorker(path, url, checksum)
+        self.verifications[key] = worker
+        short_name = self.short_if_needed(os.path.basename(path))
+
+        label.setText(f"{self.tr("Verifying:")} {short_name}")
+        progress_bar.setStyleSheet("")
+        progress_bar.setValue(0)
+
+        worker.signals.progress.connect(progress_bar.setValue)
+        worker.signals.finished.connect(
+            lambda result, detail: self.verification_finished(key, worker, result, detail, short_name, label, progress_bar)
+        )
+        self.verification_pool.start(worker)
+
+    def verification_finished(self, key, worker, result, detail, short_name, label, progress_bar):
+        if self.verifications.get(key) is not worker:
+            return
+        del self.verifications[key]
+
+        progress_bar.setValue(100)
+        label.setToolTip(f"{os.path.basename(worker.path)}\n{detail}" if detail else os.path.basename(worker.path))
+
+        if result == VERIFY_MATCH:
+            label.setText(f"{self.tr("Verified:")} {short_name}")
+            progress_bar.setStyleSheet("QProgressBar::chunk { background-color: green; }")
+        elif result == VERIFY_MISMATCH:
+            label.setText(f"{self.tr("Checksum mismatch:")} {short_name}")
+            progress_bar.setStyleSheet("QProgressBar::chunk { background-color: red; }")
+        elif result == VERIFY_NO_CHECKSUM:
+            label.setText(f"{self.tr("No checksum found:")} {short_name}")
+        elif result == VERIFY_FAILED:
+            label.setText(f"{self.tr("Verification failed:")} {short_name}")
+            progress_bar.setStyleSheet("QProgressBar::chunk { background-color: red; }")
+
+    def cancel_verifications(self):
+        for worker in self.verifications.values():
+            worker.cancel()
+        self.verification_pool.waitForDone(2000)
+
+class BookmarkBar(QWidget):
+    def __init__(self, model, open_url, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.open_url = open_url
+        self.icon_color = "black"
+        self.buttons = {}  # Node id -> button of the bookmarks currently on the bar
+        self.overflow_nodes = []
+        self.relayout_pending = False
+
+        self.bar_layout = QHBoxLayout(self)
+        self.bar_layout.setContentsMargins(5, 0, 5, 5)
+        self.bar_layout.setSpacing(5)
+
+        # The buttons must not widen the window, the bar adapts to its width instead
+        self.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Fixed)
+        self.setMinimumWidth(1)
+
+        # Everything that doesn't fit goes into the chevron menu
+        self.overflow_btn = QPushButton("»")
+        self.overflow_btn.setStyleSheet("padding: 3px;")
+        self.overflow_menu = QMenu(self.overflow_btn)
+        self.overflow_menu.aboutToShow.connect(lambda: self.fill_menu(self.overflow_menu, self.overflow_nodes))
+        self.overflow_btn.setMenu(self.overflow_menu)
+
+        # Changes of any size only cause one relayout per event loop tick
+        model.rowsInserted.connect(self.schedule_relayout)
+        model.rowsRemoved.connect(self.schedule_relayout)
+        model.rowsMoved.connect(self.schedule_relayout)
+        model.dataChanged.connect(self.schedule_relayout)
+        model.modelReset.connect(self.schedule_relayout)
+
+        self.setVisible(bool(model.root.children))
+
+    def set_icon_color(self, color):
+        self.icon_color = color
+        for node_id, button in self.buttons.items():
+            if self.model.nodes[node_id].is_folder:
+                button.setIcon(icon_cache.get("fa6s.folder", color))
+
+    def schedule_relayout(self, *args):
+        if not self.relayout_pending:
+            self.relayout_pending = True
+            QTimer.singleShot(0, self.relayout)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.schedule_relayout()
+
+    def get_button(self, node):
+        button = self.buttons.get(node.node_id)
+
+        if button is None:
+            button = QPushButton(self)
+            button.setStyleSheet("padding: 3px;")
+
+            if node.is_folder:
+                # Folder contents are only turned into menu entries when opened
+                button.setIcon(icon_cache.get("fa6s.folder", self.icon_color))
+                menu = QMenu(button)
+                menu.aboutToShow.connect(lambda: self.fill_menu(menu, node.children))
+                button.setMenu(menu)
+            else:
+                button.clicked.connect(lambda checked: self.open_url(node.url))
+
+            self.buttons[node.node_id] = button
+
+        button.setText(node.name)
+        button.setToolTip(node.url or node.name)
+        return button
+
+    def relayout(self):
+        self.relayout_pending = False
+        nodes = self.model.root.children
+        self.setVisible(bool(nodes))
+
+        if not nodes:
+            return
+
+        # Only create buttons for the bookmarks that fit
+        margins = self.bar_layout.contentsMargins()
+        available = self.width() - margins.left() - margins.right()
+        spacing = self.bar_layout.spacing()
+        chevron_width = self.overflow_btn.sizeHint().width() + spacing
+        used = 0
+        visible = []
+
+        for position, node in enumerate(nodes):
+            button = self.get_button(node)
+            width = button.sizeHint().width()
+            limit = available - (chevron_width if position < len(nodes) - 1 else 0)
+
+            if used + width > limit:
+                break
+            visible.append(button)
+            used += width + spacing
+
+        self.overflow_nodes = nodes[len(visible):]
+        shown_ids = {node.node_id for node in nodes[:len(visible)]}
+
+        # Forget buttons of bookmarks that moved into the overflow menu or were removed
+        for node_id in list(self.buttons):
+            if node_id not in shown_ids:
+                self.buttons.pop(node_id).deleteLater()
+
+        while self.bar_layout.count():
+            self.bar_layout.takeAt(0)
+
+        for button in visible:
+            self.bar_layout.addWidget(button)
+        self.bar_layout.addStretch(1)
+        self.bar_layout.addWidget(self.overflow_btn)
+        self.overflow_btn.setVisible(bool(self.overflow_nodes))
+
+    def fill_menu(self, menu, nodes):
+        menu.clear()
+
+        for node in nodes:
+            if node.is_folder:
+                submenu = menu.addMenu(icon_cache.get("fa6s.folder"), node.name)
+                submenu.aboutToShow.connect(lambda submenu=submenu, node=node: self.fill_menu(submenu, node.children))
+            else:
+                action = menu.addAction(node.name)
+                action.setToolTip(node.url)
+                action.triggered.connect(lambda checked, url=node.url: self.open_url(url))
+
+        if not nodes:
+            menu.addAction(self.tr("(Empty)")).setEnabled(False)
+
 class ManageBookmarksDialog(QDialog):
-    def __init__(self, parent, passed_bookmarks):
+    def __init__(self, parent, model):
         super().__init__(parent)
         self.setWindowTitle(self.tr("Manage Bookmarks"))
-        self.setFixedSize(400, 300)
+        self.resize(560, 420)
 
-        # Temporary copy of bookmarks for editing
-        self.temp_bookmarks = []
-        for name, url in passed_bookmarks.items():
-            self.temp_bookmarks.append({'name':name, 'url':url})
-        
-        # Create a deep copy of the original bookmarks to compare it to the new ones
-        self.bookmarks_reference = copy.deepcopy(self.temp_bookmarks)
+        # Changes go straight into the model, only the edited rows are updated
+        self.model = model
+        self.current_node = None
 
         self.init_ui()
 
         # Select first item if exists
-        if self.list_widget.count() > 0:
-            self.list_widget.setCurrentRow(0)
-    
-    def init_ui(self):
-        self.setWindowTitle("Manage Bookmarks")
-        self.setFixedSize(400, 300)
+        if model.rowCount() > 0:
+            self.tree_view.setCurrentIndex(model.index(0, 0))
+        else:
+            self.load_node_to_inputs(None)
 
+    def init_ui(self):
         layout = QVBoxLayout(self)
         content_layout = QHBoxLayout()
 
@@ -380,26 +1245,45 @@ class ManageBookmarksDialog(QDialog):
         title_label.setStyleSheet("font-size: 20px; font-weight: bold; padding: 20px")
         layout.addWidget(title_label)
 
-        # Left side: Bookmark list
-        self.list_widget = QListWidget()
-        for b in self.temp_bookmarks:
-            self.list_widget.addItem(b['name'])
+        self.search_lineedit = QLineEdit()
+        self.search_lineedit.setPlaceholderText(self.tr("Search bookmarks..."))
+        self.search_lineedit.setClearButtonEnabled(True)
+        self.search_lineedit.textChanged.connect(self.search_bookmarks)
+        layout.addWidget(self.search_lineedit)
+
+        # Left side: Bookmark tree, or the search results while searching
+        self.tree_view = QTreeView()
+        self.tree_view.setModel(self.model)
+        self.tree_view.setHeaderHidden(True)
+        self.tree_view.setUniformRowHeights(True)
+        self.tree_view.selectionModel().currentChanged.connect(
+            lambda current, previous: self.load_node_to_inputs(self.model.node_from_index(current) if current.isValid() else None)
+        )
+        content_layout.addWidget(self.tree_view, 1)
 
-        self.list_widget.currentRowChanged.connect(self.load_bookmark_to_inputs)
-        content_layout.addWidget(self.list_widget, 1)
+        self.results_list = QListWidget()
+        self.results_list.setVisible(False)
+        self.results_list.currentItemChanged.connect(self.select_search_result)
+        content_layout.addWidget(self.results_list, 1)
 
         # Right side: Bookmark actions
         icon_color = self.parent().get_contrast_color_from_theme()
         action_layout = QVBoxLayout()
 
         add_btn = QPushButton(self.tr("Add New"))
-        add_btn.setIcon(qta.icon("fa6s.plus", color=icon_color))
+        add_btn.setIcon(icon_cache.get("fa6s.plus", icon_color))
         add_btn.setIconSize(QSize(16, 16))
         add_btn.clicked.connect(self.add_bookmark)
         action_layout.addWidget(add_btn)
 
+        add_folder_btn = QPushButton(self.tr("Add Folder"))
+        add_folder_btn.setIcon(icon_cache.get("fa6s.folder-plus", icon_color))
+        add_folder_btn.setIconSize(QSize(16, 16))
+        add_folder_btn.clicked.connect(self.add_folder)
+        action_layout.addWidget(add_folder_btn)
+
         delete_btn = QPushButton(self.tr("Delete"))
-        delete_btn.setIcon(qta.icon("fa6s.minus", color=icon_color))
+        delete_btn.setIcon(icon_cache.get("fa6s.minus", icon_color))
         delete_btn.setIconSize(QSize(16, 16))
         delete_btn.clicked.connect(self.delete_bookmark)
         action_layout.addWidget(delete_btn)
@@ -418,10 +1302,13 @@ class ManageBookmarksDialog(QDialog):
         self.url_lineedit.textEdited.connect(self.sync_data_live)
         edit_layout.addRow(self.tr("Bookmark URL: "), self.url_lineedit)
 
-        # Save / Cancel buttons
-        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
-        button_box.accepted.connect(self.accept)
-        button_box.rejected.connect(self.reject)
+        self.folder_combobox = QComboBox()
+        self.folder_combobox.activated.connect(self.move_to_folder)
+        edit_layout.addRow(self.tr("Folder: "), self.folder_combobox)
+
+        # Close button, every change is already saved
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        button_box.rejected.connect(self.accept)
 
         # Assemble layouts
         content_layout.addLayout(action_layout, 0)
@@ -430,95 +1317,184 @@ class ManageBookmarksDialog(QDialog):
         layout.addLayout(edit_layout)
         layout.addWidget(button_box)
         self.setLayout(layout)
-    
-    def load_bookmark_to_inputs(self, row):
+
+    def load_node_to_inputs(self, node):
+        self.current_node = node
+
         # Block signals so setting the text doesn't trigger sync_data_live
         self.name_lineedit.blockSignals(True)
         self.url_lineedit.blockSignals(True)
-        
-        if row >= 0 and row < len(self.temp_bookmarks):
-            bm = self.temp_bookmarks[row]
-            self.name_lineedit.setText(bm['name'])
-            self.url_lineedit.setText(bm['url'])
+
+        if node is not None:
+            self.name_lineedit.setText(node.name)
+            self.url_lineedit.setText(node.url or "")
             self.name_lineedit.setEnabled(True)
-            self.url_lineedit.setEnabled(True)
+            self.url_lineedit.setEnabled(not node.is_folder)
+            self.load_folder_choices(node)
         else:
             self.name_lineedit.clear()
             self.url_lineedit.clear()
             self.name_lineedit.setEnabled(False)
             self.url_lineedit.setEnabled(False)
-            
+            self.folder_combobox.clear()
+
+        self.folder_combobox.setEnabled(node is not None)
         self.name_lineedit.blockSignals(False)
         self.url_lineedit.blockSignals(False)
 
+    def load_folder_choices(self, node):
+        self.folder_combobox.clear()
+        self.folder_combobox.addItem(self.tr("Bookmark bar"), 0)
+
+        for folder in self.model.folders():
+            # A folder can't be moved into itself
+            if not node.is_ancestor_of(folder):
+                self.folder_combobox.addItem(self.model.folder_path(folder), folder.node_id)
+
+        current_id = 0 if node.parent is self.model.root else node.parent.node_id
+        self.folder_combobox.setCurrentIndex(max(0, self.folder_combobox.findData(current_id)))
+
     def sync_data_live(self):
-        row = self.list_widget.currentRow()
-        if row >= 0:
+        node = self.current_node
+        if node is not None:
             new_name = self.name_lineedit.text()
             new_url = self.url_lineedit.text()
-            
-            # Update the temporary data list
-            self.temp_bookmarks[row]['name'] = new_name
-            self.temp_bookmarks[row]['url'] = new_url
-            
-            # Update the list item text live so the user sees the rename
-            self.list_widget.item(row).setText(new_name if new_name else "Untitled")
+
+            # Update the model, views only repaint this row
+            self.model.update_node(node, new_name if new_name else self.tr("Untitled"), new_url)
+
+            if self.results_list.isVisible() and self.results_list.currentItem() is not None:
+                self.results_list.currentItem().setText(node.name)
+
+    def move_to_folder(self, combobox_index):
+        node = self.current_node
+        if node is None:
+            return
+
+        folder_id = self.folder_combobox.itemData(combobox_index)
+        folder = self.model.root if folder_id == 0 else self.model.nodes.get(folder_id)
+
+        if folder is not None and folder is not node.parent and self.model.move_node(node, folder):
+            self.select_node(node)
+
+    def selected_parent(self):
+        # New entries go into the selected folder or next to the selected bookmark
+        node = self.current_node
+        if node is None:
+            return self.model.root, None
+        if node.is_folder:
+            return node, None
+        return node.parent, node.row() + 1
 
     def add_bookmark(self):
-        new_bm = {"name": self.tr("New Bookmark"), "url": "https://"}
-        self.temp_bookmarks.append(new_bm)
-        self.list_widget.addItem(new_bm['name'])
-        self.list_widget.setCurrentRow(self.list_widget.count() - 1)
+        parent_node, row = self.selected_parent()
+        node = self.model.add_bookmark(self.tr("New Bookmark"), "https://", parent_node, row)
+        self.select_node(node)
+
+    def add_folder(self):
+        parent_node, row = self.selected_parent()
+        node = self.model.add_folder(self.tr("New Folder"), parent_node, row)
+        self.select_node(node)
 
     def delete_bookmark(self):
-        row = self.list_widget.currentRow()
-        if row >= 0:
-            self.temp_bookmarks.pop(row)
-            self.list_widget.takeItem(row)
+        node = self.current_node
+        if node is None:
+            return
 
-class InstallWorker(QRunnable):
-    installation_complete = pyqtSignal()
+        if node.is_folder and node.children:
+            answer = QMessageBox.question(
+                self,
+                self.tr("Delete Folder"),
+                f"{self.tr("Delete the folder and its bookmarks?")} ({node.name})"
+            )
+            if answer != QMessageBox.StandardButton.Yes:
+                return
 
-    def __init__(self, model_name):
-        super().__init__()
-        self.model_name = model_name
-    
-    @pyqtSlot()
-    def run(self):
-        print(f"Installing model: {self.model_name}...")
-        ollama.pull(self.model_name)
-        print("Model installation complete.")
-        self.installation_complete.emit()
+        self.model.remove_node(node)
+        if self.results_list.isVisible():
+            self.search_bookmarks(self.search_lineedit.text())
+
+    def select_node(self, node):
+        self.search_lineedit.clear()
+        index = self.model.index_for_node(node)
+        self.tree_view.scrollTo(index)
+        self.tree_view.setCurrentIndex(index)
+        self.load_node_to_inputs(node)
+
+    def search_bookmarks(self, text):
+        searching = bool(text.strip())
+        self.tree_view.setVisible(not searching)
+        self.results_list.setVisible(searching)
+
+        if not searching:
+            current = self.tree_view.currentIndex()
+            self.load_node_to_inputs(self.model.node_from_index(current) if current.isValid() else None)
+            return
+
+        self.results_list.blockSignals(True)
+        self.results_list.clear()
+        for node in self.model.search(text):
+            item = QListWidgetItem(node.name)
+            item.setToolTip(node.url or self.model.folder_path(node))
+            item.setData(Qt.ItemDataRole.UserRole, node.node_id)
+            self.results_list.addItem(item)
+        self.results_list.blockSignals(False)
+
+        if self.results_list.count() > 0:
+            self.results_list.setCurrentRow(0)
+        else:
+            self.load_node_to_inputs(None)
+
+    def select_search_result(self, item, previous):
+        node = self.model.nodes.get(item.data(Qt.ItemDataRole.UserRole)) if item is not None else None
+        self.load_node_to_inputs(node)
 
-class AI_SummarizationWorkerSignals(QObject):
+class ModelManagerSignals(QObject):
+    changed = pyqtSignal(str, str, str)  # Event, model name, detail
+
+class AI_SummarizationWorkerSignals(AIJobSignals):
     chunk_received = pyqtSignal(str)
-    finished = pyqtSignal()
+    partial_received = pyqtSignal(int, int, str)
+    reduce_started = pyqtSignal()
 
-class AI_SummarizationWorker(QRunnable):
-    def __init__(self, text):
-        super().__init__()
+class AI_SummarizationWorker(AIJob):
+    def __init__(self, text, cache_key, priority=PRIORITY_PAGE):
+        super().__init__(cache_key, priority, AI_SummarizationWorkerSignals())
         self.text = text
-        self.signals = AI_SummarizationWorkerSignals()
+        self.cache_key = cache_key
+        self.summary_chunks = []
     
-    @pyqtSlot()
-    def run(self):
+    def chat_stream(self, messages):
+        return ai_backend.chat_stream(SUM_AI_MODEL["name"], messages, self.is_cancelled)
+
+    def execute(self):
+        # The same page may have been summarized while this job was queued
+        cached_summary = summary_cache.get(self.cache_key)
+        if cached_summary is not None:
+            self.signals.chunk_received.emit(cached_summary)
+            return
+
         print("Summarizing page content...")
-        stream = ollama.generate(
-            model=SUM_AI_MODEL["name"],
-            messages=[
-                {"role": "system", "content": ai_system_prompt},
-                {"role": "user", "content": self.text},
-            ],
-            stream=True,
+        summarizer = ChunkedSummarizer(self.chat_stream, ai_system_prompt)
+        summarizer.summarize(
+            self.text,
+            self.handle_summary_chunk,
+            on_partial=self.signals.partial_received.emit,
+            on_reduce_started=self.signals.reduce_started.emit,
+            is_cancelled=self.is_cancelled,
         )
 
-        for chunk in stream:
-            content = chunk['message']['content']
-            self.signals.chunk_received.emit(content)
-        
-        self.signals.finished.emit()
+        # Only complete summaries end up in the cache
+        if not self.is_cancelled() and not summarizer.failed_sections:
+            summary_cache.put(self.cache_key, "".join(self.summary_chunks))
+
+    def handle_summary_chunk(self, content):
+        self.summary_chunks.append(content)
+        self.signals.chunk_received.emit(content)
 
 class AI_Sidebar(QWidget):
+    summary_finished = pyqtSignal()
+
     def __init__(self, parent):
         super().__init__(parent)
         self.setFixedWidth(300)
@@ -527,6 +1503,14 @@ class AI_Sidebar(QWidget):
         self.layout.setSpacing(5)
 
         self.messages = []
+        self.active_job = None  # Job whose output is streaming
+
+        # Streamed chunks are buffered and appended to the document on a frame timer
+        self.pending_chunks = []
+        self.current_message_start = None
+        self.render_timer = QTimer(self)
+        self.render_timer.setInterval(33)
+        self.render_timer.timeout.connect(self.flush_pending_chunks)
 
         self.input_controls_layout = QHBoxLayout()
 
@@ -542,55 +1526,198 @@ class AI_Sidebar(QWidget):
         self.layout.addWidget(self.output_textedit)
 
         self.download_chat_btn = QPushButton(self.tr("Download"))
-        self.download_chat_btn.setIcon(qta.icon("fa6s.download", color=self.parent().get_contrast_color_from_theme()))
+        self.download_chat_btn.setIcon(icon_cache.get("fa6s.download", self.parent().get_contrast_color_from_theme()))
         self.download_chat_btn.clicked.connect(self.download_chat_dlg)
         self.input_controls_layout.addWidget(self.download_chat_btn)
 
         self.clear_btn = QPushButton(self.tr("Clear"))
-        self.clear_btn.setIcon(qta.icon("fa6s.trash", color=self.parent().get_contrast_color_from_theme()))
+        self.clear_btn.setIcon(icon_cache.get("fa6s.trash", self.parent().get_contrast_color_from_theme()))
         self.clear_btn.clicked.connect(self.clear_output)
         self.input_controls_layout.addWidget(self.clear_btn)
 
+        self.stop_btn = QPushButton(self.tr("Stop"))
+        self.stop_btn.setIcon(icon_cache.get("fa6s.stop", self.parent().get_contrast_color_from_theme()))
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop_generation)
+        self.input_controls_layout.addWidget(self.stop_btn)
+
         self.update_output()
 
         self.layout.addLayout(self.input_controls_layout)
         self.setLayout(self.layout)
     
-    def send_webpage(self, prompt):
+    def send_webpage(self, prompt, priority=PRIORITY_PAGE):
         prompt = prompt.strip()
-        self.messages.append({"role": "User", "content": f"[Sum]: {prompt[:400]}..."})
-        self.update_output()
+        user_message = {"role": "User", "content": f"[Sum]: {prompt[:400]}..."}
+        cache_key = make_cache_key(prompt, SUM_AI_MODEL["name"], ai_system_prompt)
 
-        # Start AI worker
-        worker = AI_SummarizationWorker(f"Summarize this text the way your system prompt intended to:\"{prompt}\"")
-        worker.signals.chunk_received.connect(self.handle_chunk)
-        worker.signals.finished.connect(self.summarization_complete)
+        # Replay summaries of pages that were already summarized
+        if not ai_job_queue.is_busy() and self.replay_summary(cache_key, user_message):
+            return
 
-        QThreadPool.globalInstance().start(worker)
+        # Queue AI worker, long pages are summarized in chunks. The job may start and
+        # emit as soon as it is submitted, so it is connected before
+        worker = AI_SummarizationWorker(prompt, cache_key, priority)
+        signals = worker.signals
+        signals.started.connect(lambda: self.start_job_output(worker, user_message))
+        signals.chunk_received.connect(self.handle_chunk)
+        signals.partial_received.connect(self.handle_partial)
+        signals.reduce_started.connect(self.reset_current_message)
+        signals.finished.connect(lambda cancelled: self.summarization_complete(worker, cancelled))
+
+        # Identical requests are coalesced into the already queued job
+        if ai_job_queue.submit(worker) is not worker:
+            for signal in (signals.started, signals.chunk_received, signals.partial_received, signals.reduce_started, signals.finished):
+                signal.disconnect()
+            return
+
+        self.stop_btn.setEnabled(True)
+
+    def replay_summary(self, cache_key, user_message):
+        # Shows a cached summary at once, without a model round-trip
+        cached_summary = summary_cache.get(cache_key)
+        if cached_summary is None:
+            return False
+
+        # Nothing streams from the queue, so there is no job to stop
+        self.start_job_output(None, user_message)
+        self.handle_chunk(cached_summary)
+        self.finish_current_message()
+        self.stop_btn.setEnabled(False)
+        self.summary_finished.emit()
+        return True
+
+    def start_job_output(self, job, user_message):
+        self.active_job = job
+        self.finish_current_message()
+        self.messages.append(user_message)
+        self.append_message(user_message)
+
+    def stop_generation(self):
+        # Stops the summary that is streaming, queued ones start after it
+        if self.active_job is not None:
+            ai_job_queue.cancel(self.active_job)
+        else:
+            ai_job_queue.cancel_all()
     
     def clear_output(self):
+        self.render_timer.stop()
+        self.pending_chunks = []
+        self.current_message_start = None
         self.messages = []
         self.update_output()
     
+    def format_message(self, message):
+        return f"**{message["role"]}:**  {message["content"]}\n\n"
+
     def update_output(self):
+        # Full re-render, only used when the whole conversation changes
         self.output_textedit.clear()
 
         formatted_output = ""
         for message in self.messages:
-            formatted_output += f"**{message["role"]}:**  {message["content"]}\n\n"
+            formatted_output += self.format_message(message)
         
         self.output_textedit.setMarkdown(formatted_output)
+
+    def get_end_cursor(self):
+        cursor = QTextCursor(self.output_textedit.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        return cursor
+
+    def append_message(self, message):
+        # Add a complete message without touching the previous ones
+        cursor = self.get_end_cursor()
+
+        if not self.output_textedit.document().isEmpty():
+            cursor.insertBlock()
+
+        cursor.insertMarkdown(self.format_message(message))
+
+    def start_streamed_message(self, role):
+        cursor = self.get_end_cursor()
+
+        if not self.output_textedit.document().isEmpty():
+            cursor.insertBlock()
+
+        cursor.insertMarkdown(f"**{role}:**  ")
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(" ", QTextCharFormat())
+        self.current_message_start = cursor.position()
     
     def handle_chunk(self, chunk):
-        if self.messages and self.messages[-1]['role'] == "AI":
+        if self.messages and self.messages[-1]['role'] == "AI" and self.current_message_start is not None:
             self.messages[-1]['content'] += chunk
         else:
             self.messages.append({"role": "AI", "content": chunk})
+            self.start_streamed_message("AI")
         
-        self.update_output()
+        self.pending_chunks.append(chunk)
+
+        if not self.render_timer.isActive():
+            self.render_timer.start()
+
+    def handle_partial(self, section, total, notes):
+        # Show section notes while the page is still being read
+        self.handle_chunk(f"{self.tr("Part")} {section}/{total}:\n{notes}\n\n")
+
+    def reset_current_message(self):
+        # Drop the partial notes once the final summary starts streaming
+        if self.current_message_start is None:
+            return
+
+        self.render_timer.stop()
+        self.pending_chunks = []
+        self.messages[-1]["content"] = ""
+
+        cursor = QTextCursor(self.output_textedit.document())
+        cursor.setPosition(self.current_message_start)
+        cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
+
+    def flush_pending_chunks(self):
+        if not self.pending_chunks:
+            self.render_timer.stop()
+            return
+
+        delta = "".join(self.pending_chunks)
+        self.pending_chunks = []
+
+        scrollbar = self.output_textedit.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+
+        # Plain text append of the new tokens only
+        self.get_end_cursor().insertText(delta, QTextCharFormat())
+
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def finish_current_message(self):
+        if self.current_message_start is None:
+            return
+
+        self.render_timer.stop()
+        self.flush_pending_chunks()
+
+        # Re-parse the Markdown of the finished message only
+        cursor = QTextCursor(self.output_textedit.document())
+        cursor.setPosition(self.current_message_start)
+        cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
+        cursor.insertMarkdown(self.messages[-1]["content"])
+
+        self.current_message_start = None
     
-    def summarization_complete(self):
-        self.update_output()
+    def summarization_complete(self, job, cancelled):
+        if job is self.active_job:
+            self.active_job = None
+            if cancelled and self.current_message_start is not None:
+                self.handle_chunk(f" [{self.tr("Stopped")}]")
+            self.finish_current_message()
+
+        # The queue forgets the job in a later slot of the same signal
+        self.stop_btn.setEnabled(ai_job_queue.is_busy(ignore=job))
+        self.summary_finished.emit()
 
     def download_chat_dlg(self):
         chat_content = self.output_textedit.toMarkdown()
@@ -615,6 +1742,286 @@ class AI_Sidebar(QWidget):
         self.output_textedit.setPlaceholderText(self.tr("Summarization output will appear here..."))
         self.download_chat_btn.setText(self.tr("Download"))
         self.clear_btn.setText(self.tr("Clear"))
+        self.stop_btn.setText(self.tr("Stop"))
+
+class ExtensionHostSignals(QObject):
+    message_received = pyqtSignal(str, object)  # app_id, message
+
+class ExtensionPanel(QWidget):
+    # Output of one extension and a line to send it messages, the work runs in the extension's process
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setFixedWidth(300)
+        self.app_id = None
+        self.layout = QVBoxLayout()
+        self.layout.setContentsMargins(5, 5, 5, 5)
+        self.layout.setSpacing(5)
+
+        self.title_label = QLabel()
+        self.title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.title_label.setStyleSheet("font-size: 18px; font-weight: bold; padding: 20px")
+        self.layout.addWidget(self.title_label)
+
+        self.output_textedit = QTextEdit()
+        self.output_textedit.setReadOnly(True)
+        self.output_textedit.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.layout.addWidget(self.output_textedit)
+
+        input_layout = QHBoxLayout()
+        self.message_input = QLineEdit()
+        self.message_input.setPlaceholderText(self.tr("Message to the extension..."))
+        self.message_input.returnPressed.connect(self.send_message)
+        input_layout.addWidget(self.message_input)
+
+        self.send_btn = QPushButton(self.tr("Send"))
+        self.send_btn.clicked.connect(self.send_message)
+        input_layout.addWidget(self.send_btn)
+        self.layout.addLayout(input_layout)
+
+        self.close_btn = QPushButton(self.tr("Close"))
+        self.close_btn.setIcon(icon_cache.get("fa6s.xmark", self.parent().get_contrast_color_from_theme()))
+        self.close_btn.clicked.connect(self.close_extension)
+        self.layout.addWidget(self.close_btn)
+
+        self.setLayout(self.layout)
+
+    def show_extension(self, manifest):
+        if manifest["app_id"] != self.app_id:
+            self.app_id = manifest["app_id"]
+            self.output_textedit.clear()
+        self.title_label.setText(manifest["name"])
+        self.setVisible(True)
+
+    def send_message(self):
+        text = self.message_input.text().strip()
+        if not text or self.app_id is None:
+            return
+        self.message_input.clear()
+        self.output_textedit.append(f"> {text}")
+        self.parent().extension_host.send(self.app_id, text)
+
+    def show_message(self, app_id, message):
+        if app_id != self.app_id:
+            return
+
+        if message.get("type") == "exit":
+            if message.get("code"):
+                self.output_textedit.append(f"{self.tr("The extension stopped with exit code")} {message['code']}")
+        elif "error" in message:
+            self.output_textedit.append(f"{self.tr("Extension error:")} {message['error']}")
+        elif message.get("result") is not None:
+            # append() shows HTML as rich text and anything else as plain text
+            self.output_textedit.append(str(message["result"]))
+
+    def close_extension(self):
+        self.parent().extension_host.stop(self.app_id)
+        self.setVisible(False)
+
+    def retranslate_ui(self):
+        self.message_input.setPlaceholderText(self.tr("Message to the extension..."))
+        self.send_btn.setText(self.tr("Send"))
+        self.close_btn.setText(self.tr("Close"))
+
+class MetricsExporter():
+    # Writes the task manager metrics on one background thread, so a slow disk never
+    # stalls the UI thread. Samples that arrive during a write replace each other
+    def __init__(self, path):
+        self.path = path
+        self.condition = threading.Condition()
+        self.pending = None
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def submit(self, metrics):
+        with self.condition:
+            self.pending = metrics
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                metrics, self.pending = self.pending, None
+
+            try:
+                write_atomic(self.path, json.dumps(metrics))
+            except (OSError, ValueError) as e:
+                print(f"Failed to export the metrics: {e}")
+
+class TaskManagerDialog(QDialog):
+    # Resource usage of extensions and tabs, refreshed by the window's resource timer
+    EXTENSION_COLUMNS = 8
+    TAB_COLUMNS = 4
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.resize(760, 520)
+        self.metrics = None
+
+        layout = QVBoxLayout(self)
+
+        self.title_label = QLabel()
+        self.title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.title_label.setStyleSheet("font-size: 20px; font-weight: bold; padding: 20px")
+        layout.addWidget(self.title_label)
+
+        self.extensions_label = QLabel()
+        layout.addWidget(self.extensions_label)
+
+        self.extensions_table = self.create_table(self.EXTENSION_COLUMNS)
+        self.extensions_table.itemSelectionChanged.connect(self.update_buttons)
+        layout.addWidget(self.extensions_table, 1)
+
+        extension_actions_layout = QHBoxLayout()
+        self.suspend_btn = QPushButton()
+        self.suspend_btn.clicked.connect(lambda: self.act_on_extension(self.parent().extension_host.suspend))
+        extension_actions_layout.addWidget(self.suspend_btn)
+
+        self.resume_btn = QPushButton()
+        self.resume_btn.clicked.connect(lambda: self.act_on_extension(self.parent().extension_host.resume))
+        extension_actions_layout.addWidget(self.resume_btn)
+
+        self.stop_btn = QPushButton()
+        self.stop_btn.clicked.connect(lambda: self.act_on_extension(self.parent().extension_host.stop))
+        extension_actions_layout.addWidget(self.stop_btn)
+        extension_actions_layout.addStretch(1)
+        layout.addLayout(extension_actions_layout)
+
+        self.tabs_label = QLabel()
+        layout.addWidget(self.tabs_label)
+
+        self.tabs_table = self.create_table(self.TAB_COLUMNS)
+        layout.addWidget(self.tabs_table, 1)
+
+        bottom_layout = QHBoxLayout()
+        self.export_btn = QPushButton()
+        self.export_btn.setIcon(icon_cache.get("fa6s.file-export", self.parent().get_contrast_color_from_theme()))
+        self.export_btn.clicked.connect(self.export_metrics)
+        bottom_layout.addWidget(self.export_btn)
+        bottom_layout.addStretch(1)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        button_box.rejected.connect(self.close)
+        bottom_layout.addWidget(button_box)
+        layout.addLayout(bottom_layout)
+
+        self.retranslate_ui()
+        self.update_buttons()
+
+    def create_table(self, columns):
+        table = QTableWidget(0, columns)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        return table
+
+    def set_row(self, table, row, values, data=None):
+        for column, value in enumerate(values):
+            item = table.item(row, column)
+            if item is None:
+                item = QTableWidgetItem()
+                table.setItem(row, column, item)
+            item.setText(value)
+            if column > 0:
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        table.item(row, 0).setData(Qt.ItemDataRole.UserRole, data)
+
+    def update_metrics(self, metrics):
+        self.metrics = metrics
+
+        state_names = {
+            EXTENSION_NOT_STARTED: self.tr("Not started"),
+            EXTENSION_RUNNING: self.tr("Running"),
+            EXTENSION_THROTTLED: self.tr("Throttled"),
+            EXTENSION_SUSPENDED: self.tr("Suspended"),
+            EXTENSION_STOPPED: self.tr("Stopped")
+        }
+
+        # Rows are updated in place, so the selection survives a refresh
+        self.extensions_table.setRowCount(len(metrics["extensions"]))
+        for row, entry in enumerate(metrics["extensions"]):
+            self.set_row(self.extensions_table, row, [
+                entry["name"],
+                state_names[entry["state"]],
+                str(entry["pid"] or ""),
+                f"{entry['cpu_percent']:.1f} %",
+                f"{entry['cpu_time']:.2f} s",
+                f"{entry['callback_time']:.2f} s ({entry['calls']})",
+                format_bytes(entry["memory"]) if entry["memory"] else "",
+                str(entry["queue_depth"])
+            ], entry["app_id"])
+
+        self.tabs_table.setRowCount(len(metrics["tabs"]))
+        for row, entry in enumerate(metrics["tabs"]):
+            self.set_row(self.tabs_table, row, [
+                entry["title"] or entry["url"],
+                str(entry["pid"] or self.tr("Not loaded")),
+                format_bytes(entry["memory"]) if entry["memory"] else "",
+                f"{entry['cpu_percent']:.1f} %"
+            ])
+
+        self.update_buttons()
+
+    def selected_extension(self):
+        row = self.extensions_table.currentRow()
+        if row < 0 or self.metrics is None or row >= len(self.metrics["extensions"]):
+            return None
+        return self.metrics["extensions"][row]
+
+    def update_buttons(self):
+        entry = self.selected_extension()
+        state = entry["state"] if entry is not None else None
+        self.suspend_btn.setEnabled(state in (EXTENSION_RUNNING, EXTENSION_THROTTLED))
+        self.resume_btn.setEnabled(state == EXTENSION_SUSPENDED)
+        self.stop_btn.setEnabled(state in (EXTENSION_RUNNING, EXTENSION_THROTTLED, EXTENSION_SUSPENDED))
+
+    def act_on_extension(self, action):
+        entry = self.selected_extension()
+        if entry is None:
+            return
+        action(entry["app_id"])
+        self.parent().sample_resources()
+
+    def export_metrics(self):
+        if self.metrics is None:
+            return
+
+        path, _ = QFileDialog.getSaveFileName(self, self.tr("Export metrics"), "silk-metrics.json", self.tr("JSON files (*.json)"))
+        if not path:
+            return
+
+        try:
+            write_atomic(path, json.dumps(self.metrics, indent=4))
+        except OSError as e:
+            QMessageBox.warning(self, self.tr("Export failed"), str(e))
+
+    def retranslate_ui(self):
+        self.setWindowTitle(self.tr("Task Manager"))
+        self.title_label.setText(self.tr("Task Manager"))
+        self.extensions_label.setText(self.tr("Extensions"))
+        self.extensions_table.setHorizontalHeaderLabels([
+            self.tr("Extension"),
+            self.tr("State"),
+            self.tr("PID"),
+            self.tr("CPU"),
+            self.tr("CPU time"),
+            self.tr("Callbacks"),
+            self.tr("Memory"),
+            self.tr("Queue")
+        ])
+        self.suspend_btn.setText(self.tr("Suspend"))
+        self.resume_btn.setText(self.tr("Resume"))
+        self.stop_btn.setText(self.tr("Stop"))
+        self.tabs_label.setText(self.tr("Tabs (tabs of one site may share a renderer process)"))
+        self.tabs_table.setHorizontalHeaderLabels([
+            self.tr("Tab"),
+            self.tr("Renderer PID"),
+            self.tr("Memory"),
+            self.tr("CPU")
+        ])
+        self.export_btn.setText(self.tr("Export as JSON..."))
 
 class BrowserWindow(QMainWindow):
     def __init__(self):
@@ -628,24 +2035,101 @@ class BrowserWindow(QMainWindow):
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.layout.setSpacing(0)
 
+        # Global browsing history
+        self.history_store = HistoryStore(HISTORY_PATH)
+        app.aboutToQuit.connect(self.history_store.close)
+
+        # Cookies, storage and HTTP cache shared by all tabs. The profile belongs to
+        # the application, so it outlives the pages of the window
+        self.profile_manager = ProfileManager(current_settings["profile_storage_path"] or PROFILE_PATH, app)
+        self.profile_manager.configure(
+            current_settings["http_cache_type"],
+            current_settings["http_cache_size_mb"],
+            current_settings["persistent_cookies"]
+        )
+        self.profile_manager.profile.downloadRequested.connect(self.request_download)
+        self.init_content_blocker()
+
+        # The download engine and the model manager are only needed by the download
+        # menu and the settings dialog, so they are built the first time those are used
+        self.download_engine = None
+        self.model_manager = None
+        self.first_frame_shown = False
+
         # Initialize whole UI
         self.init_menu_bar()
+        startup_profiler.mark("Menu bar")
         self.init_control_ui()
+        startup_profiler.mark("Control UI")
         self.init_bookmark_bar()
+        startup_profiler.mark("Bookmark bar")
         self.init_ai_sidebar()
+        self.init_extensions()
         self.init_web_engine()
+        startup_profiler.mark("Web engine and first tab")
 
         # Install translator
         self.translator = QTranslator()
         self.load_language(current_settings["language"])
+        startup_profiler.mark("Translations")
 
         # Add main widget
         widget = QWidget()
         widget.setLayout(self.layout)
         self.setCentralWidget(widget)
 
-        if not os.path.exists(START_PAGE_PATH):
+        if not os.path.exists(START_PAGE_PATH) and not HEADLESS:
             QMessageBox.critical(self, self.tr("Start page not found"), self.tr("The Silk Start submodule was not found. Make sure you follow the cloning instructions carefully."))
+
+        self.preload_ai_model()
+
+        # Render the icons of both themes once the window is up
+        QTimer.singleShot(1000, self.prerender_icons)
+        QTimer.singleShot(0, self.load_extensions)
+
+    def prerender_icons(self):
+        icon_cache.prerender(NAV_ICON_NAMES, ("black", "white"))
+
+    def get_download_engine(self):
+        # Resumable downloads, the queue is kept across restarts. Requests carry the
+        # cookies of the profile, so downloads behind a login keep working
+        if self.download_engine is None:
+            self.download_signals = DownloadEngineSignals()
+            self.download_engine = DownloadEngine(
+                DOWNLOAD_QUEUE_PATH,
+                listener=lambda task: self.download_signals.task_changed.emit(task.task_id),
+                cookie_jar=self.profile_manager.cookie_jar
+            )
+            app.aboutToQuit.connect(self.download_engine.shutdown)
+        return self.download_engine
+
+    def get_model_manager(self):
+        # Installed Ollama models, listed and downloaded in the background
+        if self.model_manager is None:
+            self.model_signals = ModelManagerSignals()
+            self.model_signals.changed.connect(self.model_manager_changed)
+            self.model_manager = ModelManager(
+                ai_backend,
+                {SUM_AI_MODEL["name"]: SUM_AI_MODEL["size"]},
+                listener=self.model_signals.changed.emit
+            )
+        return self.model_manager
+
+    def first_frame_painted(self):
+        startup_profiler.mark_once("First frame")
+        # Persisted downloads are resumed once something is on screen
+        QTimer.singleShot(0, self.restore_downloads)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_frame_shown:
+            self.first_frame_shown = True
+            self.first_frame_painted()
+
+    def preload_ai_model(self):
+        # Load the summarization model before the first summary is requested
+        if current_settings["ai_summarization_enabled"] and current_settings["ai_preload_model"]:
+            ai_backend.warm_up(SUM_AI_MODEL["name"])
     
     def init_menu_bar(self):
         # Add menu bar
@@ -656,6 +2140,7 @@ class BrowserWindow(QMainWindow):
         self.viewMenu = menu_bar.addMenu(self.tr("&View"))
         self.bookmarkMenu = menu_bar.addMenu(self.tr("&Bookmarks"))
         self.aiMenu = menu_bar.addMenu(self.tr("&AI Summarization"))
+        self.extensionsMenu = menu_bar.addMenu(self.tr("E&xtensions"))
         self.helpMenu = menu_bar.addMenu(self.tr("&Help"))
 
         self.aiMenu.setEnabled(current_settings["ai_summarization_enabled"])
@@ -702,6 +2187,13 @@ class BrowserWindow(QMainWindow):
         self.scaleDefaultAction.triggered.connect(self.request_scale_page_reset)
         self.viewMenu.addAction(self.scaleDefaultAction)
 
+        self.viewMenu.addSeparator()
+
+        self.taskManagerAction = QAction(self.tr("Task Manager"), self)
+        self.taskManagerAction.triggered.connect(self.open_task_manager)
+        self.taskManagerAction.setShortcut(QKeySequence("Shift+Esc"))
+        self.viewMenu.addAction(self.taskManagerAction)
+
         # Bookmarks Menu
         self.manageBookmarksAction = QAction(self.tr("Manage bookmarks"), self)
         self.manageBookmarksAction.triggered.connect(self.manage_bookmarks_dialog)
@@ -713,6 +2205,10 @@ class BrowserWindow(QMainWindow):
         self.addPageToBookmarksAction.setShortcut(QKeySequence("Ctrl + d"))
         self.bookmarkMenu.addAction(self.addPageToBookmarksAction)
 
+        self.importBookmarksAction = QAction(self.tr("Import bookmarks and history..."), self)
+        self.importBookmarksAction.triggered.connect(self.import_bookmarks_dialog)
+        self.bookmarkMenu.addAction(self.importBookmarksAction)
+
         # AI Summarization Menu
         self.toggleAIsidebarAction = QAction(self.tr("Toggle AI Summarization Sidebar"), self)
         self.toggleAIsidebarAction.triggered.connect(self.toggle_ai_sidebar)
@@ -757,7 +2253,7 @@ class BrowserWindow(QMainWindow):
 
         # Left side: Basic navigation (Back, Forward page)
         self.ai_sidebar_btn = QPushButton()
-        self.ai_sidebar_btn.setIcon(qta.icon("msc.layout-sidebar-left", color=icon_color))
+        self.ai_sidebar_btn.setIcon(icon_cache.get("msc.layout-sidebar-left", icon_color))
         self.ai_sidebar_btn.setProperty("class", "navbtns")
         self.ai_sidebar_btn.setStyleSheet("padding: 8px;")
         self.ai_sidebar_btn.setVisible(current_settings["ai_summarization_enabled"])
@@ -765,21 +2261,21 @@ class BrowserWindow(QMainWindow):
         controls_layout.addWidget(self.ai_sidebar_btn)
 
         self.prev_page_btn = QPushButton()
-        self.prev_page_btn.setIcon(qta.icon("fa6s.arrow-left", color=icon_color))
+        self.prev_page_btn.setIcon(icon_cache.get("fa6s.arrow-left", icon_color))
         self.prev_page_btn.setProperty("class", "navbtns")
         self.prev_page_btn.setStyleSheet("padding: 8px;")
         self.prev_page_btn.clicked.connect(self.request_back_page)
         controls_layout.addWidget(self.prev_page_btn)
 
         self.next_page_btn = QPushButton()
-        self.next_page_btn.setIcon(qta.icon("fa6s.arrow-right", color=icon_color))
+        self.next_page_btn.setIcon(icon_cache.get("fa6s.arrow-right", icon_color))
         self.next_page_btn.setProperty("class", "navbtns")
         self.next_page_btn.setStyleSheet("padding: 8px;")
         self.next_page_btn.clicked.connect(self.request_next_page)
         controls_layout.addWidget(self.next_page_btn)
 
         self.reload_page_btn = QPushButton()
-        self.reload_page_btn.setIcon(qta.icon("fa6s.arrow-rotate-right", color=icon_color))
+        self.reload_page_btn.setIcon(icon_cache.get("fa6s.arrow-rotate-right", icon_color))
         self.reload_page_btn.setProperty("class", "navbtns")
         self.reload_page_btn.setStyleSheet("padding: 8px;")
         self.reload_page_btn.clicked.connect(self.request_reload_stop_page)
@@ -791,11 +2287,19 @@ class BrowserWindow(QMainWindow):
         self.url_bar.setStyleSheet("padding: 8px;")
         self.url_bar.clearFocus()
         self.url_bar.returnPressed.connect(self.request_load_page_from_urlbar)
+        self.url_bar.textEdited.connect(self.update_url_completions)
         controls_layout.addWidget(self.url_bar)
 
+        # History suggestions, filtered and ranked by the history store
+        self.url_completer_model = QStringListModel(self)
+        self.url_completer = QCompleter(self.url_completer_model, self)
+        self.url_completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.url_completer.activated.connect(self.request_load_page)
+        self.url_bar.setCompleter(self.url_completer)
+
         # Right: Everything else
         self.load_btn = QPushButton(self.tr("Go"))
-        self.load_btn.setIcon(qta.icon("mdi.arrow-right-bold-box", color=icon_color))
+        self.load_btn.setIcon(icon_cache.get("mdi.arrow-right-bold-box", icon_color))
         self.load_btn.setProperty("class", "navbtns")
         self.load_btn.setStyleSheet("padding: 8px;")
         self.load_btn.setVisible(current_settings["go_button_visible"])
@@ -803,22 +2307,22 @@ class BrowserWindow(QMainWindow):
         controls_layout.addWidget(self.load_btn)
 
         self.add_tab_btn = QPushButton()
-        self.add_tab_btn.setIcon(qta.icon("fa6s.plus", color=icon_color))
+        self.add_tab_btn.setIcon(icon_cache.get("fa6s.plus", icon_color))
         self.add_tab_btn.setProperty("class", "navbtns")
         self.add_tab_btn.setStyleSheet("padding: 8px;")
         self.add_tab_btn.clicked.connect(self.create_new_tab)
         controls_layout.addWidget(self.add_tab_btn)
 
-        self.download_widget = DownloadManager()
+        self.download_widget = None
         self.downloads_btn = QPushButton()
-        self.downloads_btn.setIcon(qta.icon("ei.download", color=icon_color))
+        self.downloads_btn.setIcon(icon_cache.get("ei.download", icon_color))
         self.downloads_btn.setStyleSheet("padding: 8px;")
         self.downloads_btn.setVisible(False)
         self.downloads_btn.clicked.connect(self.show_download_menu)
         controls_layout.addWidget(self.downloads_btn)
 
         self.ai_summarize_btn = QPushButton()
-        self.ai_summarize_btn.setIcon(qta.icon("ph.sparkle-fill", color=icon_color))
+        self.ai_summarize_btn.setIcon(icon_cache.get("ph.sparkle-fill", icon_color))
         self.ai_summarize_btn.setProperty("class", "navbtns")
         self.ai_summarize_btn.setStyleSheet("padding: 8px;")
         self.ai_summarize_btn.setVisible(current_settings["ai_summarization_enabled"])
@@ -826,14 +2330,14 @@ class BrowserWindow(QMainWindow):
         controls_layout.addWidget(self.ai_summarize_btn)
 
         self.add_to_bookmarks_btn = QPushButton()
-        self.add_to_bookmarks_btn.setIcon(qta.icon("fa5s.bookmark", color=icon_color))
+        self.add_to_bookmarks_btn.setIcon(icon_cache.get("fa5s.bookmark", icon_color))
         self.add_to_bookmarks_btn.setProperty("class", "navbtns")
         self.add_to_bookmarks_btn.setStyleSheet("padding: 8px;")
         self.add_to_bookmarks_btn.clicked.connect(self.add_current_to_bookmarks_dialog)
         controls_layout.addWidget(self.add_to_bookmarks_btn)
 
         self.settings_btn = QPushButton()
-        self.settings_btn.setIcon(qta.icon("fa5s.cog", color=icon_color))
+        self.settings_btn.setIcon(icon_cache.get("fa5s.cog", icon_color))
         self.settings_btn.setProperty("class", "navbtns")
         self.settings_btn.setStyleSheet("padding: 8px;")
         self.settings_btn.clicked.connect(self.settings_dialog)
@@ -847,10 +2351,13 @@ class BrowserWindow(QMainWindow):
         self.page_progressbar.setValue(0)
         bottom_bar_layout.addWidget(self.page_progressbar)
 
+        self.blocked_requests_label = QLabel()
+        bottom_bar_layout.addWidget(self.blocked_requests_label)
+
         bottom_bar_layout.addStretch(1)
 
         self.scale_down_btn = QPushButton()
-        self.scale_down_btn.setIcon(qta.icon("ph.magnifying-glass-minus", color=icon_color))
+        self.scale_down_btn.setIcon(icon_cache.get("ph.magnifying-glass-minus", icon_color))
         self.scale_down_btn.setProperty("class", "navbtns")
         self.scale_down_btn.setStyleSheet("padding: 5px")
         self.scale_down_btn.clicked.connect(self.request_scale_page_down)
@@ -860,7 +2367,7 @@ class BrowserWindow(QMainWindow):
         bottom_bar_layout.addWidget(self.zoom_factor_label)
 
         self.scale_up_btn = QPushButton()
-        self.scale_up_btn.setIcon(qta.icon("ph.magnifying-glass-plus", color=icon_color))
+        self.scale_up_btn.setIcon(icon_cache.get("ph.magnifying-glass-plus", icon_color))
         self.scale_up_btn.setProperty("class", "navbtns")
         self.scale_up_btn.setStyleSheet("padding: 5px")
         self.scale_up_btn.clicked.connect(self.request_scale_page_up)
@@ -893,6 +2400,7 @@ class BrowserWindow(QMainWindow):
         self.viewMenu.setTitle(self.tr("&View"))
         self.bookmarkMenu.setTitle(self.tr("&Bookmarks"))
         self.aiMenu.setTitle(self.tr("&AI Summarization"))
+        self.extensionsMenu.setTitle(self.tr("E&xtensions"))
         self.helpMenu.setTitle(self.tr("&Help"))
 
         # File Menu
@@ -908,6 +2416,7 @@ class BrowserWindow(QMainWindow):
         self.scaleUpAction.setText(self.tr("Increase page zoom by 10%"))
         self.scaleDownAction.setText(self.tr("Decrease page zoom by 10%"))
         self.scaleDefaultAction.setText(self.tr("Set page zoom to 100%"))
+        self.taskManagerAction.setText(self.tr("Task Manager"))
 
         # Bookmarks menu
         self.manageBookmarksAction.setText(self.tr("Manage bookmarks"))
@@ -923,35 +2432,36 @@ class BrowserWindow(QMainWindow):
 
         # Main UI
         self.load_btn.setText(self.tr("Go"))
-        self.ai_sidebar.retranslate_ui()
+        self.update_tab_titles()
+
+        if self.ai_sidebar is not None:
+            self.ai_sidebar.retranslate_ui()
+        if self.extension_panel is not None:
+            self.extension_panel.retranslate_ui()
+        if self.task_manager is not None:
+            self.task_manager.retranslate_ui()
+        if not self.extension_host.extensions:
+            self.update_extensions_menu()
 
     def init_bookmark_bar(self):
-        # Bookmark bar
-        if not current_bookmarks:
-            return
-        
-        bookmarks_layout = QHBoxLayout()
-        bookmarks_layout.setContentsMargins(5, 0, 5, 5)
-        bookmarks_layout.setSpacing(5)
-        self.layout.addLayout(bookmarks_layout, 1, 0)
-
-        # Clear existing bookmarks
-        for i in reversed(range(bookmarks_layout.count())):
-            widget_to_remove = bookmarks_layout.itemAt(i).widget()
-            if widget_to_remove is not None:
-                widget_to_remove.setParent(None)
-
-        bookmark_map = {}
-
-        for name, url in current_bookmarks.items():
-            bookmark_btn = QPushButton(name)
-            bookmark_btn.setStyleSheet("padding: 3px;")
-            bookmark_btn.clicked.connect(lambda checked, url=url: self.request_load_page(url))
-            bookmark_map[name] = bookmark_btn
-            bookmarks_layout.addWidget(bookmark_btn)
-
-        bookmarks_layout.addStretch(1)
-    
+        # Bookmark bar, created once and updated from the bookmark model
+        self.bookmark_model = BookmarkModel(bookmarks_store.data)
+        self.bookmark_bar = BookmarkBar(self.bookmark_model, self.request_load_page)
+        self.bookmark_bar.set_icon_color(self.get_contrast_color_from_theme())
+        self.layout.addWidget(self.bookmark_bar, 1, 0)
+
+        # Coalesce bursts of edits into one save
+        self.bookmarks_save_timer = QTimer(self)
+        self.bookmarks_save_timer.setSingleShot(True)
+        self.bookmarks_save_timer.setInterval(300)
+        self.bookmarks_save_timer.timeout.connect(self.save_bookmarks)
+        self.bookmark_model.bookmarks_changed.connect(self.bookmarks_save_timer.start)
+        app.aboutToQuit.connect(self.save_bookmarks)
+
+    def save_bookmarks(self):
+        self.bookmarks_save_timer.stop()
+        bookmarks_store.replace(self.bookmark_model.to_dict())
+
     # AI sidebar
     def init_ai_sidebar(self):
         # Create middle layout
@@ -960,102 +2470,375 @@ class BrowserWindow(QMainWindow):
         self.middle_layout.setSpacing(0)
         self.layout.addLayout(self.middle_layout, 2, 0)
 
-        # AI Sidebar
-        self.ai_sidebar = AI_Sidebar(self)
-        self.ai_sidebar.setVisible(False)
-        self.middle_layout.addWidget(self.ai_sidebar)
+        # AI Sidebar, created when it is first shown
+        self.ai_sidebar = None
+
+    def get_ai_sidebar(self):
+        if self.ai_sidebar is None:
+            self.ai_sidebar = AI_Sidebar(self)
+            self.ai_sidebar.setVisible(False)
+            self.middle_layout.insertWidget(0, self.ai_sidebar)
+        return self.ai_sidebar
     
     def toggle_ai_sidebar(self):
-        is_visible = self.ai_sidebar.isVisible()
-        self.ai_sidebar.setVisible(not is_visible)
+        ai_sidebar = self.get_ai_sidebar()
+        ai_sidebar.setVisible(not ai_sidebar.isVisible())
     
     def summarize_current_page_ai(self):
         if not current_settings["ai_summarization_enabled"]:
             return
         
-        self.ai_sidebar.setVisible(True)
-        current_page = self.web_tabs.currentWidget()
-        current_page.page().toPlainText(self.ai_sidebar.send_webpage)
+        ai_sidebar = self.get_ai_sidebar()
+        ai_sidebar.setVisible(True)
+        current_page = self.current_web_engine()
+        current_page.page().toPlainText(ai_sidebar.send_webpage)
     
     def summarize_selected_with_ai(self, selected_text):
         if not current_settings["ai_summarization_enabled"]:
             return
         
-        self.ai_sidebar.setVisible(True)
-        self.ai_sidebar.send_webpage(selected_text)
+        ai_sidebar = self.get_ai_sidebar()
+        ai_sidebar.setVisible(True)
+        ai_sidebar.send_webpage(selected_text, PRIORITY_INTERACTIVE)
+
+    # Extensions
+    def init_extensions(self):
+        # Extension scripts run in processes of their own, replies arrive on a reader thread
+        self.extension_signals = ExtensionHostSignals()
+        self.extension_signals.message_received.connect(self.extension_message_received)
+        self.extension_host = ExtensionHost(
+            EXTENSIONS_PATH,
+            EXTENSION_INDEX_PATH,
+            on_message=self.extension_signals.message_received.emit,
+            write_index=write_atomic
+        )
+        self.extension_host.configure_budgets(
+            current_settings["extension_cpu_budget_percent"],
+            current_settings["extension_memory_budget_mb"],
+            current_settings["extension_budget_action"],
+            current_settings["extension_queue_limit"]
+        )
+        app.aboutToQuit.connect(self.extension_host.shutdown)
+
+        # Extension panel, created when an extension is first opened
+        self.extension_panel = None
+
+        # Resource sampling for the budgets and the task manager
+        self.cpu_sampler = CpuSampler()
+        self.task_manager = None
+        self.metrics_exporter = MetricsExporter(METRICS_EXPORT_PATH) if METRICS_EXPORT_PATH else None
+        self.resource_timer = QTimer(self)
+        self.resource_timer.setInterval(RESOURCE_SAMPLE_INTERVAL)
+        self.resource_timer.timeout.connect(self.sample_resources)
+        self.resource_timer.start()
+
+    def load_extensions(self):
+        # Only the cached manifest index is read, no extension code runs before it is opened
+        problems = self.extension_host.scan()
+        for problem in problems:
+            print(f"Extension skipped: {problem}")
+        self.update_extensions_menu()
+
+    def update_extensions_menu(self):
+        self.extensionsMenu.clear()
+
+        if not self.extension_host.extensions:
+            no_extensions_action = self.extensionsMenu.addAction(self.tr("(No extensions)"))
+            no_extensions_action.setEnabled(False)
+            return
+
+        for app_id, manifest in self.extension_host.extensions.items():
+            action = QAction(manifest["name"], self)
+            if manifest["icon_path"] is not None:
+                action.setIcon(QIcon(manifest["icon_path"]))
+            action.setToolTip(manifest["description"])
+            action.triggered.connect(lambda checked, app_id=app_id: self.open_extension(app_id))
+            self.extensionsMenu.addAction(action)
+
+    def get_extension_panel(self):
+        if self.extension_panel is None:
+            self.extension_panel = ExtensionPanel(self)
+            self.extension_panel.setVisible(False)
+            self.middle_layout.addWidget(self.extension_panel)
+        return self.extension_panel
+
+    def open_extension(self, app_id):
+        self.get_extension_panel().show_extension(self.extension_host.extensions[app_id])
+        self.extension_host.open(app_id)
+
+    def extension_message_received(self, app_id, message):
+        if self.extension_panel is not None:
+            self.extension_panel.show_message(app_id, message)
+
+    # Task manager
+    def open_task_manager(self):
+        if self.task_manager is None:
+            self.task_manager = TaskManagerDialog(self)
+        self.task_manager.show()
+        self.task_manager.raise_()
+        self.sample_resources()
+
+    def collect_metrics(self, include_tabs=True):
+        tab_pids = [(tab, tab.render_process_pid()) for tab in self.tab_list] if include_tabs else []
+        browser_pid = os.getpid()
+        cpu_usage = self.cpu_sampler.sample([browser_pid, *self.extension_host.get_pids(), *(pid for _, pid in tab_pids)])
+
+        tabs = []
+        for index, (tab, pid) in enumerate(tab_pids):
+            tabs.append({
+                "index": index,
+                "title": tab.title(),
+                "url": tab.url().toString(),
+                "loaded": tab.is_loaded(),
+                "pid": pid,
+                "memory": get_process_rss(pid) if pid else 0,
+                "cpu_percent": round(cpu_usage.get(pid, 0.0), 1)
+            })
+
+        return {
+            "timestamp": round(time.time(), 3),
+            "version": VERSION_NUMBER,
+            "browser": {
+                "pid": browser_pid,
+                "memory": get_process_rss(browser_pid),
+                "cpu_percent": round(cpu_usage.get(browser_pid, 0.0), 1)
+            },
+            "extensions": self.extension_host.collect_metrics(cpu_usage),
+            "tabs": tabs
+        }
+
+    def sample_resources(self):
+        # Budgets are always enforced, tabs are only measured when someone looks
+        watching = (self.task_manager is not None and self.task_manager.isVisible()) or bool(METRICS_EXPORT_PATH)
+        if not watching and not self.extension_host.get_pids():
+            return
+
+        metrics = self.collect_metrics(include_tabs=watching)
+        for app_id, action in self.extension_host.enforce_budgets(metrics["extensions"]):
+            print(f"Extension \"{app_id}\" exceeded its budget: {action}")
+
+        if self.task_manager is not None and self.task_manager.isVisible():
+            self.task_manager.update_metrics(metrics)
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.submit(metrics)
 
     # Website Tabs
     def init_web_engine(self):
         # Tab bar
         self.tab_list = []
+        self.tab_discarder = TabDiscarder(current_settings["max_loaded_tabs"], current_settings["tab_memory_budget_mb"])
         self.web_tabs = QTabWidget()
         self.web_tabs.setTabsClosable(True)
         self.web_tabs.setIconSize(QSize(16, 16))
         self.web_tabs.setTabShape(QTabWidget.TabShape.Rounded)
-        self.web_tabs.currentChanged.connect(self.update_tab_info)
+        self.web_tabs.currentChanged.connect(self.tab_activated)
         self.web_tabs.tabCloseRequested.connect(self.remove_web_tab)
         self.middle_layout.addWidget(self.web_tabs, 1)
-        
-        # Add start tab
-        self.create_new_tab()
 
-    def update_tab_info(self):
-        self.update_urlbar_content()
-        self.update_nav_btn_status()
-        self.update_tab_titles()
+        # Tabs that changed since the last tab strip refresh
+        self.dirty_tabs = set()
+        self.tab_update_scheduled = False
+
+        # One spinner animation shared by all loading tabs
+        self.tab_loading_icon = qta.icon("mdi.loading", animation=qta.Spin(self.web_tabs))
+
+        # Check the memory budget of background tabs regularly
+        self.tab_discard_timer = QTimer(self)
+        self.tab_discard_timer.setInterval(30000)
+        self.tab_discard_timer.timeout.connect(self.discard_background_tabs)
+        self.tab_discard_timer.start()
+
+        # Snapshot the open tabs regularly, so a crash loses at most a few seconds
+        self.session_dirty = False
+        self.session_timer = QTimer(self)
+        self.session_timer.setInterval(SESSION_SNAPSHOT_INTERVAL)
+        self.session_timer.timeout.connect(self.save_session)
+        self.session_timer.start()
+        app.aboutToQuit.connect(self.save_session)
+
+        # Reopen the tabs of the last session or add a start tab
+        if not current_settings["restore_session"] or not self.restore_session():
+            self.create_new_tab()
+
+    def restore_session(self):
+        tabs = session_store.get("tabs")
+        if not tabs:
+            return False
+
+        # All tabs are added as placeholders, only the current one gets a web engine
+        self.web_tabs.blockSignals(True)
+        for state in tabs:
+            self.create_new_tab(
+                state["url"],
+                background=True,
+                title=state["title"],
+                history_data=decode_history(state["history"]),
+                zoom=state["zoom"]
+            )
+
+        current = min(session_store.get("current", 0), len(tabs) - 1)
+        self.web_tabs.setCurrentIndex(current)
+        self.web_tabs.blockSignals(False)
+
+        self.tab_activated(current)
+        return True
+
+    def save_session(self):
+        if not self.session_dirty:
+            return
+        self.session_dirty = False
+
+        # Unchanged tabs reuse their cached state, the store writes in the background
+        session_store.replace({
+            "version": SESSION_VERSION,
+            "current": max(0, self.web_tabs.currentIndex()),
+            "tabs": [tab.get_session_state() for tab in self.tab_list]
+        })
+
+    def current_web_engine(self):
+        # The visible tab always has a real web engine
+        return self.web_tabs.currentWidget().materialize()
+
+    def tab_activated(self, index):
+        if index < 0:
+            return
+
+        tab = self.web_tabs.widget(index)
+        tab.materialize()
+        self.tab_discarder.touch(tab)
+        self.discard_background_tabs()
+        self.update_tab_info(tab)
+
+    def discard_background_tabs(self):
+        for tab in self.tab_discarder.enforce(self.web_tabs.currentWidget()):
+            self.update_tab_info(tab)
+
+    def update_tab_info(self, tab=None):
+        # Only mark the tab as changed, all changes of one event loop tick
+        # are applied together in flush_tab_updates
+        tab = tab if tab is not None else self.web_tabs.currentWidget()
+        self.dirty_tabs.add(tab)
+        tab.session_state = None
+        self.session_dirty = True
+
+        if not self.tab_update_scheduled:
+            self.tab_update_scheduled = True
+            QTimer.singleShot(0, self.flush_tab_updates)
+
+    def flush_tab_updates(self):
+        dirty_tabs = self.dirty_tabs
+        self.dirty_tabs = set()
+        self.tab_update_scheduled = False
+
+        for tab in dirty_tabs:
+            tab_index = self.web_tabs.indexOf(tab)
+            if tab_index >= 0:
+                self.update_tab_title(tab_index)
+
+        if self.web_tabs.currentWidget() in dirty_tabs:
+            self.update_urlbar_content()
+            self.update_nav_btn_status()
+            self.update_zoom_label()
+            self.update_blocked_requests_label()
     
-    def create_new_tab(self, url=None):
-        # Web Engine
-        new_tab_index = len(self.tab_list)
-        self.tab_list.append(BetterWebEngine(self))
-        
-        if url:
-            self.tab_list[new_tab_index].setUrl(QUrl(url))
-
-        self.tab_list[new_tab_index].loadProgress.connect(self.update_progressbar)
-        self.tab_list[new_tab_index].loadFinished.connect(self.page_load_finished)
-        self.tab_list[new_tab_index].loadFinished.connect(self.tab_list[new_tab_index].page_load_finished)
-        self.tab_list[new_tab_index].loadStarted.connect(self.page_load_started)
-        self.tab_list[new_tab_index].urlChanged.connect(self.update_urlbar_content)
-        self.tab_list[new_tab_index].iconChanged.connect(self.update_tab_info)
-        self.tab_list[new_tab_index].page().profile().downloadRequested.connect(self.request_download)
-        self.tab_list[new_tab_index].signals.sum_selected_with_ai.connect(self.summarize_selected_with_ai)
-        self.tab_list[new_tab_index].signals.sum_page_with_ai.connect(self.summarize_current_page_ai)
-
-        self.web_tabs.addTab(self.tab_list[new_tab_index], None)
-        self.web_tabs.setCurrentIndex(new_tab_index)
-        self.update_tab_info()
+    def create_new_tab(self, url=None, background=False, title="", history_data=None, zoom=1.0):
+        # Tabs start as placeholders, the web engine is created on first activation
+        tab = WebTab(self, url if url else None, title, history_data=history_data, zoom=zoom)
+        self.tab_list.append(tab)
+        self.tab_discarder.touch(tab)
+
+        new_tab_index = self.web_tabs.addTab(tab, None)
+
+        if not background:
+            self.web_tabs.setCurrentIndex(new_tab_index)
+
+        self.update_tab_info(tab)
+        return tab
+
+    def connect_web_engine(self, web_engine, tab):
+        web_engine.loadProgress.connect(lambda prog: self.update_progressbar(prog, tab))
+        web_engine.loadFinished.connect(web_engine.page_load_finished)
+        web_engine.loadFinished.connect(lambda ok: self.page_load_finished(tab))
+        web_engine.loadStarted.connect(lambda: self.page_load_started(tab))
+        web_engine.urlChanged.connect(lambda url: self.update_tab_info(tab))
+        # title() still belongs to the previous page when the url changes, the new
+        # title is filled in once it is known or at the latest when the load finishes
+        web_engine.urlChanged.connect(lambda url: self.history_store.add_visit(url.toString()))
+        web_engine.titleChanged.connect(lambda title: self.record_history_title(web_engine))
+        web_engine.loadFinished.connect(lambda ok: self.record_history_title(web_engine))
+        web_engine.titleChanged.connect(lambda title: self.update_tab_info(tab))
+        web_engine.iconChanged.connect(lambda icon: self.update_tab_info(tab))
+        web_engine.signals.sum_selected_with_ai.connect(self.summarize_selected_with_ai)
+        web_engine.signals.sum_page_with_ai.connect(self.summarize_current_page_ai)
     
+    def record_history_title(self, web_engine):
+        # Pages without a <title> report their url as title
+        url = web_engine.url().toString()
+        title = web_engine.title()
+        if title != url:
+            self.history_store.update_title(url, title)
+
     def remove_web_tab(self, index):
         tab_amount = self.web_tabs.count()
         if index >= 0 and tab_amount > 1:
+            tab = self.tab_list[index]
             self.web_tabs.removeTab(index)
-            self.tab_list[index].deleteLater()
+            self.tab_discarder.forget(tab)
+            self.dirty_tabs.discard(tab)
+            tab.deleteLater()
             del self.tab_list[index]
             
             self.update_tab_info()
     
     def update_tab_titles(self):
         for tab_index in range(self.web_tabs.count()):
-            web_engine = self.tab_list[tab_index]
-            title = web_engine.title() if web_engine.title() else self.tr("New Tab")
-            self.web_tabs.setTabText(tab_index, f"{" "*3}{title[:10]+"..." if len(title) > 10 else title}{" "*3}")
+            self.update_tab_title(tab_index)
+
+    def update_tab_title(self, tab_index):
+        web_engine = self.tab_list[tab_index]
+        title = web_engine.title() if web_engine.title() else self.tr("New Tab")
+        self.web_tabs.setTabText(tab_index, f"{" "*3}{title[:10]+"..." if len(title) > 10 else title}{" "*3}")
+        if web_engine.blocked_requests:
+            self.web_tabs.setTabToolTip(tab_index, f"{web_engine.title()}\n{self.tr("Blocked requests:")} {web_engine.blocked_requests}")
+        else:
             self.web_tabs.setTabToolTip(tab_index, web_engine.title())
 
-            if web_engine.iconUrl().isEmpty():
-                self.web_tabs.setTabIcon(tab_index, QIcon())
+        if web_engine.iconUrl().isEmpty():
+            self.web_tabs.setTabIcon(tab_index, QIcon())
 
-            elif web_engine.icon().isNull():
-                animation = qta.Spin(self.web_tabs)
-                self.web_tabs.setTabIcon(tab_index, qta.icon("mdi.loading", animation=animation))
+        elif web_engine.is_loaded() and web_engine.icon().isNull():
+            self.web_tabs.setTabIcon(tab_index, self.tab_loading_icon)
 
-            else:
-                self.web_tabs.setTabIcon(tab_index, QIcon(web_engine.icon()))
+        else:
+            self.web_tabs.setTabIcon(tab_index, QIcon(web_engine.icon()))
 
     # Download System
+    def get_download_manager(self):
+        # The download menu is only built once something is downloaded
+        if self.download_widget is None:
+            self.download_widget = DownloadManager(self.get_download_engine(), self.download_signals, self.content_blocker.navigation_methods)
+            self.download_widget.aggregate_changed.connect(self.update_downloads_btn)
+            app.aboutToQuit.connect(self.download_widget.cancel_verifications)
+        return self.download_widget
+
+    def update_downloads_btn(self, text, tooltip):
+        self.downloads_btn.setText(text)
+        self.downloads_btn.setToolTip(tooltip)
+
+    def restore_downloads(self):
+        # Continue the downloads that were unfinished when the browser was closed
+        tasks = self.get_download_engine().unfinished_tasks()
+        if not tasks:
+            return
+
+        for task in tasks:
+            self.get_download_manager().add_engine_entry(task)
+        self.downloads_btn.setVisible(True)
+        self.download_engine.start_pending()
+
     def show_download_menu(self):
         button_pos = self.downloads_btn.mapToGlobal(self.downloads_btn.rect().bottomLeft())
-        self.download_widget.exec(button_pos)
+        self.get_download_manager().exec(button_pos)
     
     def request_download(self, download):
         if current_settings["download_warnings"]:
@@ -1066,87 +2849,133 @@ class BrowserWindow(QMainWindow):
             warning_dlg.setIcon(QMessageBox.Icon.Warning)
 
             if warning_dlg.exec() == QMessageBox.StandardButton.Ok:
-                self.download_widget.add_download(download)
+                self.get_download_manager().add_download(download)
                 self.downloads_btn.setVisible(True)
                 self.show_download_menu()
     
         else:
-            self.download_widget.add_download(download)
+            self.get_download_manager().add_download(download)
             self.downloads_btn.setVisible(True)
-            self.show_download_menu()
+            # The menu runs its own event loop until it is closed
+            if not HEADLESS:
+                self.show_download_menu()
 
     # Website content specific functions
     def request_load_page_from_urlbar(self):
         url = self.url_bar.text()
-        self.web_tabs.currentWidget().load_page(url)
+        self.current_web_engine().load_page(url)
+
+    def update_url_completions(self, text):
+        results = self.history_store.search(text) if text.strip() else []
+        self.url_completer_model.setStringList([url for url, title in results])
 
     def update_urlbar_content(self):
-        current_url = self.web_tabs.currentWidget().url().toString()
+        current_url = self.current_web_engine().url().toString()
         self.url_bar.setText(current_url)
     
-    def update_progressbar(self, prog):
-        if self.web_tabs.currentWidget() == self.tab_list[self.web_tabs.currentIndex()]:
+    def update_progressbar(self, prog, tab=None):
+        if tab is None or tab is self.web_tabs.currentWidget():
             self.page_progressbar.setVisible(True)
             self.page_progressbar.setValue(prog)
 
-    def page_load_finished(self):
-        self.web_tabs.currentWidget().page_is_loading = False
-        self.page_progressbar.setVisible(False)
-        self.update_tab_info()
+    def page_load_finished(self, tab):
+        startup_profiler.mark_once("First page load")
+
+        if tab is self.web_tabs.currentWidget():
+            self.page_progressbar.setVisible(False)
+        self.update_tab_info(tab)
     
-    def page_load_started(self):
-        self.update_progressbar(0)
-        self.update_tab_info()
+    def page_load_started(self, tab):
+        tab.blocked_requests = 0
+        self.update_progressbar(0, tab)
+        self.update_tab_info(tab)
 
     def update_nav_btn_status(self):
         # Enable / Disable back and forward buttons
-        self.prev_page_btn.setEnabled(self.web_tabs.currentWidget().history().canGoBack())
-        self.next_page_btn.setEnabled(self.web_tabs.currentWidget().history().canGoForward())
+        self.prev_page_btn.setEnabled(self.current_web_engine().history().canGoBack())
+        self.next_page_btn.setEnabled(self.current_web_engine().history().canGoForward())
 
         # Update reload / stop button
         icon_color = self.get_contrast_color_from_theme()
 
-        if self.web_tabs.currentWidget().page_is_loading:
-            self.reload_page_btn.setIcon(qta.icon("ei.remove", color=icon_color))
+        if self.current_web_engine().page_is_loading:
+            self.reload_page_btn.setIcon(icon_cache.get("ei.remove", icon_color))
         else:
-            self.reload_page_btn.setIcon(qta.icon("fa6s.arrow-rotate-right", color=icon_color))
+            self.reload_page_btn.setIcon(icon_cache.get("fa6s.arrow-rotate-right", icon_color))
     
     # Website navigation
     def request_back_page(self):
-        self.web_tabs.currentWidget().history().back()
+        self.current_web_engine().history().back()
         self.update_tab_info()
 
     def request_next_page(self):
-        self.web_tabs.currentWidget().history().forward()
+        self.current_web_engine().history().forward()
         self.update_tab_info()
     
     def request_reload_stop_page(self):
-        if self.web_tabs.currentWidget().page_is_loading:
-            self.web_tabs.currentWidget().stop_page()
+        if self.current_web_engine().page_is_loading:
+            self.current_web_engine().stop_page()
         else:
-            self.web_tabs.currentWidget().reload_page()
+            self.current_web_engine().reload_page()
         
         self.update_tab_info()
 
     def request_load_page(self, url):
-        self.web_tabs.currentWidget().load_page(url)
+        self.current_web_engine().load_page(url)
     
     # Scaling
     def request_scale_page_up(self):
-        self.web_tabs.currentWidget().scale_page_up()
-        zoom_string = str(round(self.web_tabs.currentWidget().zoomFactor() * 100)) + "%"
-        self.zoom_factor_label.setText(zoom_string)
+        self.current_web_engine().scale_page_up()
+        self.update_tab_info()
     
     def request_scale_page_down(self):
-        self.web_tabs.currentWidget().scale_page_down()
-        zoom_string = str(round(self.web_tabs.currentWidget().zoomFactor() * 100)) + "%"
-        self.zoom_factor_label.setText(zoom_string)
+        self.current_web_engine().scale_page_down()
+        self.update_tab_info()
     
     def request_scale_page_reset(self):
-        self.web_tabs.currentWidget().scale_page_reset()
-        zoom_string = str(round(self.web_tabs.currentWidget().zoomFactor() * 100)) + "%"
-        self.zoom_factor_label.setText(zoom_string)
+        self.current_web_engine().scale_page_reset()
+        self.update_tab_info()
     
+    # Content blocking
+    def init_content_blocker(self):
+        # Ad and tracker requests of all tabs, the lists are compiled in the background
+        self.content_blocker = ContentBlockInterceptor(self.profile_manager)
+        self.profile_manager.profile.setUrlRequestInterceptor(self.content_blocker)
+        self.filter_list_worker = None
+
+        if current_settings["content_blocking"]:
+            QTimer.singleShot(0, self.load_filter_lists)
+
+    def load_filter_lists(self, download=False):
+        if self.filter_list_worker is not None:
+            return
+
+        self.filter_list_worker = FilterListWorker(download)
+        self.filter_list_worker.signals.finished.connect(self.filter_lists_loaded)
+        QThreadPool.globalInstance().start(self.filter_list_worker)
+
+    def filter_lists_loaded(self, filter_set, problems):
+        self.filter_list_worker = None
+        if problems:
+            print(f"Problems with the filter lists: {problems}")
+
+        if filter_set is not None and current_settings["content_blocking"]:
+            self.content_blocker.filter_set = filter_set
+            print(f"Content blocking enabled with {filter_set.rule_count()} rules")
+
+    def count_blocked_request(self, tab):
+        tab.blocked_requests += 1
+        if tab is self.web_tabs.currentWidget():
+            self.update_blocked_requests_label()
+
+    def update_blocked_requests_label(self):
+        count = self.web_tabs.currentWidget().blocked_requests
+        self.blocked_requests_label.setText(f"{self.tr("Blocked:")} {count}" if count else "")
+
+    def update_zoom_label(self):
+        zoom_string = str(round(self.current_web_engine().zoomFactor() * 100)) + "%"
+        self.zoom_factor_label.setText(zoom_string)
+
     # Theme specific functions
     def get_contrast_color_from_theme(self):
         if theme_manager.get_plain_theme() == "light":
@@ -1157,22 +2986,23 @@ class BrowserWindow(QMainWindow):
     def update_icon_colors(self):
         icon_color = self.get_contrast_color_from_theme()
 
-        self.ai_sidebar_btn.setIcon(qta.icon("msc.layout-sidebar-left", color=icon_color))
-        self.prev_page_btn.setIcon(qta.icon("fa6s.arrow-left", color=icon_color))
-        self.next_page_btn.setIcon(qta.icon("fa6s.arrow-right", color=icon_color))
+        self.ai_sidebar_btn.setIcon(icon_cache.get("msc.layout-sidebar-left", icon_color))
+        self.prev_page_btn.setIcon(icon_cache.get("fa6s.arrow-left", icon_color))
+        self.next_page_btn.setIcon(icon_cache.get("fa6s.arrow-right", icon_color))
 
-        if self.web_tabs.currentWidget().page_is_loading:
-            self.reload_page_btn.setIcon(qta.icon("ei.remove", color=icon_color))
+        if self.current_web_engine().page_is_loading:
+            self.reload_page_btn.setIcon(icon_cache.get("ei.remove", icon_color))
         else:
-            self.reload_page_btn.setIcon(qta.icon("fa6s.arrow-rotate-right", color=icon_color))
+            self.reload_page_btn.setIcon(icon_cache.get("fa6s.arrow-rotate-right", icon_color))
         
-        self.load_btn.setIcon(qta.icon("mdi.arrow-right-bold-box", color=icon_color))
-        self.add_tab_btn.setIcon(qta.icon("fa6s.plus", color=icon_color))
-        self.ai_summarize_btn.setIcon(qta.icon("ph.sparkle-fill", color=icon_color))
-        self.add_to_bookmarks_btn.setIcon(qta.icon("fa5s.bookmark", color=icon_color))
-        self.settings_btn.setIcon(qta.icon("fa5s.cog", color=icon_color))
-        self.scale_down_btn.setIcon(qta.icon("ph.magnifying-glass-minus", color=icon_color))
-        self.scale_up_btn.setIcon(qta.icon("ph.magnifying-glass-plus", color=icon_color))
+        self.load_btn.setIcon(icon_cache.get("mdi.arrow-right-bold-box", icon_color))
+        self.add_tab_btn.setIcon(icon_cache.get("fa6s.plus", icon_color))
+        self.ai_summarize_btn.setIcon(icon_cache.get("ph.sparkle-fill", icon_color))
+        self.add_to_bookmarks_btn.setIcon(icon_cache.get("fa5s.bookmark", icon_color))
+        self.settings_btn.setIcon(icon_cache.get("fa5s.cog", icon_color))
+        self.scale_down_btn.setIcon(icon_cache.get("ph.magnifying-glass-minus", icon_color))
+        self.scale_up_btn.setIcon(icon_cache.get("ph.magnifying-glass-plus", icon_color))
+        self.bookmark_bar.set_icon_color(icon_color)
 
     # Dialogs
     def add_current_to_bookmarks_dialog(self):
@@ -1189,12 +3019,12 @@ class BrowserWindow(QMainWindow):
         form_layout.addRow(title_label)
 
         name_lineedit = QLineEdit()
-        name_lineedit.setText(self.web_tabs.currentWidget().title())
+        name_lineedit.setText(self.current_web_engine().title())
         name_lineedit.setMinimumWidth(200)
         form_layout.addRow(self.tr("Bookmark name: "), name_lineedit)
 
         url_lineedit = QLineEdit()
-        url_lineedit.setText(self.web_tabs.currentWidget().url().toString())
+        url_lineedit.setText(self.current_web_engine().url().toString())
         url_lineedit.setMinimumWidth(200)
         form_layout.addRow(self.tr("Bookmark URL: "), url_lineedit)
 
@@ -1211,36 +3041,68 @@ class BrowserWindow(QMainWindow):
             bookmark_name = name_lineedit.text()
             bookmark_url = url_lineedit.text()
 
-            current_bookmarks[bookmark_name] = bookmark_url
-
-            with open(CONFIG_PATH, "w") as f:
-                json.dump(current_settings, f, indent=4)
-            
-            self.init_bookmark_bar()
+            self.bookmark_model.add_bookmark(bookmark_name, bookmark_url)
     
     def manage_bookmarks_dialog(self):
-        global current_bookmarks
-        dlg = ManageBookmarksDialog(self, current_bookmarks)
+        dlg = ManageBookmarksDialog(self, self.bookmark_model)
+        dlg.exec()
 
-        if dlg.exec():
-            if dlg.temp_bookmarks == dlg.bookmarks_reference:
-                return
-            
-            QMessageBox.information(self, self.tr("Changed bookmarks"), self.tr("Bookmarks will refresh correctly after the program is restarted."))
+    def import_bookmarks_dialog(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            self.tr("Import Bookmarks"),
+            os.path.expanduser("~"),
+            self.tr("Bookmark files (*.html *.htm Bookmarks places.sqlite);;All files (*)")
+        )
+        if not path:
+            return
 
-            updated_bookmarks = {b['name']: b['url'] for b in dlg.temp_bookmarks}
-        
-            current_bookmarks = updated_bookmarks
-        
-            # Save to file
-            with open(BOOKMARKS_PATH, "w") as f:
-                json.dump(updated_bookmarks, f, indent=4)
-        
-            self.init_bookmark_bar()
-    
-    def settings_dialog(self):
-        global current_settings
+        source_format = detect_format(path)
+        if source_format is None:
+            QMessageBox.warning(self, self.tr("Import Bookmarks"), self.tr("This is not a bookmark HTML file, a Chromium \"Bookmarks\" file or a Firefox places.sqlite database."))
+            return
+
+        # Parsing and the history writes happen in a worker, the dialog only shows progress
+        progress_dlg = QProgressDialog(self.tr("Importing bookmarks and history..."), self.tr("Cancel"), 0, 0, self)
+        progress_dlg.setWindowTitle(self.tr("Import Bookmarks"))
+        progress_dlg.setMinimumDuration(300)
+
+        worker = ImportWorker(path, self.history_store)
+        worker.signals.progress.connect(lambda done, total: self.update_import_progress(progress_dlg, done, total))
+        worker.signals.finished.connect(lambda result: self.import_finished(progress_dlg, result))
+        worker.signals.failed.connect(lambda error: self.import_failed(progress_dlg, error))
+        progress_dlg.canceled.connect(worker.cancel)
+
+        self.import_worker = worker  # The signals object has to outlive run()
+        QThreadPool.globalInstance().start(worker)
 
+    def update_import_progress(self, progress_dlg, done, total):
+        # QProgressDialog works with ints, large files report in KB
+        scale = 1024 if total > 2 ** 30 else 1
+        progress_dlg.setMaximum(max(1, total // scale))
+        progress_dlg.setValue(min(done, total) // scale)
+
+    def import_finished(self, progress_dlg, result):
+        progress_dlg.reset()
+        self.import_worker = None
+
+        # Everything goes into one folder, a single row insertion for the views
+        if result.bookmarks:
+            folder_name = f"{self.tr("Imported from")} {FORMAT_NAMES[result.source_format]}"
+            self.bookmark_model.add_nodes([{"name": folder_name, "children": result.bookmarks}])
+
+        QMessageBox.information(
+            self,
+            self.tr("Import Bookmarks"),
+            f"{self.tr("Imported bookmarks:")} {result.bookmark_count}\n{self.tr("Imported history entries:")} {result.history_count}"
+        )
+
+    def import_failed(self, progress_dlg, error):
+        progress_dlg.reset()
+        self.import_worker = None
+        QMessageBox.critical(self, self.tr("Import Bookmarks"), f"{self.tr("The import failed:")} {error}")
+
+    def settings_dialog(self):
         dlg = QDialog(self)
         dlg.setWindowTitle(self.tr("Settings"))
         dlg.setFixedSize(480, 360)
@@ -1289,6 +3151,10 @@ class BrowserWindow(QMainWindow):
         search_engine_combobox.setCurrentText(current_settings["search_engine"])
         general_settings_layout.addRow(self.tr("Search engine: "), search_engine_combobox)
 
+        restore_session_checkbox = QCheckBox()
+        restore_session_checkbox.setChecked(current_settings["restore_session"])
+        general_settings_layout.addRow(self.tr("Reopen tabs from last session: "), restore_session_checkbox)
+
         # Display settings
         display_settings = QWidget()
         display_settings_layout = QFormLayout()
@@ -1316,6 +3182,18 @@ class BrowserWindow(QMainWindow):
         download_warnings_checkbox.setChecked(current_settings["download_warnings"])
         security_settings_layout.addRow(self.tr("Display warning when download is requested: "), download_warnings_checkbox)
 
+        download_verification_checkbox = QCheckBox()
+        download_verification_checkbox.setChecked(current_settings["download_verification"])
+        security_settings_layout.addRow(self.tr("Verify downloads with published checksums: "), download_verification_checkbox)
+
+        content_blocking_checkbox = QCheckBox()
+        content_blocking_checkbox.setChecked(current_settings["content_blocking"])
+        security_settings_layout.addRow(self.tr("Block ads and trackers: "), content_blocking_checkbox)
+
+        update_filter_lists_btn = QPushButton(self.tr("Update filter lists"))
+        update_filter_lists_btn.clicked.connect(lambda: self.load_filter_lists(download=True))
+        security_settings_layout.addRow(self.tr("Filter lists: "), update_filter_lists_btn)
+
         # Language Settings
         language_settings = QWidget()
         language_settings_layout = QFormLayout()
@@ -1348,48 +3226,252 @@ class BrowserWindow(QMainWindow):
         scrollbars_enabled_checkbox.setChecked(current_settings["scrollbars_enabled"])
         engine_settings_layout.addRow(self.tr("Scrollbars enabled: "), scrollbars_enabled_checkbox)
 
+        max_loaded_tabs_spinbox = QSpinBox()
+        max_loaded_tabs_spinbox.setRange(0, 200)
+        max_loaded_tabs_spinbox.setSpecialValueText(self.tr("Unlimited"))
+        max_loaded_tabs_spinbox.setValue(current_settings["max_loaded_tabs"])
+        engine_settings_layout.addRow(self.tr("Max. loaded tabs: "), max_loaded_tabs_spinbox)
+
+        tab_memory_budget_spinbox = QSpinBox()
+        tab_memory_budget_spinbox.setRange(0, 65536)
+        tab_memory_budget_spinbox.setSingleStep(256)
+        tab_memory_budget_spinbox.setSuffix(" MB")
+        tab_memory_budget_spinbox.setSpecialValueText(self.tr("Unlimited"))
+        tab_memory_budget_spinbox.setValue(current_settings["tab_memory_budget_mb"])
+        engine_settings_layout.addRow(self.tr("Tab memory budget: "), tab_memory_budget_spinbox)
+
+        http_cache_type_combobox = QComboBox()
+        http_cache_type_combobox.addItem(self.tr("Disk"), "Disk")
+        http_cache_type_combobox.addItem(self.tr("Memory"), "Memory")
+        http_cache_type_combobox.addItem(self.tr("None"), "None")
+        http_cache_type_combobox.setCurrentIndex(http_cache_type_combobox.findData(current_settings["http_cache_type"]))
+        engine_settings_layout.addRow(self.tr("HTTP cache: "), http_cache_type_combobox)
+
+        http_cache_size_spinbox = QSpinBox()
+        http_cache_size_spinbox.setRange(0, MAX_CACHE_SIZE_MB)
+        http_cache_size_spinbox.setSingleStep(128)
+        http_cache_size_spinbox.setSuffix(" MB")
+        http_cache_size_spinbox.setSpecialValueText(self.tr("Automatic"))
+        http_cache_size_spinbox.setValue(current_settings["http_cache_size_mb"])
+        engine_settings_layout.addRow(self.tr("HTTP cache size limit: "), http_cache_size_spinbox)
+
+        # Measured in the background, the label is filled in when the result arrives
+        cache_usage_label = QLabel(self.tr("Calculating..."))
+        clear_cache_btn = QPushButton(self.tr("Clear cache"))
+        clear_cache_btn.clicked.connect(self.profile_manager.clear_cache)
+
+        cache_usage_layout = QHBoxLayout()
+        cache_usage_layout.addWidget(cache_usage_label, 1)
+        cache_usage_layout.addWidget(clear_cache_btn)
+        engine_settings_layout.addRow(self.tr("Cache usage: "), cache_usage_layout)
+
+        def update_cache_usage(size):
+            cache_usage_label.setText(format_bytes(size))
+
+        self.profile_manager.cache_usage_changed.connect(update_cache_usage)
+        self.profile_manager.measure_cache_usage()
+
+        persistent_cookies_combobox = QComboBox()
+        persistent_cookies_combobox.addItem(self.tr("Keep persistent cookies"), "Allow")
+        persistent_cookies_combobox.addItem(self.tr("Keep all cookies"), "Force")
+        persistent_cookies_combobox.addItem(self.tr("Delete cookies on exit"), "None")
+        persistent_cookies_combobox.setCurrentIndex(persistent_cookies_combobox.findData(current_settings["persistent_cookies"]))
+        engine_settings_layout.addRow(self.tr("Cookies: "), persistent_cookies_combobox)
+
+        profile_storage_urledit = QLineEdit()
+        profile_storage_urledit.setText(current_settings["profile_storage_path"])
+        profile_storage_urledit.setPlaceholderText(PROFILE_PATH)
+        profile_storage_urledit.setMinimumWidth(200)
+        engine_settings_layout.addRow(self.tr("Storage path (after restart): "), profile_storage_urledit)
+
+        extension_cpu_budget_spinbox = QSpinBox()
+        extension_cpu_budget_spinbox.setRange(0, 400)
+        extension_cpu_budget_spinbox.setSingleStep(10)
+        extension_cpu_budget_spinbox.setSuffix(" %")
+        extension_cpu_budget_spinbox.setSpecialValueText(self.tr("Unlimited"))
+        extension_cpu_budget_spinbox.setValue(current_settings["extension_cpu_budget_percent"])
+        engine_settings_layout.addRow(self.tr("Extension CPU budget: "), extension_cpu_budget_spinbox)
+
+        extension_budget_action_combobox = QComboBox()
+        extension_budget_action_combobox.addItem(self.tr("Throttle"), "Throttle")
+        extension_budget_action_combobox.addItem(self.tr("Suspend"), "Suspend")
+        extension_budget_action_combobox.setCurrentIndex(extension_budget_action_combobox.findData(current_settings["extension_budget_action"]))
+        engine_settings_layout.addRow(self.tr("Over CPU budget: "), extension_budget_action_combobox)
+
+        extension_memory_budget_spinbox = QSpinBox()
+        extension_memory_budget_spinbox.setRange(0, 16384)
+        extension_memory_budget_spinbox.setSingleStep(64)
+        extension_memory_budget_spinbox.setSuffix(" MB")
+        extension_memory_budget_spinbox.setSpecialValueText(self.tr("Unlimited"))
+        extension_memory_budget_spinbox.setValue(current_settings["extension_memory_budget_mb"])
+        engine_settings_layout.addRow(self.tr("Extension memory budget: "), extension_memory_budget_spinbox)
+
+        extension_queue_limit_spinbox = QSpinBox()
+        extension_queue_limit_spinbox.setRange(1, 1024)
+        extension_queue_limit_spinbox.setValue(current_settings["extension_queue_limit"])
+        engine_settings_layout.addRow(self.tr("Extension queue limit: "), extension_queue_limit_spinbox)
+
+        # The engine tab is taller than the dialog
+        engine_settings_scroll = QScrollArea()
+        engine_settings_scroll.setWidget(engine_settings)
+        engine_settings_scroll.setWidgetResizable(True)
+        engine_settings_scroll.setFrameShape(QScrollArea.Shape.NoFrame)
+
         # AI Summarization settings
         ai_settings = QWidget()
         ai_settings_layout = QFormLayout()
         ai_settings.setLayout(ai_settings_layout)
 
-        install_model_btn = QPushButton()
+        # Filled from the cached model list, a refresh runs in the background
+        model_manager = self.get_model_manager()
+        models_table = QTableWidget(0, 4)
+        models_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        models_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        models_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        models_table.verticalHeader().setVisible(False)
+        models_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        models_table.setHorizontalHeaderLabels([self.tr("Model"), self.tr("Size"), self.tr("Load time"), self.tr("Status")])
+        models_table.setMinimumHeight(140)
+        ai_settings_layout.addRow(models_table)
+
+        models_status_label = QLabel()
+        install_model_btn = QPushButton(self.tr("Install"))
+        install_model_btn.setIcon(icon_cache.get("fa6s.download", self.get_contrast_color_from_theme()))
+        cancel_model_btn = QPushButton(self.tr("Cancel"))
+        cancel_model_btn.setIcon(icon_cache.get("fa6s.stop", self.get_contrast_color_from_theme()))
+        remove_model_btn = QPushButton(self.tr("Remove"))
+        remove_model_btn.setIcon(icon_cache.get("fa6s.trash", self.get_contrast_color_from_theme()))
+
+        model_buttons_layout = QHBoxLayout()
+        model_buttons_layout.addWidget(models_status_label, 1)
+        model_buttons_layout.addWidget(install_model_btn)
+        model_buttons_layout.addWidget(cancel_model_btn)
+        model_buttons_layout.addWidget(remove_model_btn)
+        ai_settings_layout.addRow(model_buttons_layout)
+
+        # Other models of the Ollama library are installed by name
+        model_name_lineedit = QLineEdit()
+        model_name_lineedit.setPlaceholderText(self.tr("Model name, e.g. llama3.2:1b"))
+        pull_model_btn = QPushButton(self.tr("Install"))
+        pull_model_btn.setIcon(icon_cache.get("fa6s.download", self.get_contrast_color_from_theme()))
+
+        model_name_layout = QHBoxLayout()
+        model_name_layout.addWidget(model_name_lineedit, 1)
+        model_name_layout.addWidget(pull_model_btn)
+        ai_settings_layout.addRow(self.tr("Install model: "), model_name_layout)
 
-        try:
-            raw_models = ollama.list()
-            ollama_model_names = [m.model for m in raw_models.models]
-            sum_model_installed = SUM_AI_MODEL["name"] in ollama_model_names
+        ai_checkbox = QCheckBox()
+        ai_checkbox.setChecked(current_settings["ai_summarization_enabled"])
+        ai_settings_layout.addRow(self.tr("Enable AI Page Summarization: "), ai_checkbox)
 
-            if not sum_model_installed:
-                install_model_btn.setText(f"{self.tr("Install")} ({SUM_AI_MODEL["size"]})")
-                install_model_btn.setIcon(qta.icon("fa6s.download", color=self.get_contrast_color_from_theme()))
+        def selected_model():
+            item = models_table.item(models_table.currentRow(), 0)
+            if item is None:
+                return None
+            return next((model for model in model_manager.models() if model["name"] == item.text()), None)
+
+        def update_model_buttons():
+            model = selected_model()
+            idle = model is not None and model["pull"] is None
+            install_model_btn.setEnabled(idle and not model["installed"] and model_manager.is_available())
+            cancel_model_btn.setEnabled(model is not None and model["pull"] is not None)
+            remove_model_btn.setEnabled(idle and model["installed"] and model_manager.is_available())
+
+            name = model_name_lineedit.text().strip()
+            pull_model_btn.setEnabled(
+                is_valid_model_name(name) and model_manager.is_available()
+                and not model_manager.is_pulling(name) and not model_manager.is_installed(name)
+            )
+
+        def update_models(event="", name="", detail=""):
+            models = model_manager.models()
+            models_table.setRowCount(len(models))
+
+            for row, model in enumerate(models):
+                if model["pull"] is not None:
+                    completed, total, _ = model["pull"]
+                    if total:
+                        status = f"{self.tr("Downloading")} {completed * 100 // total} % ({format_bytes(completed)} / {format_bytes(total)})"
+                    else:
+                        status = self.tr("Preparing download...")
+                elif model["installed"]:
+                    status = self.tr("Installed")
+                else:
+                    status = self.tr("Not installed")
+
+                values = [
+                    model["name"],
+                    format_bytes(model["size"]) if model["size"] else "",
+                    f"~{model["load_time"]:.1f} s" if model["load_time"] is not None else "",
+                    status
+                ]
+                for column, value in enumerate(values):
+                    item = models_table.item(row, column)
+                    if item is None:
+                        item = QTableWidgetItem()
+                        models_table.setItem(row, column, item)
+                    item.setText(value)
+
+            if models_table.currentRow() < 0 and models:
+                models_table.setCurrentCell(0, 0)
+
+            if model_manager.error:
+                models_status_label.setText(self.tr("Ollama not running"))
+            elif model_manager.installed is None:
+                models_status_label.setText(self.tr("Checking installed models..."))
             else:
-                install_model_btn.setText(self.tr("Model Installed"))
-                install_model_btn.setIcon(qta.icon("fa6s.check", color=self.get_contrast_color_from_theme()))
-            
-            install_model_btn.setEnabled(not sum_model_installed)
+                models_status_label.setText("")
 
-        except Exception:
-            sum_model_installed = False
-            install_model_btn.setText(self.tr("Ollama not running"))
-            install_model_btn.setIcon(qta.icon("ei.remove", color=self.get_contrast_color_from_theme()))
-            install_model_btn.setEnabled(False)
+            ai_checkbox.setEnabled(model_manager.is_installed(SUM_AI_MODEL["name"]))
+            update_model_buttons()
 
-        install_model_btn.setFixedWidth(200)
-        install_model_btn.clicked.connect(lambda: self.start_model_installation(install_model_btn))
-        ai_settings_layout.addRow(self.tr("Install AI Page Summarization Model: "), install_model_btn)
-        
-        ai_checkbox = QCheckBox()
-        ai_checkbox.setEnabled(sum_model_installed)
-        ai_checkbox.setChecked(current_settings["ai_summarization_enabled"])
-        ai_settings_layout.addRow(self.tr("Enable AI Page Summarization: "), ai_checkbox)
+        def pull_named_model():
+            name = model_name_lineedit.text().strip()
+            if not is_valid_model_name(name):
+                return
+            model_manager.pull(name)
+            model_name_lineedit.clear()
+
+            # The new model has a row now, select it to show its progress
+            rows = models_table.findItems(name, Qt.MatchFlag.MatchExactly)
+            if rows:
+                models_table.setCurrentItem(rows[0])
+
+        def remove_selected_model():
+            model = selected_model()
+            answer = QMessageBox.question(self, self.tr("Remove model"), f"{self.tr("Remove the model")} \"{model["name"]}\"?")
+            if answer == QMessageBox.StandardButton.Yes:
+                model_manager.delete(model["name"])
+
+        models_table.itemSelectionChanged.connect(update_model_buttons)
+        install_model_btn.clicked.connect(lambda: model_manager.pull(selected_model()["name"]))
+        cancel_model_btn.clicked.connect(lambda: model_manager.cancel_pull(selected_model()["name"]))
+        remove_model_btn.clicked.connect(remove_selected_model)
+        model_name_lineedit.textChanged.connect(update_model_buttons)
+        model_name_lineedit.returnPressed.connect(pull_named_model)
+        pull_model_btn.clicked.connect(pull_named_model)
+
+        self.model_signals.changed.connect(update_models)
+        update_models()
+        model_manager.refresh()
+
+        ai_keep_alive_spinbox = QSpinBox()
+        ai_keep_alive_spinbox.setRange(-1, 1440)
+        ai_keep_alive_spinbox.setSuffix(" min")
+        ai_keep_alive_spinbox.setSpecialValueText(self.tr("Forever"))
+        ai_keep_alive_spinbox.setValue(current_settings["ai_keep_alive_minutes"])
+        ai_settings_layout.addRow(self.tr("Keep model loaded for: "), ai_keep_alive_spinbox)
+
+        ai_preload_checkbox = QCheckBox()
+        ai_preload_checkbox.setChecked(current_settings["ai_preload_model"])
+        ai_settings_layout.addRow(self.tr("Preload model on startup: "), ai_preload_checkbox)
 
         # Add widgets to tab widget
         tabs.addTab(general_settings, self.tr("General"))
         tabs.addTab(display_settings, self.tr("Display"))
         tabs.addTab(security_settings, self.tr("Security"))
         tabs.addTab(language_settings, self.tr("Language"))
-        tabs.addTab(engine_settings, self.tr("Engine"))
+        tabs.addTab(engine_settings_scroll, self.tr("Engine"))
         tabs.addTab(ai_settings, self.tr("AI Features"))
 
         # Add Ok and Cancel buttons
@@ -1402,18 +3484,37 @@ class BrowserWindow(QMainWindow):
 
         dlg.setLayout(layout)
 
-        if dlg.exec():
+        accepted = dlg.exec()
+        self.profile_manager.cache_usage_changed.disconnect(update_cache_usage)
+        self.model_signals.changed.disconnect(update_models)
+
+        if accepted:
             start_page = start_page_urledit.text() if start_page_url_radio_button.isChecked() else START_PAGE_PATH
             search_engine = search_engine_combobox.currentText()
+            restore_session = restore_session_checkbox.isChecked()
             theme = theme_combobox.currentText()
             go_button_visible = go_button_visibility_checkbox.isChecked()
             bottom_bar_visible = bottom_bar_visability_checkbox.isChecked()
             download_warnings = download_warnings_checkbox.isChecked()
+            download_verification = download_verification_checkbox.isChecked()
+            content_blocking = content_blocking_checkbox.isChecked()
             language = language_select_combobox.currentText()
             javascript_enabled = javascript_checkbox.isChecked()
             default_font_size = font_size_spinbox.value()
             default_scrollbars_enabled = scrollbars_enabled_checkbox.isChecked()
+            max_loaded_tabs = max_loaded_tabs_spinbox.value()
+            tab_memory_budget_mb = tab_memory_budget_spinbox.value()
+            http_cache_type = http_cache_type_combobox.currentData()
+            http_cache_size_mb = http_cache_size_spinbox.value()
+            persistent_cookies = persistent_cookies_combobox.currentData()
+            profile_storage_path = profile_storage_urledit.text().strip()
+            extension_cpu_budget_percent = extension_cpu_budget_spinbox.value()
+            extension_budget_action = extension_budget_action_combobox.currentData()
+            extension_memory_budget_mb = extension_memory_budget_spinbox.value()
+            extension_queue_limit = extension_queue_limit_spinbox.value()
             summarize_ai_enabled = ai_checkbox.isChecked()
+            ai_keep_alive_minutes = ai_keep_alive_spinbox.value()
+            ai_preload_model = ai_preload_checkbox.isChecked()
 
             # Update settings in browser
             theme_manager.load_theme(theme)
@@ -1424,13 +3525,16 @@ class BrowserWindow(QMainWindow):
             self.ai_sidebar_btn.setVisible(summarize_ai_enabled)
             self.aiMenu.setEnabled(summarize_ai_enabled)
 
-            if self.ai_sidebar.isVisible():
+            if self.ai_sidebar is not None and self.ai_sidebar.isVisible():
                 self.ai_sidebar.setVisible(summarize_ai_enabled)
             
             if language != current_settings["language"]:
                 self.load_language(NAME_TO_LANGUAGE[language])
 
             self.update_web_engine()
+            self.tab_discarder.configure(max_loaded_tabs, tab_memory_budget_mb)
+            self.profile_manager.configure(http_cache_type, http_cache_size_mb, persistent_cookies)
+            self.extension_host.configure_budgets(extension_cpu_budget_percent, extension_memory_budget_mb, extension_budget_action, extension_queue_limit)
 
             # Prepare settings.json
             updated_settings = {
@@ -1440,44 +3544,57 @@ class BrowserWindow(QMainWindow):
                 "bottom_bar_visible":bottom_bar_visible,
                 "go_button_visible":go_button_visible,
                 "download_warnings":download_warnings,
+                "download_verification":download_verification,
+                "content_blocking":content_blocking,
+                "restore_session":restore_session,
                 "language":NAME_TO_LANGUAGE[language],
                 "javascript_enabled":javascript_enabled,
                 "default_font_size":default_font_size,
                 "scrollbars_enabled":default_scrollbars_enabled,
-                "ai_summarization_enabled":summarize_ai_enabled
+                "ai_summarization_enabled":summarize_ai_enabled,
+                "max_loaded_tabs":max_loaded_tabs,
+                "tab_memory_budget_mb":tab_memory_budget_mb,
+                "http_cache_type":http_cache_type,
+                "http_cache_size_mb":http_cache_size_mb,
+                "persistent_cookies":persistent_cookies,
+                "profile_storage_path":profile_storage_path,
+                "extension_cpu_budget_percent":extension_cpu_budget_percent,
+                "extension_memory_budget_mb":extension_memory_budget_mb,
+                "extension_budget_action":extension_budget_action,
+                "extension_queue_limit":extension_queue_limit,
+                "ai_keep_alive_minutes":ai_keep_alive_minutes,
+                "ai_preload_model":ai_preload_model
             }
 
-            current_settings = updated_settings
+            settings_store.update(updated_settings)
+
+            if not content_blocking:
+                self.content_blocker.filter_set = None
+            elif self.content_blocker.filter_set is None:
+                self.load_filter_lists()
 
             self.update_icon_colors()
+            self.discard_background_tabs()
 
-            # Write to settings.json
-            with open(CONFIG_PATH, "w") as f:
-                json.dump(updated_settings, f, indent=4)
+            ai_backend.configure(keep_alive=format_keep_alive(ai_keep_alive_minutes))
+            self.preload_ai_model()
 
-    def start_model_installation(self, install_button):
-        install_button.setEnabled(False)
-        install_button.setText(self.tr("Installing..."))
-        animation = qta.Spin(install_button)
-        install_button.setIcon(qta.icon("mdi.loading", color=self.get_contrast_color_from_theme(), animation=animation))
+    def model_manager_changed(self, event, name, detail):
+        if event != EVENT_FINISHED or detail == PULL_CANCELLED:
+            return
+
+        if detail:
+            QMessageBox.warning(self, self.tr("Model installation failed"), f"{self.tr("The model could not be installed:")} {detail}")
+        elif name == SUM_AI_MODEL["name"]:
+            QMessageBox.information(self, self.tr("Model Installed"), self.tr("The AI page summarization model has been installed successfully. You can now enable AI page summarization in the settings."))
 
-        self.threadpool = QThreadPool()
-        worker = InstallWorker(SUM_AI_MODEL["name"])
-        worker.installation_complete.connect(lambda: self.model_installation_complete(install_button))
-        self.threadpool.start(worker)
-    
-    def model_installation_complete(self, install_button):
-        install_button.setText(self.tr("Model Installed"))
-        install_button.setIcon(qta.icon("fa6s.check", color=self.get_contrast_color_from_theme()))
-        
-        QMessageBox.information(self, self.tr("Model Installed"), self.tr("The AI page summarization model has been installed successfully. You can now enable AI page summarization in the settings."))
-    
     def toggle_url_edit(self, enable, urledit):
         urledit.setEnabled(enable)
     
     def update_web_engine(self):
         for tab in self.tab_list:
-            tab.update_engine_config()
+            if tab.is_loaded():
+                tab.engine.update_engine_config()
         
     def about_dialog(self):
         dlg = QDialog(self)
@@ -1519,12 +3636,48 @@ if __name__ == "__main__":
     app.setApplicationName("Silk Mizu")
     app.setApplicationVersion(VERSION_NUMBER)
     app.setOrganizationName("Silk Project")
+    startup_profiler.mark("QApplication created")
+
+    # Stalls of the UI thread, the window setup before the first heartbeat counts as one
+    stall_watchdog = None
+    if "--watch-stalls" in sys.argv:
+        stall_watchdog = StallWatchdog(STALL_LOG_PATH)
+        heartbeat_timer = QTimer()
+        heartbeat_timer.setInterval(HEARTBEAT_INTERVAL)
+        heartbeat_timer.timeout.connect(stall_watchdog.beat)
+        heartbeat_timer.start()
+        stall_watchdog.start()
+        app.aboutToQuit.connect(stall_watchdog.stop)
 
     # Load theme
     theme_manager = ThemeManager(app, current_settings["theme"])
+    startup_profiler.mark("Theme loaded")
     
     app.setWindowIcon(QIcon(LOGO_PATH))
     app.setStyle("breeze")
+
+    if HEADLESS:
+        from headless_driver import HeadlessDriver, HEADLESS_SETTINGS, parse_options
+        settings_store.update(HEADLESS_SETTINGS)
+
     window = BrowserWindow()
     window.show()
-    sys.exit(app.exec())
+
+    # Connected after the window, so its last changes are written too
+    app.aboutToQuit.connect(settings_store.close)
+    app.aboutToQuit.connect(summary_cache.flush)
+    app.aboutToQuit.connect(bookmarks_store.close)
+    app.aboutToQuit.connect(session_store.close)
+    # Closed before the first page loaded, whatever was measured is still reported
+    app.aboutToQuit.connect(startup_profiler.report)
+    startup_profiler.mark("Window shown")
+
+    if HEADLESS:
+        driver = HeadlessDriver(window, ai_backend, parse_options(sys.argv), stall_watchdog)
+        driver.finished.connect(app.exit)
+        QTimer.singleShot(0, driver.start)
+
+    exit_code = app.exec()
+    if HEADLESS:
+        shutil.rmtree(CONFIG_DIR, ignore_errors=True)
+    sys.exit(exit_code)
@@ -0,0 +1,199 @@
+import re
+import time
+import threading
+
+# Installed Ollama models and model downloads, without ever blocking the
+# caller. The model list is cached for MODEL_LIST_TTL seconds and refreshed in
+# the background, pulls stream their byte progress and can be cancelled. The
+# listener is called from worker threads with (event, model name, detail):
+#   EVENT_MODELS    the model list changed or could not be read (detail: error)
+#   EVENT_PROGRESS  a pull made progress
+#   EVENT_FINISHED  a pull ended (detail: "" on success, PULL_CANCELLED or the error)
+
+MODEL_LIST_TTL = 30  # Seconds
+PROGRESS_INTERVAL = 0.1  # Seconds between progress notifications of one pull
+DEFAULT_LOAD_THROUGHPUT = 300 * 1024 * 1024  # Bytes per second, until a load was measured
+
+EVENT_MODELS = "models"
+EVENT_PROGRESS = "progress"
+EVENT_FINISHED = "finished"
+PULL_CANCELLED = "cancelled"
+
+# "name", "name:tag" or "namespace/name:tag" as Ollama writes them
+MODEL_NAME_REGEX = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*(?:/[A-Za-z0-9][A-Za-z0-9._-]*)*(?::[A-Za-z0-9][A-Za-z0-9._-]*)?$")
+SIZE_REGEX = re.compile(r"^\s*([\d.]+)\s*([KMGT]?)B\s*$", re.IGNORECASE)
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+def parse_size(text):
+    # "700MB" -> bytes, 0 if unknown
+    match = SIZE_REGEX.match(text or "")
+    if match is None:
+        return 0
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+def is_valid_model_name(name):
+    return MODEL_NAME_REGEX.match(name) is not None
+
+class PullState():
+    def __init__(self):
+        self.status = ""
+        self.layers = {}  # digest -> [completed bytes, total bytes]
+        self.cancelled = threading.Event()
+        self.last_notified = 0.0
+
+    def progress(self):
+        completed = sum(layer[0] for layer in self.layers.values())
+        total = sum(layer[1] for layer in self.layers.values())
+        return completed, total
+
+class ModelManager():
+    def __init__(self, backend, catalog, listener=None, ttl=MODEL_LIST_TTL):
+        self.backend = backend
+        self.catalog = {name: parse_size(size) for name, size in catalog.items()}  # Models offered for download
+        self.listener = listener
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.installed = None  # name -> size in bytes, None until the first listing
+        self.error = ""
+        self.listed_at = 0.0
+        self.refreshing = False
+        self.refresh_again = False  # A forced refresh came in while one was running
+        self.pulls = {}
+
+    def notify(self, event, name, detail=""):
+        if self.listener is not None:
+            self.listener(event, name, detail)
+
+    # Model list
+    def refresh(self, force=False):
+        # Returns True if a refresh was started, the result arrives as EVENT_MODELS
+        with self.lock:
+            fresh = self.installed is not None and time.monotonic() - self.listed_at < self.ttl
+            if self.refreshing:
+                self.refresh_again = self.refresh_again or force
+                return False
+            if fresh and not force:
+                return False
+            self.refreshing = True
+
+        threading.Thread(target=self.run_refresh, daemon=True).start()
+        return True
+
+    def run_refresh(self):
+        try:
+            response = self.backend.list_models()
+            installed = {model.model: model.size or 0 for model in response.models}
+            error = ""
+        except Exception as e:
+            installed = None
+            error = str(e) or type(e).__name__
+
+        with self.lock:
+            self.refreshing = False
+            self.listed_at = time.monotonic()
+            self.error = error
+            # A failed refresh keeps the last known list, the error says it is stale
+            if installed is not None:
+                self.installed = installed
+            refresh_again, self.refresh_again = self.refresh_again, False
+
+        self.notify(EVENT_MODELS, "", error)
+        if refresh_again:
+            self.refresh(force=True)
+
+    def is_available(self):
+        return self.installed is not None and not self.error
+
+    def is_installed(self, name):
+        with self.lock:
+            return self.installed is not None and name in self.installed
+
+    def estimate_load_time(self, name, size):
+        # Seconds, measured by the backend once the model was loaded
+        if name in self.backend.load_times:
+            return self.backend.load_times[name]
+        return size / DEFAULT_LOAD_THROUGHPUT if size else None
+
+    def models(self):
+        # Catalog, installed and downloading models, catalog models first
+        with self.lock:
+            installed = dict(self.installed or {})
+            pulls = {name: state.progress() + (state.status,) for name, state in self.pulls.items()}
+
+        names = list(self.catalog)
+        names += sorted(name for name in {*installed, *pulls} if name not in self.catalog)
+
+        models = []
+        for name in names:
+            size = installed.get(name) or self.catalog.get(name, 0)
+            models.append({
+                "name": name,
+                "size": size,
+                "installed": name in installed,
+                "load_time": self.estimate_load_time(name, size),
+                "pull": pulls.get(name)  # (completed, total, status) while downloading
+            })
+        return models
+
+    # Downloads, any model of the Ollama library can be pulled, not only the catalog ones
+    def pull(self, name):
+        if not is_valid_model_name(name):
+            raise ValueError(f"Invalid model name: {name}")
+
+        with self.lock:
+            if name in self.pulls:
+                return
+            state = self.pulls[name] = PullState()
+
+        threading.Thread(target=self.run_pull, args=(name, state), daemon=True).start()
+        self.notify(EVENT_PROGRESS, name)
+
+    def run_pull(self, name, state):
+        result = ""
+        try:
+            stream = self.backend.pull(name, stream=True)
+            try:
+                for part in stream:
+                    # Closing the stream drops the connection, which stops the download
+                    if state.cancelled.is_set():
+                        result = PULL_CANCELLED
+                        break
+
+                    state.status = part.get("status") or state.status
+                    if part.get("digest") and part.get("total"):
+                        state.layers[part["digest"]] = [part.get("completed") or 0, part["total"]]
+
+                    now = time.monotonic()
+                    if now - state.last_notified >= PROGRESS_INTERVAL:
+                        state.last_notified = now
+                        self.notify(EVENT_PROGRESS, name)
+            finally:
+                stream.close()
+        except Exception as e:
+            result = str(e) or type(e).__name__
+
+        with self.lock:
+            self.pulls.pop(name, None)
+
+        self.notify(EVENT_FINISHED, name, result)
+        self.refresh(force=True)
+
+    def cancel_pull(self, name):
+        with self.lock:
+            state = self.pulls.get(name)
+        if state is not None:
+            state.cancelled.set()
+
+    def is_pulling(self, name):
+        with self.lock:
+            return name in self.pulls
+
+    def delete(self, name):
+        threading.Thread(target=self.run_delete, args=(name,), daemon=True).start()
+
+    def run_delete(self, name):
+        try:
+            self.backend.delete(name)
+        except Exception as e:
+            self.notify(EVENT_MODELS, "", str(e) or type(e).__name__)
+        self.refresh(force=True)
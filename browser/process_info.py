@@ -0,0 +1,77 @@
+import os
+import time
+
+# Helpers for reading memory and CPU usage of the browser, its renderer and its
+# extension processes. Only Linux exposes /proc, other platforms report 0 so
+# callers can treat the budgets as "unknown" instead of failing.
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+def get_process_rss(pid=None):
+    # Resident set size of a process in bytes
+    if pid is None:
+        pid = os.getpid()
+
+    if not pid or pid <= 0:
+        return 0
+
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return 0
+
+def get_total_rss(pids):
+    # Sum the RSS of several processes, counting shared renderers only once
+    return sum(get_process_rss(pid) for pid in set(pids) if pid)
+
+def get_process_cpu_time(pid=None):
+    # User and system CPU time of a process in seconds
+    if pid is None:
+        pid = os.getpid()
+
+    if not pid or pid <= 0:
+        return 0.0
+
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            # The command name may contain spaces, the fields after it don't
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except (OSError, ValueError, IndexError):
+        pass
+
+    if pid == os.getpid():
+        times = os.times()
+        return times.user + times.system
+    return 0.0
+
+class CpuSampler():
+    # CPU usage in percent of one core since the previous sample of each process
+    def __init__(self):
+        self.samples = {}
+
+    def sample(self, pids):
+        now = time.monotonic()
+        usage = {}
+        samples = {}
+
+        for pid in set(pids):
+            if not pid:
+                continue
+            cpu_time = get_process_cpu_time(pid)
+            samples[pid] = (now, cpu_time)
+
+            previous = self.samples.get(pid)
+            if previous is None or now <= previous[0]:
+                usage[pid] = 0.0
+            else:
+                usage[pid] = max(0.0, (cpu_time - previous[1]) / (now - previous[0]) * 100)
+
+        # Processes that are gone are forgotten
+        self.samples = samples
+        return usage
@@ -0,0 +1,128 @@
+import os
+import threading
+import http.cookiejar
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtWebEngineCore import QWebEngineProfile
+
+# Owner of the one persistent web engine profile all tabs share. Cookies, local
+# storage and the HTTP disk cache live below the storage path, so repeat visits
+# are served from the cache across restarts, and profile wide signals like
+# downloadRequested are connected once instead of once per tab. The cookies
+# are mirrored into a cookie jar, so downloads fetched outside of the web
+# engine still carry the session of the page they came from.
+
+PROFILE_NAME = "silk-mizu"
+
+CACHE_TYPES = {
+    "Disk": QWebEngineProfile.HttpCacheType.DiskHttpCache,
+    "Memory": QWebEngineProfile.HttpCacheType.MemoryHttpCache,
+    "None": QWebEngineProfile.HttpCacheType.NoCache
+}
+COOKIE_POLICIES = {
+    "Allow": QWebEngineProfile.PersistentCookiesPolicy.AllowPersistentCookies,
+    "Force": QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies,
+    "None": QWebEngineProfile.PersistentCookiesPolicy.NoPersistentCookies
+}
+
+# The size limit is an int of bytes on the Qt side
+MAX_CACHE_SIZE_MB = 2047
+CLEAR_FALLBACK_DELAY = 1000  # ms, Qt before 6.7 doesn't report when clearing is done
+
+def directory_size(path):
+    total = 0
+    pending = [path]
+
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            continue
+
+    return total
+
+def to_http_cookie(cookie):
+    # QNetworkCookie -> http.cookiejar.Cookie, None if it can't be sent anywhere
+    domain = cookie.domain()
+    if not domain:
+        return None
+
+    expires = None if cookie.isSessionCookie() else cookie.expirationDate().toSecsSinceEpoch()
+    # A leading dot marks a domain cookie, without it only the exact host gets it
+    return http.cookiejar.Cookie(
+        0, bytes(cookie.name()).decode("latin-1"), bytes(cookie.value()).decode("latin-1"),
+        None, False,
+        domain, domain.startswith("."), domain.startswith("."),
+        cookie.path() or "/", True,
+        cookie.isSecure(), expires, expires is None,
+        None, None, {"HttpOnly": None} if cookie.isHttpOnly() else {}
+    )
+
+class ProfileManager(QObject):
+    cache_usage_changed = pyqtSignal(int)  # Bytes
+    cache_cleared = pyqtSignal()
+
+    def __init__(self, storage_path, parent=None):
+        super().__init__(parent)
+        # Named profiles are persistent, the storage path can't change while pages use it
+        self.profile = QWebEngineProfile(PROFILE_NAME, self)
+        self.profile.setPersistentStoragePath(storage_path)
+        self.profile.setCachePath(os.path.join(storage_path, "cache"))
+        self.measuring = False
+
+        if hasattr(self.profile, "clearHttpCacheCompleted"):
+            self.profile.clearHttpCacheCompleted.connect(self.cache_clear_completed)
+
+        # Host only cookies must not be sent to subdomains
+        self.cookie_jar = http.cookiejar.CookieJar(http.cookiejar.DefaultCookiePolicy(
+            strict_ns_domain=http.cookiejar.DefaultCookiePolicy.DomainStrictNonDomain
+        ))
+        cookie_store = self.profile.cookieStore()
+        cookie_store.cookieAdded.connect(self.cookie_added)
+        cookie_store.cookieRemoved.connect(self.cookie_removed)
+        cookie_store.loadAllCookies()
+
+    def configure(self, cache_type, cache_size_mb, cookie_policy):
+        self.profile.setHttpCacheType(CACHE_TYPES[cache_type])
+        # 0 lets Chromium pick the size
+        self.profile.setHttpCacheMaximumSize(min(cache_size_mb, MAX_CACHE_SIZE_MB) * 1024 * 1024)
+        self.profile.setPersistentCookiesPolicy(COOKIE_POLICIES[cookie_policy])
+
+    def cookie_added(self, cookie):
+        http_cookie = to_http_cookie(cookie)
+        if http_cookie is not None:
+            self.cookie_jar.set_cookie(http_cookie)
+
+    def cookie_removed(self, cookie):
+        try:
+            self.cookie_jar.clear(cookie.domain(), cookie.path() or "/", bytes(cookie.name()).decode("latin-1"))
+        except KeyError:
+            pass
+
+    def measure_cache_usage(self):
+        # Walking the cache can take a moment, the result arrives as cache_usage_changed
+        if self.measuring:
+            return
+        self.measuring = True
+
+        cache_path = self.profile.cachePath()
+        threading.Thread(target=self.run_measurement, args=(cache_path,), daemon=True).start()
+
+    def run_measurement(self, cache_path):
+        size = directory_size(cache_path)
+        self.measuring = False
+        self.cache_usage_changed.emit(size)
+
+    def clear_cache(self):
+        self.profile.clearHttpCache()
+
+        if not hasattr(self.profile, "clearHttpCacheCompleted"):
+            QTimer.singleShot(CLEAR_FALLBACK_DELAY, self.cache_clear_completed)
+
+    def cache_clear_completed(self):
+        self.cache_cleared.emit()
+        self.measure_cache_usage()
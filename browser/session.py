@@ -0,0 +1,68 @@
+import base64
+import binascii
+
+# Open tabs of the last run, kept in a ConfigStore so snapshots are written
+# atomically in the background. Only the active tab is loaded on restore, the
+# others stay placeholders until they are shown.
+#
+# session.json: {"version": 1, "current": index, "tabs": [tab, ...]} where a tab
+# is {"url": ..., "title": ..., "zoom": ..., "history": base64 or null}. The
+# history is QWebEngineHistory as written by QDataStream, it brings back the
+# back and forward lists.
+
+SESSION_VERSION = 1
+
+# Zoom range of QWebEngineView
+MIN_ZOOM = 0.25
+MAX_ZOOM = 5.0
+
+def empty_session():
+    return {"version": SESSION_VERSION, "current": 0, "tabs": []}
+
+def encode_history(data):
+    return base64.b64encode(data).decode("ascii") if data else None
+
+def decode_history(text):
+    if not text:
+        return None
+    try:
+        return base64.b64decode(text, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+def validate_tab(data, problems):
+    if not isinstance(data, dict) or not isinstance(data.get("url"), str):
+        problems.append(f"invalid tab: {data!r}")
+        return None
+
+    title = data.get("title")
+    if not isinstance(title, str):
+        title = ""
+
+    zoom = data.get("zoom", 1.0)
+    if isinstance(zoom, bool) or not isinstance(zoom, (int, float)) or not MIN_ZOOM <= zoom <= MAX_ZOOM:
+        problems.append(f"invalid zoom for tab \"{data['url']}\": {zoom!r}")
+        zoom = 1.0
+
+    history = data.get("history")
+    if history is not None and (not isinstance(history, str) or decode_history(history) is None):
+        problems.append(f"invalid history for tab \"{data['url']}\"")
+        history = None
+
+    return {"url": data["url"], "title": title, "zoom": float(zoom), "history": history}
+
+def validate_session(data):
+    # Returns (valid session, list of problems)
+    if not isinstance(data, dict) or not isinstance(data.get("tabs"), list):
+        return empty_session(), ["session is not a JSON object with a tab list"]
+
+    problems = []
+    tabs = [validate_tab(tab, problems) for tab in data["tabs"]]
+    tabs = [tab for tab in tabs if tab is not None]
+
+    current = data.get("current", 0)
+    if isinstance(current, bool) or not isinstance(current, int) or not 0 <= current < max(1, len(tabs)):
+        problems.append(f"invalid current tab: {current!r}")
+        current = 0
+
+    return {"version": SESSION_VERSION, "current": current, "tabs": tabs}, problems
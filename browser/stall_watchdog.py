@@ -0,0 +1,198 @@
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter, deque
+
+# Opt-in watchdog for synchronous work on the UI thread (--watch-stalls). A
+# heartbeat timer on the UI thread calls beat(), a background thread notices
+# when the beats stop and samples the Python stack of the UI thread until they
+# come back. Every stall is written as one JSON line to a rotating log, the
+# stacks of all stalls are also kept as folded stacks ("a;b;c count") that
+# flamegraph.pl, speedscope or inferno read as they are.
+#
+# Stacks can only be sampled while the UI thread lets go of the GIL, which
+# Python code does every few ms. A long call into C that holds it shows up as
+# one sample at the call site.
+# Usage: python3 stall_watchdog.py config/stalls.log [more logs ...] > stalls.folded
+
+HEARTBEAT_INTERVAL = 50  # ms
+STALL_THRESHOLD = 100  # ms the UI thread may be busy before it counts as a stall
+SAMPLE_INTERVAL = 10  # ms between stack samples during a stall
+MAX_LOG_SIZE = 1024 * 1024
+LOG_BACKUPS = 3
+MAX_STACK_DEPTH = 64
+LATENCY_HISTORY = 2000  # Heartbeats kept for the latency percentiles
+
+def format_frame(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+def sample_stack(frame):
+    # Outermost frame first, like folded stacks expect
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        stack.append(format_frame(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+def fold_stacks(samples):
+    return Counter(";".join(stack) for stack in samples if stack)
+
+def write_folded(counts, stream):
+    for stack, count in counts.most_common():
+        stream.write(f"{stack} {count}\n")
+
+def read_log(path):
+    stalls = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    stalls.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return stalls
+
+def rotate_log(path, backups):
+    for number in range(backups - 1, 0, -1):
+        if os.path.exists(f"{path}.{number}"):
+            os.replace(f"{path}.{number}", f"{path}.{number + 1}")
+    if os.path.exists(path):
+        os.replace(path, f"{path}.1")
+
+class LatencyTracker():
+    # How late a heartbeat timer fires is the event loop latency, a late enough
+    # beat counts as a stall. Also used by the headless driver
+    def __init__(self, interval, threshold, history=LATENCY_HISTORY):
+        self.interval = interval / 1000
+        self.threshold = threshold / 1000
+        self.latencies = deque(maxlen=history)
+        self.stall_count = 0
+        self.stall_time = 0.0
+        self.max_stall = 0.0
+        self.last_beat = time.perf_counter()
+
+    def reset(self):
+        self.last_beat = time.perf_counter()
+
+    def beat(self):
+        now = time.perf_counter()
+        latency = max(0.0, now - self.last_beat - self.interval)
+        self.last_beat = now
+        self.latencies.append(latency)
+
+        if latency >= self.threshold:
+            self.stall_count += 1
+            self.stall_time += latency
+            self.max_stall = max(self.max_stall, latency)
+
+    def report(self):
+        latencies = sorted(self.latencies) or [0.0]
+        return {
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "stall_count": self.stall_count,
+            "stall_time_ms": round(self.stall_time * 1000, 1),
+            "max_stall_ms": round(self.max_stall * 1000, 1),
+            "latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+            "latency_p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+            "latency_max_ms": round(latencies[-1] * 1000, 2)
+        }
+
+class StallWatchdog():
+    def __init__(self, log_path, threshold=STALL_THRESHOLD, interval=HEARTBEAT_INTERVAL):
+        self.log_path = log_path
+        self.tracker = LatencyTracker(interval, threshold)
+        self.main_thread_id = threading.main_thread().ident
+        self.folded = Counter()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.tracker.reset()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def beat(self):
+        # Called by the heartbeat timer on the UI thread
+        self.tracker.beat()
+
+    def run(self):
+        samples = []
+        stall_start = None
+
+        interval = self.tracker.interval
+        while not self.stop_event.wait(SAMPLE_INTERVAL / 1000):
+            last_beat = self.tracker.last_beat
+            busy_for = time.perf_counter() - last_beat - interval
+
+            if busy_for > self.tracker.threshold:
+                if stall_start is None:
+                    stall_start = last_beat
+                frame = sys._current_frames().get(self.main_thread_id)
+                if frame is not None:
+                    samples.append(sample_stack(frame))
+                del frame
+
+            elif stall_start is not None:
+                self.record_stall(last_beat - stall_start - interval, samples)
+                samples = []
+                stall_start = None
+
+        if stall_start is not None:
+            self.record_stall(time.perf_counter() - stall_start - interval, samples)
+
+    def record_stall(self, duration, samples):
+        self.folded.update(fold_stacks(samples))
+
+        entry = {
+            "time": round(time.time(), 3),
+            "duration_ms": round(duration * 1000, 1),
+            "samples": [";".join(stack) for stack in samples]
+        }
+
+        # Only this thread writes the log, the UI thread never waits for the disk
+        try:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > MAX_LOG_SIZE:
+                rotate_log(self.log_path, LOG_BACKUPS)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"Failed to write the stall log: {e}")
+
+    def report(self):
+        return self.tracker.report()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+
+        # Folded stacks of this run next to the log, ready for a flamegraph
+        try:
+            with open(f"{self.log_path}.folded", "w", encoding="utf-8") as f:
+                write_folded(self.folded, f)
+        except OSError as e:
+            print(f"Failed to write the folded stacks: {e}")
+
+        report = self.report()
+        print(f"UI thread: {report['stall_count']} stalls, {report['stall_time_ms']} ms in total, "
+              f"latency p50 {report['latency_p50_ms']} ms, p99 {report['latency_p99_ms']} ms")
+
+def main():
+    # Folded stacks of all stalls in the given logs, including rotated ones
+    counts = Counter()
+    for path in sys.argv[1:]:
+        for stall in read_log(path):
+            counts.update(sample for sample in stall.get("samples", []) if sample)
+    write_folded(counts, sys.stdout)
+
+if __name__ == "__main__":
+    main()
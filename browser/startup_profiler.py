@@ -0,0 +1,64 @@
+import os
+import time
+
+# Phase-by-phase startup timing for --profile-startup. This module is imported
+# before anything heavy so the import phase itself can be measured.
+
+def get_process_age():
+    # Seconds since the interpreter process was started (Linux only)
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # The command name may contain spaces, fields start after ")"
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+class StartupProfiler():
+    def __init__(self, enabled=False, final_phases=()):
+        self.enabled = enabled
+        self.start_time = time.perf_counter()
+        self.process_age = get_process_age() if enabled else None
+        self.phases = []
+        self.final_phases = final_phases  # The report is printed once all of them were marked, in any order
+        self.reported = False
+
+    def mark(self, phase):
+        if not self.enabled or self.reported:
+            return
+
+        self.phases.append((phase, time.perf_counter()))
+        if self.final_phases and all(self.has_mark(name) for name in self.final_phases):
+            self.report()
+
+    def has_mark(self, phase):
+        return any(name == phase for name, _ in self.phases)
+
+    def mark_once(self, phase):
+        if not self.has_mark(phase):
+            self.mark(phase)
+
+    def report(self):
+        if not self.enabled or self.reported:
+            return
+
+        self.reported = True
+        offset = (self.process_age or 0.0) * 1000
+        previous = self.start_time
+
+        print("Startup profile (ms):")
+        print(f"  {"phase":<36}{"ms":>10}{"total":>10}")
+
+        if self.process_age is not None:
+            print(f"  {"interpreter start":<36}{offset:>10.1f}{offset:>10.1f}")
+
+        for phase, timestamp in self.phases:
+            duration = (timestamp - previous) * 1000
+            total = (timestamp - self.start_time) * 1000 + offset
+            print(f"  {phase:<36}{duration:>10.1f}{total:>10.1f}")
+            previous = timestamp
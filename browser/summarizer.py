@@ -0,0 +1,232 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Map-reduce summarization for pages that do not fit into the context of the
+# small summarization model. The page text is split into overlapping chunks on
+# paragraph boundaries, every chunk is summarized on its own (map) and the
+# partial summaries are merged into the final three-part format (reduce).
+# Notes that don't fit into one reduce prompt are first merged in groups.
+
+CHARS_PER_TOKEN = 4
+DEFAULT_MAX_CHUNK_TOKENS = 1500
+DEFAULT_OVERLAP_TOKENS = 100
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_REDUCE_TOKENS = 3000
+
+MAP_SYSTEM_PROMPT = (
+    "You are a note taker. Summarize ONLY the provided section of a web page in 3 to 6 short, "
+    "factual bullet points. No introduction, no commentary, no external knowledge."
+)
+SINGLE_USER_PROMPT = "Summarize this text the way your system prompt intended to:\"{text}\""
+GROUP_USER_PROMPT = (
+    "The following notes were taken from consecutive sections of one web page. "
+    "Merge them into 4 to 8 short, factual bullet points:\n\n{notes}"
+)
+REDUCE_USER_PROMPT = (
+    "The following notes were taken from consecutive sections of one web page. "
+    "Summarize them the way your system prompt intended to:\n\n{notes}"
+)
+
+PARAGRAPH_SPLIT_REGEX = re.compile(r"\n\s*\n")
+SENTENCE_SPLIT_REGEX = re.compile(r"(?<=[.!?])\s+")
+
+def estimate_tokens(text):
+    # Rough estimate, good enough to stay below the model context
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def split_long_paragraph(paragraph, max_tokens):
+    # Split on sentences first, hard-split whatever is still too long
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces = []
+    current = ""
+
+    for sentence in SENTENCE_SPLIT_REGEX.split(paragraph):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+
+    if current:
+        pieces.append(current)
+
+    return pieces
+
+def split_text_into_chunks(text, max_tokens=DEFAULT_MAX_CHUNK_TOKENS, overlap_tokens=DEFAULT_OVERLAP_TOKENS):
+    paragraphs = []
+    for paragraph in PARAGRAPH_SPLIT_REGEX.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        if estimate_tokens(paragraph) > max_tokens:
+            paragraphs.extend(split_long_paragraph(paragraph, max_tokens))
+        else:
+            paragraphs.append(paragraph)
+
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for paragraph in paragraphs:
+        paragraph_tokens = estimate_tokens(paragraph)
+
+        if current and current_tokens + paragraph_tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+
+            # Carry the last paragraphs over so context is not cut mid-thought
+            overlap = []
+            overlap_size = 0
+            for previous in reversed(current):
+                previous_tokens = estimate_tokens(previous)
+                if overlap_size + previous_tokens > overlap_tokens or overlap_size + previous_tokens + paragraph_tokens > max_tokens:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += previous_tokens
+
+            current = overlap
+            current_tokens = overlap_size
+
+        current.append(paragraph)
+        current_tokens += paragraph_tokens
+
+    if current:
+        chunks.append("\n\n".join(current))
+
+    return chunks
+
+class ChunkedSummarizer():
+    # chat_stream(messages) has to return an iterable of text chunks,
+    # is_cancelled() is polled between chunks to stop early
+    def __init__(self, chat_stream, system_prompt, max_workers=DEFAULT_MAX_WORKERS,
+                 max_chunk_tokens=DEFAULT_MAX_CHUNK_TOKENS, overlap_tokens=DEFAULT_OVERLAP_TOKENS,
+                 max_reduce_tokens=DEFAULT_MAX_REDUCE_TOKENS):
+        self.chat_stream = chat_stream
+        self.system_prompt = system_prompt
+        self.max_workers = max(1, max_workers)
+        self.max_chunk_tokens = max_chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.max_reduce_tokens = max_reduce_tokens
+        self.is_cancelled = lambda: False
+        self.failed_sections = 0  # Sections of the last page that are missing from its summary
+
+    def summarize(self, text, on_chunk, on_partial=None, on_reduce_started=None, is_cancelled=None):
+        # on_partial is called with (section number, section count, notes) as sections finish
+        self.is_cancelled = is_cancelled if is_cancelled is not None else lambda: False
+        self.failed_sections = 0
+        chunks = split_text_into_chunks(text, self.max_chunk_tokens, self.overlap_tokens)
+
+        # Short pages go straight to the final prompt
+        if len(chunks) <= 1:
+            self.stream_final(SINGLE_USER_PROMPT.format(text=text), on_chunk)
+            return
+
+        notes = [None] * len(chunks)
+        errors = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.summarize_chunk, chunk): index for index, chunk in enumerate(chunks)}
+
+            for future in as_completed(futures):
+                if self.is_cancelled():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    return
+
+                # A failed section only leaves a gap, the others are still worth summarizing
+                index = futures[future]
+                try:
+                    notes[index] = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    self.failed_sections += 1
+                    print(f"Failed to summarize section {index + 1}/{len(chunks)}: {e}")
+                    continue
+
+                if on_partial:
+                    on_partial(index + 1, len(chunks), notes[index])
+
+            notes = [note for note in notes if note]
+            if not notes:
+                if errors:
+                    raise errors[0]
+                return
+
+            notes = self.reduce_groups(executor, notes)
+
+        if notes is None or self.is_cancelled():
+            return
+
+        if on_reduce_started:
+            on_reduce_started()
+
+        self.stream_final(REDUCE_USER_PROMPT.format(notes="\n\n".join(notes)), on_chunk)
+
+    def reduce_groups(self, executor, notes):
+        # Merges neighbouring notes until all of them fit into the final prompt, None if cancelled
+        while len(notes) > 1 and estimate_tokens("\n\n".join(notes)) > self.max_reduce_tokens:
+            groups = self.group_notes(notes)
+            if len(groups) == len(notes):
+                break
+
+            merged = list(executor.map(self.merge_group, groups))
+            if self.is_cancelled():
+                return None
+            notes = [note for note in merged if note]
+
+        return notes
+
+    def group_notes(self, notes):
+        groups = []
+        current = []
+        current_tokens = 0
+
+        for note in notes:
+            note_tokens = estimate_tokens(note)
+            if current and current_tokens + note_tokens > self.max_reduce_tokens:
+                groups.append(current)
+                current = []
+                current_tokens = 0
+            current.append(note)
+            current_tokens += note_tokens
+
+        if current:
+            groups.append(current)
+        return groups
+
+    def merge_group(self, group):
+        if len(group) == 1 or self.is_cancelled():
+            return group[0]
+
+        # A group that fails keeps its notes, the final prompt only gets longer
+        try:
+            return self.complete(MAP_SYSTEM_PROMPT, GROUP_USER_PROMPT.format(notes="\n\n".join(group)))
+        except Exception as e:
+            print(f"Failed to merge section notes: {e}")
+            return "\n\n".join(group)
+
+    def summarize_chunk(self, chunk):
+        return self.complete(MAP_SYSTEM_PROMPT, chunk)
+
+    def complete(self, system_prompt, text):
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text},
+        ]
+        return "".join(self.chat_stream(messages)).strip()
+
+    def stream_final(self, text, on_chunk):
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": text},
+        ]
+        for content in self.chat_stream(messages):
+            if self.is_cancelled():
+                break
+            on_chunk(content)
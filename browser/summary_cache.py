@@ -0,0 +1,155 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from config_store import write_atomic
+
+# On-disk cache for AI summaries. Entries are keyed on the normalized page text,
+# the model name and the system prompt, so changing any of them never returns a
+# stale summary. The least recently used entries are evicted once the cache
+# grows past max_bytes. Hits only touch the index in memory, it is written a
+# moment later by a background timer.
+
+SAVE_DELAY = 2.0  # Seconds
+WHITESPACE_REGEX = re.compile(r"\s+")
+
+def normalize_text(text):
+    return WHITESPACE_REGEX.sub(" ", text).strip()
+
+def make_cache_key(text, model_name, system_prompt):
+    digest = hashlib.sha256()
+    digest.update(normalize_text(text).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(system_prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+class SummaryCache():
+    def __init__(self, cache_dir, max_bytes=32 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()  # Keeps index writes in order
+        self.index = {}
+        self.total_bytes = 0
+        self.save_timer = None
+
+        self.load_index()
+
+    def load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+
+        try:
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            print("Failed to load summary cache index. Starting with an empty cache.")
+            self.index = {}
+
+        # Forget entries whose files were removed by hand
+        for key in list(self.index):
+            if not os.path.exists(self.entry_path(key)):
+                del self.index[key]
+
+        self.total_bytes = sum(entry["size"] for entry in self.index.values())
+
+    def save_index(self):
+        # The index is copied under the lock, readers don't wait for the disk
+        with self.write_lock:
+            with self.lock:
+                text = json.dumps(self.index)
+
+            try:
+                write_atomic(self.index_path, text)
+            except OSError as e:
+                print(f"Failed to save the summary cache index: {e}")
+
+    def schedule_save(self):
+        # Called with the lock held
+        if self.save_timer is None:
+            self.save_timer = threading.Timer(SAVE_DELAY, self.flush)
+            self.save_timer.daemon = True
+            self.save_timer.start()
+
+    def flush(self):
+        with self.lock:
+            if self.save_timer is None:
+                return
+            self.save_timer.cancel()
+            self.save_timer = None
+        self.save_index()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.md")
+
+    def get(self, key):
+        with self.lock:
+            entry = self.index.get(key)
+            if entry is None:
+                return None
+
+            try:
+                with open(self.entry_path(key), "r", encoding="utf-8") as f:
+                    summary = f.read()
+            except OSError:
+                self.remove_entry(key)
+                self.schedule_save()
+                return None
+
+            entry["last_used"] = time.time()
+            self.schedule_save()
+            return summary
+
+    def put(self, key, summary):
+        data = summary.encode("utf-8")
+
+        if not data or len(data) > self.max_bytes:
+            return
+
+        try:
+            write_atomic(self.entry_path(key), data)
+        except OSError as e:
+            print(f"Failed to cache the summary: {e}")
+            return
+
+        with self.lock:
+            if key in self.index:
+                self.total_bytes -= self.index[key]["size"]
+
+            self.index[key] = {"size": len(data), "last_used": time.time()}
+            self.total_bytes += len(data)
+
+            self.evict()
+
+        # New entries are written right away, so their files are never unknown after a crash
+        self.save_index()
+
+    def evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+
+        for key in sorted(self.index, key=lambda k: self.index[k]["last_used"]):
+            if self.total_bytes <= self.max_bytes:
+                break
+            self.remove_entry(key)
+
+    def remove_entry(self, key):
+        entry = self.index.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry["size"]
+
+        try:
+            os.remove(self.entry_path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.index):
+                self.remove_entry(key)
+        self.save_index()
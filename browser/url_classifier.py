@@ -0,0 +1,144 @@
+import re
+import ipaddress
+from functools import lru_cache
+
+# Decides whether something typed into the URL bar is an address or a search
+# query. The patterns are compiled once at import and results for recently
+# typed inputs are memoized, since load_page runs this on every navigation.
+
+URL_KIND = "url"
+SEARCH_KIND = "search"
+
+DIRECT_SCHEMES = ("about:", "data:", "view-source:", "chrome:", "blob:", "mailto:")
+
+HOST_PATTERN = (
+    r'(?:'
+        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?))|'  # domain
+        r'localhost|'  # localhost
+        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|'  # or ipv4
+        r'\[[0-9A-F:.]+(?:%[A-Z0-9]+)?\]'  # or ipv6 literal
+    r')'
+)
+# Hosts without a dot like "nas" or "router", with at least one letter so "10:30" stays a search
+SINGLE_LABEL_PATTERN = r'(?=[A-Z0-9-]*[A-Z])[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?'
+PORT_AND_PATH_PATTERN = r'(?::\d{1,5})?(?:[/?#]\S*)?$'
+
+URL_REGEX = re.compile(
+    r'^(?:(?:http|ftp)s?)://(?:' + HOST_PATTERN + r'|' + SINGLE_LABEL_PATTERN + r')' + PORT_AND_PATH_PATTERN,
+    re.IGNORECASE
+)
+# Typed without a scheme a single label is only a host when a port follows, "nas:5000"
+BARE_HOST_REGEX = re.compile(
+    r'^(?:' + HOST_PATTERN + PORT_AND_PATH_PATTERN + r'|' + SINGLE_LABEL_PATTERN + r':\d{1,5}(?:[/?#]\S*)?$)',
+    re.IGNORECASE
+)
+FILE_URL_REGEX = re.compile(r'^file://\S+$', re.IGNORECASE)
+SCHEME_REGEX = re.compile(r'^([A-Z][A-Z0-9+.-]*)://', re.IGNORECASE)
+HOST_PART_REGEX = re.compile(r'^(\[[^\]]*\]|[^/?#:]*)(.*)$', re.DOTALL)
+WINDOWS_PATH_REGEX = re.compile(r'^[A-Z]:[\\/]', re.IGNORECASE)
+IPV4_REGEX = re.compile(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$')
+PORT_REGEX = re.compile(r'^:(\d+)')
+MAX_PORT = 65535
+
+def encode_idn_host(host):
+    # Punycode for internationalized domain names, None if not encodable
+    if host.isascii():
+        return host
+    try:
+        return ".".join(label.encode("idna").decode("ascii") if label else label for label in host.split("."))
+    except UnicodeError:
+        return None
+
+def split_host(rest):
+    match = HOST_PART_REGEX.match(rest)
+    return match.group(1), match.group(2)
+
+def valid_ip_host(host):
+    # The regex only checks the shape, the address itself has to be valid too
+    if host.startswith("["):
+        try:
+            ipaddress.IPv6Address(host[1:-1].split("%", 1)[0])
+            return True
+        except ValueError:
+            return False
+
+    if IPV4_REGEX.match(host):
+        try:
+            ipaddress.IPv4Address(host)
+            return True
+        except ValueError:
+            return False
+
+    return True
+
+def valid_port(tail):
+    # The regex allows up to five digits, the port itself must fit in 1-65535
+    match = PORT_REGEX.match(tail)
+    return match is None or 1 <= int(match.group(1)) <= MAX_PORT
+
+def split_scheme(text, has_scheme):
+    if has_scheme:
+        scheme, rest = text.split("://", 1)
+        return f"{scheme}://", rest
+    return "", text
+
+def matches_host_regex(regex, text, has_scheme):
+    # ASCII input without IP literals only needs the regex
+    if text.isascii():
+        if regex.match(text) is None:
+            return False
+
+        _, rest = split_scheme(text, has_scheme)
+        host, tail = split_host(rest)
+        if not valid_port(tail):
+            return False
+        return not (host.startswith("[") or host[:1].isdigit()) or valid_ip_host(host)
+
+    # Internationalized domain names are checked in their punycode form
+    prefix, rest = split_scheme(text, has_scheme)
+    host, tail = split_host(rest)
+    ascii_host = encode_idn_host(host)
+
+    if ascii_host is None or not valid_port(tail):
+        return False
+
+    return regex.match(f"{prefix}{ascii_host}{tail}") is not None
+
+def is_valid_url(url):
+    if FILE_URL_REGEX.match(url):
+        return True
+
+    if not SCHEME_REGEX.match(url):
+        return False
+
+    return matches_host_regex(URL_REGEX, url, True)
+
+@lru_cache(maxsize=2048)
+def classify_input(text):
+    # Returns (URL_KIND, url to load) or (SEARCH_KIND, search terms)
+    text = text.strip()
+
+    if not text:
+        return (SEARCH_KIND, text)
+
+    lowered = text.lower()
+
+    if lowered.startswith(DIRECT_SCHEMES):
+        return (URL_KIND, text)
+
+    # Local files
+    if text.startswith("/"):
+        return (URL_KIND, f"file://{text}")
+    if WINDOWS_PATH_REGEX.match(text):
+        path = text.replace("\\", "/")
+        return (URL_KIND, f"file:///{path}")
+
+    # An explicit scheme is always meant as an address, the page shows if it can't load
+    if SCHEME_REGEX.match(text):
+        return (URL_KIND, text)
+
+    # Bare hosts like "example.com", "localhost:8080/x", "[::1]:3000", "nas:5000" or "bücher.de"
+    if " " not in text and matches_host_regex(BARE_HOST_REGEX, text, False):
+        return (URL_KIND, f"http://{text}")
+
+    return (SEARCH_KIND, text)